@@ -2,16 +2,15 @@
 Análisis de ofertas usando Pandas
 """
 
-import pandas as pd
-import json
+from dataset_ofertas import cargar_ofertas, convertir_json, es_dataset
 
-# Cargar el JSON
-print("Cargando datos...")
-with open("ofertas_muestra.json", "r", encoding="utf-8") as f:
-    data = json.load(f)
+# JSON o dataset Parquet (ver dataset_ofertas.py)
+ARCHIVO_OFERTAS = "ofertas_muestra.json"
 
-# Convertir a DataFrame
-df = pd.DataFrame(data["ofertas"])
+# Cargar las ofertas
+print("Cargando datos...")
+# (con los tipos compactos de esquema_ofertas.py: category, enteros chicos)
+df, metadata = cargar_ofertas(ARCHIVO_OFERTAS, reportar=True)
 
 print("=" * 70)
 print("INFORMACIÓN DEL DATASET")
@@ -88,12 +87,13 @@ try:
 except ImportError:
     print("✗ No se pudo guardar Excel (instala: pip install openpyxl)")
 
-# Exportar a Parquet (más eficiente)
-try:
-    df.to_parquet("ofertas_muestra.parquet", index=False)
-    print("✓ Guardado: ofertas_muestra.parquet")
-except ImportError:
-    print("✗ No se pudo guardar Parquet (instala: pip install pyarrow)")
+# Exportar a Parquet particionado (más eficiente, lo leen todos los scripts)
+if not es_dataset(ARCHIVO_OFERTAS):
+    try:
+        destino = convertir_json(ARCHIVO_OFERTAS)
+        print(f"✓ Guardado: {destino}")
+    except ImportError:
+        print("✗ No se pudo guardar Parquet (instala: pip install pyarrow)")
 
 print("\n" + "=" * 70)
 print("INFORMACIÓN DE COLUMNAS")
@@ -3,6 +3,7 @@ ABC Dataset - Actos Públicos Digitales
 Aplicación web para buscar y analizar ofertas de cargos docentes
 """
 import streamlit as st
+from esquema_ofertas import memoria
 from utils.data_loader import load_ofertas, load_cargos, get_available_files
 
 # Configuración de la página
@@ -150,6 +151,8 @@ with col2:
                 n_modalidades = df_ofertas['descnivelmodalidad'].nunique() if 'descnivelmodalidad' in df_ofertas.columns else 0
                 st.metric("Modalidades", n_modalidades)
 
+            st.caption(f"Memoria del DataFrame: {memoria(df_ofertas) / 1e6:,.1f} MB")
+
             st.markdown("---")
 
             # Top 5 distritos
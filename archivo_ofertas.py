@@ -0,0 +1,380 @@
+"""
+Archivo comprimido de extracciones históricas de ofertas (.jsonz).
+
+Cada extracción que se guarda para análisis histórico ocupa decenas o
+cientos de MB de JSON indentado, casi igual a la anterior. El archivo
+.jsonz guarda las mismas ofertas en bloques de OFERTAS_POR_BLOQUE, cada uno
+comprimido por separado con zstd y un diccionario entrenado con las propias
+ofertas: los nombres de campo, distritos, cargos y formatos de fecha que se
+repiten en cada oferta quedan en el diccionario, así hasta los bloques
+chicos comprimen más de 10x. Como cada bloque se descomprime solo, se puede
+leer cualquier bloque sin recorrer los anteriores.
+
+Estructura en disco:
+
+    OFERTASZ                # MAGIA
+    bloque 0                # NDJSON comprimido
+    bloque 1
+    ...
+    diccionario
+    índice                  # JSON: codec, metadata y posición de cada bloque
+    pie                     # posición y largo del índice, MAGIA
+
+Sin zstandard instalado (pip install zstandard) se escribe con zlib y un
+diccionario prefijado, que comprime algo menos; leer un archivo zstd sí
+requiere zstandard.
+"""
+import json
+import os
+import random
+import struct
+import zlib
+from datetime import date, datetime, time, timezone
+
+try:
+    import zstandard
+except ImportError:  # Se usa zlib
+    zstandard = None
+
+from lector_json import LectorJSON
+
+EXTENSION = ".jsonz"
+MAGIA = b"OFERTASZ"
+# Posición y largo del índice, seguidos de MAGIA
+PIE = struct.Struct("<QQ8s")
+VERSION = 1
+
+# Ofertas por bloque: la granularidad del acceso aleatorio
+OFERTAS_POR_BLOQUE = 100
+
+# Ofertas usadas para entrenar el diccionario (las primeras que llegan)
+OFERTAS_MUESTRA = 5_000
+TAMANO_DICCIONARIO = 112_640
+NIVEL_ZSTD = 9
+NIVEL_ZLIB = 9
+# zlib solo usa los últimos 32 KB del diccionario
+TAMANO_ZDICT = 32_768
+
+
+def es_archivo(ruta):
+    """True si ruta es un archivo comprimido de ofertas (por extensión)"""
+    return str(ruta).endswith(EXTENSION)
+
+
+def _requerir_zstandard():
+    if zstandard is None:
+        raise ImportError("Este archivo está comprimido con zstd: pip install zstandard")
+
+
+class EscritorArchivo:
+    """
+    Escribe ofertas en un archivo .jsonz.
+
+    Tiene la misma interfaz que los escritores de escritores.py, así
+    save_to_json escribe directo al archivo comprimido. Junta las primeras
+    OFERTAS_MUESTRA ofertas para entrenar el diccionario y desde ahí
+    comprime cada bloque apenas se completa. Escribe en un temporal que
+    reemplaza al destino recién al cerrar, con el índice completo.
+    """
+
+    def __init__(self, filename, metadata=None, codec=None):
+        self.filename = filename
+        self.total = 0
+        self.metadata = {"total_ofertas": 0, **(metadata or {})}
+        self.codec = codec or ("zstd" if zstandard is not None else "zlib")
+        if self.codec == "zstd":
+            _requerir_zstandard()
+        self._temporal = f"{filename}.tmp"
+        self._f = open(self._temporal, "wb")
+        self._f.write(MAGIA)
+        self._pendientes = []
+        self._diccionario = None
+        self._comprimir = None
+        self._bloques = []
+        self._bytes_json = 0
+
+    def escribir_lote(self, ofertas):
+        """Agrega un lote de ofertas; comprime los bloques que se completan"""
+        for oferta in ofertas:
+            self._pendientes.append(oferta)
+        self.total += len(ofertas)
+        if self._comprimir is None and len(self._pendientes) < OFERTAS_MUESTRA:
+            return
+        self._volcar()
+
+    def _entrenar(self):
+        """Diccionario a partir de las ofertas acumuladas hasta ahora"""
+        muestras = [_linea(oferta) for oferta in self._pendientes[:OFERTAS_MUESTRA]]
+        diccionario = b""
+        if self.codec == "zstd":
+            try:
+                diccionario = zstandard.train_dictionary(TAMANO_DICCIONARIO, muestras).as_bytes()
+            except zstandard.ZstdError:
+                # Muy pocas ofertas para entrenar: se comprime sin diccionario
+                diccionario = b""
+        elif muestras:
+            # zlib no entrena: el diccionario es un prefijo con ofertas de
+            # ejemplo, las más representativas al final
+            random.Random(0).shuffle(muestras)
+            diccionario = b"\n".join(muestras)[-TAMANO_ZDICT:]
+        self._diccionario = diccionario
+        self._comprimir = _compresor(self.codec, diccionario)
+
+    def _volcar(self, final=False):
+        """Comprime y escribe los bloques completos (y el último si final)"""
+        if self._comprimir is None:
+            self._entrenar()
+        inicio = 0
+        while len(self._pendientes) - inicio >= OFERTAS_POR_BLOQUE or (
+            final and inicio < len(self._pendientes)
+        ):
+            bloque = self._pendientes[inicio : inicio + OFERTAS_POR_BLOQUE]
+            inicio += len(bloque)
+            self._escribir_bloque(bloque)
+        del self._pendientes[:inicio]
+
+    def _escribir_bloque(self, ofertas):
+        datos = b"\n".join(_linea(oferta) for oferta in ofertas)
+        comprimido = self._comprimir(datos)
+        # Los extremos se eligen comparando instantes, no el texto: como
+        # texto "...00Z" queda después que "...00.500Z", que es posterior
+        minimo = maximo = None
+        for oferta in ofertas:
+            instante = _instante_bloque(oferta.get("finoferta"))
+            if instante is None:
+                continue
+            if minimo is None or instante < minimo[0]:
+                minimo = (instante, oferta["finoferta"])
+            if maximo is None or instante > maximo[0]:
+                maximo = (instante, oferta["finoferta"])
+        self._bloques.append([
+            self._f.tell(),
+            len(comprimido),
+            len(ofertas),
+            minimo[1] if minimo else None,
+            maximo[1] if maximo else None,
+        ])
+        self._f.write(comprimido)
+        self._bytes_json += len(datos)
+
+    def confirmar(self):
+        """
+        Sin checkpoints: el índice se escribe al cerrar, así que un archivo
+        a medio escribir no se puede reanudar (ver abortar).
+        """
+        return None
+
+    def abortar(self):
+        """Cierra el archivo con lo escrito hasta ahora, marcado como incompleto"""
+        self.cerrar({"incompleto": True})
+
+    def cerrar(self, metadata=None):
+        """Escribe lo pendiente, el diccionario, el índice y el pie"""
+        self._volcar(final=True)
+        self.metadata.update(metadata or {})
+        self.metadata["total_ofertas"] = self.total
+
+        posicion_diccionario = self._f.tell()
+        self._f.write(self._diccionario)
+        indice = json.dumps({
+            "version": VERSION,
+            "codec": self.codec,
+            "diccionario": [posicion_diccionario, len(self._diccionario)],
+            "bytes_json": self._bytes_json,
+            "metadata": self.metadata,
+            # [posición, bytes, ofertas, finoferta mínima, finoferta máxima]
+            "bloques": self._bloques,
+        }, ensure_ascii=False).encode("utf-8")
+        posicion_indice = self._f.tell()
+        self._f.write(indice)
+        self._f.write(PIE.pack(posicion_indice, len(indice), MAGIA))
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._f.close()
+        os.replace(self._temporal, self.filename)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.cerrar()
+        else:
+            self.abortar()
+
+
+class ArchivoOfertas:
+    """
+    Lee un archivo .jsonz.
+
+    Tiene la misma interfaz de lectura que LectorJSON (lotes(), metadata,
+    iterar las ofertas), así los cargadores lo usan igual que a un JSON.
+    Además permite leer un bloque suelto y saltear los bloques cuyas
+    fechas de cierre quedan fuera de un rango.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        with open(ruta, "rb") as f:
+            if f.read(len(MAGIA)) != MAGIA:
+                raise ValueError(f"{ruta} no es un archivo de ofertas comprimido")
+            f.seek(-PIE.size, os.SEEK_END)
+            posicion, largo, magia = PIE.unpack(f.read(PIE.size))
+            if magia != MAGIA:
+                raise ValueError(f"{ruta} está incompleto (sin índice)")
+            f.seek(posicion)
+            indice = json.loads(f.read(largo).decode("utf-8"))
+            f.seek(indice["diccionario"][0])
+            diccionario = f.read(indice["diccionario"][1])
+
+        self.codec = indice["codec"]
+        self.metadata = indice["metadata"]
+        self.bloques = indice["bloques"]
+        self.bytes_json = indice["bytes_json"]
+        self.total = sum(bloque[2] for bloque in self.bloques)
+        self._descomprimir = _descompresor(self.codec, diccionario)
+
+    def __len__(self):
+        return self.total
+
+    def leer_bloque(self, numero, f=None):
+        """Ofertas del bloque numero (acceso directo, sin leer los demás)"""
+        posicion, largo = self.bloques[numero][:2]
+        if f is None:
+            with open(self.ruta, "rb") as f:
+                return self.leer_bloque(numero, f)
+        f.seek(posicion)
+        datos = self._descomprimir(f.read(largo))
+        return [json.loads(linea) for linea in datos.split(b"\n")]
+
+    def lotes(self, desde=None, hasta=None):
+        """
+        Genera las ofertas de a bloques, en el orden en que se guardaron.
+
+        Args:
+            desde, hasta: Rango de finoferta (fecha ISO como en Solr, date o
+                datetime). Una fecha sin hora incluye todo ese día. Se
+                saltean sin leerlos los bloques que quedan fuera; dentro de
+                un bloque leído no se filtra oferta por oferta
+        """
+        desde = _instante(desde) if desde else None
+        hasta = _instante(hasta, fin_del_dia=True) if hasta else None
+        with open(self.ruta, "rb") as f:
+            for numero, bloque in enumerate(self.bloques):
+                minimo, maximo = _instante_bloque(bloque[3]), _instante_bloque(bloque[4])
+                if desde and maximo and maximo < desde:
+                    continue
+                if hasta and minimo and minimo > hasta:
+                    continue
+                yield self.leer_bloque(numero, f)
+
+    def __iter__(self):
+        """Las ofertas de a una"""
+        for lote in self.lotes():
+            yield from lote
+
+
+def _instante(valor, fin_del_dia=False):
+    """
+    datetime UTC de una fecha ISO de Solr, un date o un datetime. Las fechas
+    ISO se comparan como datetime porque los milisegundos son opcionales; un
+    día sin hora es su primer instante (o el último, con fin_del_dia).
+    """
+    if isinstance(valor, datetime):
+        return valor if valor.tzinfo else valor.replace(tzinfo=timezone.utc)
+    if isinstance(valor, date):
+        return datetime.combine(valor, time.max if fin_del_dia else time.min, timezone.utc)
+    texto = str(valor)
+    if "T" not in texto:
+        return _instante(date.fromisoformat(texto), fin_del_dia)
+    return _instante(datetime.fromisoformat(texto.replace("Z", "+00:00")))
+
+
+def _instante_bloque(valor):
+    """Extremo de finoferta de un bloque, o None si falta o no se entiende"""
+    try:
+        return _instante(valor) if valor else None
+    except ValueError:
+        return None
+
+
+def _linea(oferta):
+    return json.dumps(oferta, ensure_ascii=False).encode("utf-8")
+
+
+def _compresor(codec, diccionario):
+    if codec == "zstd":
+        datos = zstandard.ZstdCompressionDict(diccionario) if diccionario else None
+        compresor = zstandard.ZstdCompressor(level=NIVEL_ZSTD, dict_data=datos)
+        return compresor.compress
+    if codec == "zlib":
+        def comprimir(datos):
+            if diccionario:
+                compresor = zlib.compressobj(NIVEL_ZLIB, zdict=diccionario)
+            else:
+                compresor = zlib.compressobj(NIVEL_ZLIB)
+            return compresor.compress(datos) + compresor.flush()
+
+        return comprimir
+    raise ValueError(f"Codec desconocido: {codec}")
+
+
+def _descompresor(codec, diccionario):
+    if codec == "zstd":
+        _requerir_zstandard()
+        datos = zstandard.ZstdCompressionDict(diccionario) if diccionario else None
+        return zstandard.ZstdDecompressor(dict_data=datos).decompress
+    if codec == "zlib":
+        def descomprimir(datos):
+            if diccionario:
+                descompresor = zlib.decompressobj(zdict=diccionario)
+            else:
+                descompresor = zlib.decompressobj()
+            return descompresor.decompress(datos) + descompresor.flush()
+
+        return descomprimir
+    raise ValueError(f"Codec desconocido: {codec}")
+
+
+def archivar_json(archivo_json, destino=None, codec=None):
+    """
+    Comprime un ofertas_*.json en un archivo .jsonz, en una sola pasada.
+
+    Args:
+        archivo_json: Archivo {"metadata": ..., "ofertas": [...]} (se lee de
+            a lotes, ver lector_json.py)
+        destino: Archivo de salida (default: mismo nombre con .jsonz)
+        codec: "zstd" o "zlib" (default: zstd si está instalado)
+
+    Returns:
+        Ruta del archivo comprimido
+    """
+    destino = destino or os.path.splitext(archivo_json)[0] + EXTENSION
+    lector = LectorJSON(archivo_json)
+    escritor = EscritorArchivo(destino, codec=codec)
+    for lote in lector.lotes():
+        escritor.escribir_lote(lote)
+    escritor.cerrar({**lector.metadata, "origen": os.path.basename(archivo_json)})
+
+    original = os.path.getsize(archivo_json)
+    comprimido = os.path.getsize(destino)
+    print(
+        f"Archivo guardado: {destino} ({escritor.total:,} ofertas, "
+        f"{original / 1e6:,.1f} MB -> {comprimido / 1e6:,.1f} MB, "
+        f"{original / comprimido:.1f}x)"
+    )
+    return destino
+
+
+if __name__ == "__main__":
+    import glob
+
+    # Opción 1: Comprimir todas las extracciones JSON del directorio
+    for archivo in sorted(glob.glob("ofertas_*.json")):
+        archivar_json(archivo)
+
+    # Opción 2: Leer un bloque suelto o solo los bloques de un rango de cierre
+    # archivo = ArchivoOfertas("ofertas_muestra.jsonz")
+    # print(archivo.leer_bloque(0)[0])
+    # for lote in archivo.lotes(desde="2025-03-01", hasta="2025-03-31"):
+    #     print(len(lote))
@@ -0,0 +1,377 @@
+"""
+Base SQLite de ofertas con índices y upsert por iddetalle.
+
+Alternativa al dataset Parquet para consultas puntuales: las columnas que
+filtra el dashboard (estado, descdistrito, areaincumbencia,
+descnivelmodalidad, finoferta) tienen índice, así una búsqueda filtrada lee
+solo las filas que coinciden en lugar de cargar y copiar todas las ofertas.
+
+Cada lote del scraper se inserta con upsert por iddetalle: volver a extraer
+(o sincronizar) sobre la misma base actualiza las ofertas existentes en
+lugar de duplicarlas, y solo se pisan los campos que trae la oferta.
+
+Las fechas se guardan normalizadas (UTC, con milisegundos, ver
+_fecha_iso): Solr manda los milisegundos solo a veces, y con un único
+formato los rangos y el orden se resuelven comparando texto, con índice.
+
+Usa sqlite3 de la biblioteca estándar; no requiere dependencias extra.
+"""
+import json
+import sqlite3
+from datetime import date, datetime, timezone
+
+from dedup import clave_oferta
+from esquema_ofertas import ESQUEMA
+
+TABLA = "ofertas"
+CLAVE = "iddetalle"
+
+# PRAGMA user_version: 1 = fechas normalizadas (las bases anteriores se
+# migran al abrirlas)
+VERSION = 1
+
+TIPOS_SQL = {
+    "texto": "TEXT",
+    "entero": "INTEGER",
+    "booleano": "INTEGER",
+    # ISO 8601 normalizado (ver _fecha_iso): se compara bien como texto
+    "fecha": "TEXT",
+}
+
+# Columnas con índice (las de filtrar_ofertas, más idoferta)
+CAMPOS_INDICE = (
+    "estado",
+    "descdistrito",
+    "areaincumbencia",
+    "descnivelmodalidad",
+    "finoferta",
+    "idoferta",
+)
+
+# Argumento de filtrar_ofertas -> columna
+FILTROS_IGUALDAD = {
+    "modalidad": "descnivelmodalidad",
+    "distrito": "descdistrito",
+    "areaincumbencia": "areaincumbencia",
+    "estado": "estado",
+}
+
+# Valores de los selectbox del dashboard que significan "sin filtro"
+SIN_FILTRO = ("Todas", "Todos")
+
+# Columnas donde busca el texto libre (sin índice, sin distinguir mayúsculas)
+CAMPOS_BUSQUEDA = ("cargo", "descripcionarea", "descdistrito")
+
+EXTENSIONES = (".sqlite", ".sqlite3", ".db")
+
+
+def es_base_sqlite(ruta):
+    """True si ruta es una base SQLite de ofertas (por extensión)"""
+    return str(ruta).endswith(EXTENSIONES)
+
+
+class BaseOfertas:
+    """
+    Tabla de ofertas en SQLite.
+
+    Args:
+        archivo: Archivo de la base (se crea si no existe)
+    """
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.conexion = sqlite3.connect(archivo, check_same_thread=False)
+        # WAL: las lecturas del dashboard no bloquean al scraper que escribe
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA synchronous=NORMAL")
+        # LOWER y LIKE de SQLite solo pasan a minúsculas el ASCII: la
+        # búsqueda usa str.lower, igual que filtrar_ofertas
+        self.conexion.create_function("contiene", 2, _contiene, deterministic=True)
+        self._sql_upsert = {}
+        self._crear_tablas()
+
+    def _crear_tablas(self):
+        columnas = ",\n    ".join(
+            f"{campo} {TIPOS_SQL[tipo]}" + (" PRIMARY KEY" if campo == CLAVE else "")
+            for campo, tipo in ESQUEMA.items()
+        )
+        with self.conexion:
+            self.conexion.execute(f"CREATE TABLE IF NOT EXISTS {TABLA} (\n    {columnas}\n)")
+            for campo in CAMPOS_INDICE:
+                self.conexion.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{TABLA}_{campo} ON {TABLA} ({campo})"
+                )
+            self.conexion.execute(
+                "CREATE TABLE IF NOT EXISTS metadata (clave TEXT PRIMARY KEY, valor TEXT)"
+            )
+            if self.conexion.execute("PRAGMA user_version").fetchone()[0] < VERSION:
+                self._normalizar_fechas()
+                self.conexion.execute(f"PRAGMA user_version = {VERSION}")
+
+    def _normalizar_fechas(self):
+        """Lleva las fechas de una base anterior al formato de _fecha_iso"""
+        self.conexion.create_function("fecha_iso", 1, _fecha_iso, deterministic=True)
+        for campo, tipo in ESQUEMA.items():
+            if tipo == "fecha":
+                self.conexion.execute(
+                    f"UPDATE {TABLA} SET {campo} = fecha_iso({campo}) WHERE {campo} IS NOT NULL"
+                )
+
+    def upsert(self, ofertas):
+        """
+        Inserta o actualiza un lote de ofertas por iddetalle.
+
+        Las ofertas sin iddetalle usan id como clave; si tampoco tienen id
+        entero se descartan. Los campos que no están en ESQUEMA se ignoran.
+
+        Returns:
+            Cantidad de ofertas escritas
+        """
+        # Agrupadas por conjunto de campos: un perfil parcial (fl) no debe
+        # borrar los campos que no trajo
+        grupos = {}
+        for oferta in ofertas:
+            clave = clave_oferta(oferta)
+            if clave is None:
+                continue
+            campos = tuple(c for c in ESQUEMA if c in oferta and c != CLAVE)
+            fila = [clave] + [_valor_sql(oferta[c], ESQUEMA[c]) for c in campos]
+            grupos.setdefault(campos, []).append(fila)
+
+        with self.conexion:
+            for campos, filas in grupos.items():
+                self.conexion.executemany(self._upsert(campos), filas)
+        return sum(len(filas) for filas in grupos.values())
+
+    def _upsert(self, campos):
+        """Sentencia INSERT ... ON CONFLICT para un conjunto de campos"""
+        if campos not in self._sql_upsert:
+            columnas = (CLAVE,) + campos
+            actualizar = ", ".join(f"{c} = excluded.{c}" for c in campos)
+            conflicto = f"DO UPDATE SET {actualizar}" if campos else "DO NOTHING"
+            self._sql_upsert[campos] = (
+                f"INSERT INTO {TABLA} ({', '.join(columnas)}) "
+                f"VALUES ({', '.join('?' for _ in columnas)}) "
+                f"ON CONFLICT({CLAVE}) {conflicto}"
+            )
+        return self._sql_upsert[campos]
+
+    def consultar(self, columnas=None, limite=None, **filtros):
+        """
+        Ofertas que cumplen los filtros, como DataFrame.
+
+        Acepta los mismos filtros que utils.data_loader.filtrar_ofertas
+        (modalidad, distrito, areaincumbencia, estado, busqueda, fecha_inicio,
+        fecha_fin) y los resuelve con una consulta sobre las columnas
+        indexadas.
+
+        Args:
+            columnas: Columnas a devolver (None = todas)
+            limite: Máximo de filas (None = sin límite)
+
+        Returns:
+            DataFrame con las fechas como texto ISO UTC (ver _fecha_iso)
+        """
+        import pandas as pd
+
+        donde, parametros = _where(filtros)
+        sql = f"SELECT {_columnas_sql(columnas)} FROM {TABLA}{donde} ORDER BY finoferta DESC"
+        if limite:
+            sql += " LIMIT ?"
+            parametros.append(int(limite))
+        return pd.read_sql_query(sql, self.conexion, params=parametros)
+
+    def contar(self, **filtros):
+        """Cantidad de ofertas que cumplen los filtros (ver consultar)"""
+        donde, parametros = _where(filtros)
+        return self.conexion.execute(
+            f"SELECT COUNT(*) FROM {TABLA}{donde}", parametros
+        ).fetchone()[0]
+
+    def valores(self, campo):
+        """Valores distintos de una columna, ordenados (sin nulos)"""
+        _validar_columna(campo)
+        filas = self.conexion.execute(
+            f"SELECT DISTINCT {campo} FROM {TABLA} WHERE {campo} IS NOT NULL ORDER BY {campo}"
+        )
+        return [fila[0] for fila in filas]
+
+    def rango(self, campo="finoferta"):
+        """(mínimo, máximo) de una columna; con índice es una lectura por extremo"""
+        _validar_columna(campo)
+        return self.conexion.execute(f"SELECT MIN({campo}), MAX({campo}) FROM {TABLA}").fetchone()
+
+    def leer_metadata(self):
+        """Metadata guardada por el escritor, con total_ofertas actualizado"""
+        metadata = {
+            clave: json.loads(valor)
+            for clave, valor in self.conexion.execute("SELECT clave, valor FROM metadata")
+        }
+        metadata["total_ofertas"] = self.contar()
+        return metadata
+
+    def guardar_metadata(self, metadata):
+        with self.conexion:
+            self.conexion.executemany(
+                "INSERT OR REPLACE INTO metadata (clave, valor) VALUES (?, ?)",
+                [(k, json.dumps(v, ensure_ascii=False)) for k, v in metadata.items()],
+            )
+
+    def cerrar(self):
+        """Actualiza las estadísticas del planificador y cierra la conexión"""
+        self.conexion.execute("PRAGMA optimize")
+        self.conexion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cerrar()
+
+
+class EscritorSQLite:
+    """
+    Escritor de save_to_json sobre una BaseOfertas (formato="sqlite").
+
+    Cada lote se confirma en su propia transacción, así que un corte deja
+    la base consistente. Como el upsert es idempotente, reanudar desde un
+    checkpoint no necesita descartar nada: lo repetido se vuelve a escribir
+    sobre sí mismo.
+    """
+
+    def __init__(self, filename, metadata=None):
+        self.filename = filename
+        self.total = 0
+        self.metadata = dict(metadata or {})
+        self.base = BaseOfertas(filename)
+
+    def escribir_lote(self, ofertas):
+        """Upsert de un lote de ofertas"""
+        self.total += self.base.upsert(ofertas)
+
+    def confirmar(self):
+        """Estado para reanudar (los lotes ya están confirmados en la base)"""
+        return {"total": self.total, "metadata": self.metadata}
+
+    @classmethod
+    def reanudar(cls, filename, estado):
+        escritor = cls(filename, estado["metadata"])
+        escritor.total = estado["total"]
+        return escritor
+
+    def abortar(self):
+        """Cierra la base; los lotes escritos quedan guardados"""
+        self.base.cerrar()
+
+    def cerrar(self, metadata=None):
+        """Guarda la metadata de la extracción y cierra la base"""
+        self.metadata.update(metadata or {})
+        self.metadata["ofertas_escritas"] = self.total
+        self.base.guardar_metadata(self.metadata)
+        self.base.cerrar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.cerrar()
+        else:
+            self.abortar()
+
+
+def _where(filtros):
+    """
+    Traduce los argumentos de filtrar_ofertas a WHERE con parámetros.
+
+    Returns:
+        Tuple con (cláusula WHERE o "", lista de parámetros)
+    """
+    condiciones = []
+    parametros = []
+
+    for argumento, columna in FILTROS_IGUALDAD.items():
+        valor = filtros.get(argumento)
+        if valor and valor not in SIN_FILTRO:
+            condiciones.append(f"{columna} = ?")
+            parametros.append(valor)
+
+    if filtros.get("busqueda"):
+        texto = filtros["busqueda"].lower()
+        condiciones.append(
+            "(" + " OR ".join(f"contiene({c}, ?)" for c in CAMPOS_BUSQUEDA) + ")"
+        )
+        parametros.extend([texto] * len(CAMPOS_BUSQUEDA))
+
+    if filtros.get("fecha_inicio"):
+        condiciones.append("finoferta >= ?")
+        parametros.append(_fecha_iso(filtros["fecha_inicio"]))
+    if filtros.get("fecha_fin"):
+        condiciones.append("finoferta <= ?")
+        parametros.append(_fecha_iso(filtros["fecha_fin"]))
+
+    donde = " WHERE " + " AND ".join(condiciones) if condiciones else ""
+    return donde, parametros
+
+
+def _fecha_iso(valor):
+    """
+    Fecha (ISO de Solr, date o datetime) como texto UTC de ancho fijo,
+    "AAAA-MM-DDTHH:MM:SS.mmmZ", que se ordena igual que las fechas. Un día
+    sin hora es las 00:00, como pd.Timestamp en filtrar_ofertas; un texto
+    que no es fecha queda como está.
+    """
+    if not isinstance(valor, datetime):
+        if isinstance(valor, date):
+            valor = datetime(valor.year, valor.month, valor.day)
+        else:
+            try:
+                valor = datetime.fromisoformat(str(valor).replace("Z", "+00:00"))
+            except ValueError:
+                return valor
+    if valor.tzinfo is not None:
+        valor = valor.astimezone(timezone.utc)
+    return valor.strftime("%Y-%m-%dT%H:%M:%S.") + f"{valor.microsecond // 1000:03d}Z"
+
+
+def _contiene(valor, texto):
+    """True si texto (ya en minúsculas) aparece en valor (función de SQLite)"""
+    return valor is not None and texto in str(valor).lower()
+
+
+def _columnas_sql(columnas):
+    """Lista de columnas del SELECT; las que no están en ESQUEMA se ignoran"""
+    return ", ".join(c for c in columnas or () if c in ESQUEMA) or "*"
+
+
+def _validar_columna(campo):
+    if campo not in ESQUEMA:
+        raise ValueError(f"Columna desconocida: {campo!r}")
+    return campo
+
+
+def _valor_sql(valor, tipo):
+    if isinstance(valor, (list, dict)):
+        return json.dumps(valor, ensure_ascii=False)
+    if tipo == "fecha" and valor is not None:
+        return _fecha_iso(valor)
+    return valor
+
+
+if __name__ == "__main__":
+    # Opción 1: Cargar un JSON existente en la base y consultar
+    with open("ofertas_muestra.json", "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    with BaseOfertas("ofertas_muestra.sqlite") as base:
+        print(f"Escritas: {base.upsert(data['ofertas']):,} ofertas")
+        df = base.consultar(
+            columnas=["cargo", "escuela", "finoferta"],
+            estado="Publicada",
+            distrito="LA PLATA",
+        )
+        print(df.head())
+
+    # Opción 2: Extraer directo a la base (upsert, se puede repetir)
+    # from scraper_apd import APDScraper
+    # APDScraper().save_to_json("ofertas_completas.sqlite")
@@ -0,0 +1,177 @@
+"""
+Benchmark de throughput y memoria del scraper contra el Solr local.
+
+Para cada tamaño de índice levanta fake_solr.py en un proceso aparte y
+extrae todo con cada modo de paginación (offset secuencial, offset
+concurrente, cursorMark y CSV columnar). Cada extracción corre en un proceso
+nuevo, así el pico de memoria (RSS) medido es solo el de ese modo.
+
+Los resultados se imprimen como tabla y se guardan en
+benchmark_resultados.json.
+"""
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TAMANOS = (10_000, 100_000, 721_000)
+
+# Modo -> (método, argumentos)
+MODOS = {
+    "offset": ("save_to_json", {}),
+    "concurrente": ("save_to_json", {"concurrencia": 8}),
+    "cursor": ("save_to_json", {"cursor": True}),
+    "ndjson_checkpoint": ("save_to_json", {"formato": "ndjson", "checkpoint": True}),
+    "csv": ("save_columnar", {}),
+}
+
+
+def _rss_pico_mb():
+    """Pico de memoria residente del proceso actual, en MB"""
+    if resource is None:
+        return None
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _servir(docs, opciones, cola):
+    """Proceso del servidor: levanta FakeSolr y avisa la URL"""
+    from fake_solr import FakeSolr
+
+    fake = FakeSolr(docs, **opciones)
+    cola.put(fake.iniciar())
+    while True:
+        time.sleep(3600)
+
+
+def _ejecutar_modo(url, modo, directorio, batch_size):
+    """Corre una extracción completa en este proceso y devuelve sus medidas"""
+    # config.py exige un endpoint; el local tiene prioridad sobre el del .env
+    os.environ["END_POINT_LOCAL"] = url
+    from control_tasa import ControladorFijo
+    from scraper_apd import APDScraper
+
+    metodo, argumentos = MODOS[modo]
+    if batch_size:
+        argumentos = {**argumentos, "batch_size": batch_size}
+
+    extension = ".ndjson" if argumentos.get("formato") == "ndjson" else ".json"
+    if metodo == "save_columnar":
+        try:
+            import pyarrow  # noqa: F401
+            extension = ".parquet"
+        except ImportError:
+            extension = ".csv"
+    archivo = os.path.join(directorio, f"{modo}{extension}")
+
+    # Sin pausa entre peticiones: se mide el scraper, no el controlador
+    scraper = APDScraper(base_url=url, controlador=ControladorFijo(pausa=0))
+    rss_inicial = _rss_pico_mb()
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        completo = getattr(scraper, metodo)(archivo, **argumentos)
+    segundos = time.perf_counter() - inicio
+
+    metricas = scraper.metricas.resumen(scraper.transferencia)
+    docs = metricas["contadores"]["docs"]
+    rss = _rss_pico_mb()
+    return {
+        "modo": modo,
+        "completo": completo,
+        "docs": docs,
+        "segundos": round(segundos, 2),
+        "docs_por_seg": round(docs / segundos, 1) if segundos else 0.0,
+        "rss_pico_mb": round(rss, 1) if rss is not None else None,
+        "rss_extraccion_mb": round(rss - rss_inicial, 1) if rss is not None else None,
+        "peticiones": metricas["contadores"]["peticiones"],
+        "mb_red": round(scraper.transferencia["bytes_red"] / 1e6, 2),
+        "mb_archivo": round(os.path.getsize(archivo) / 1e6, 2),
+        "cuello_de_botella": metricas["cuello_de_botella"],
+        "etapas_pct": metricas["etapas_pct"],
+    }
+
+
+def ejecutar_benchmark(
+    tamanos=TAMANOS,
+    modos=tuple(MODOS),
+    batch_size=None,
+    latencia=0.0,
+    latencia_profundidad=0.0,
+    tasa_errores=0.0,
+    archivo_resultados="benchmark_resultados.json",
+):
+    """
+    Mide throughput y memoria de cada modo de extracción.
+
+    Args:
+        tamanos: Cantidades de ofertas del índice sintético
+        modos: Modos a medir (ver MODOS)
+        batch_size: Registros por petición (None = el default de cada método)
+        latencia, latencia_profundidad, tasa_errores: Inyección en el
+            servidor (ver fake_solr.FakeSolr)
+        archivo_resultados: JSON donde guardar los resultados (None = no guardar)
+
+    Returns:
+        Lista de dicts con las medidas de cada (tamaño, modo)
+    """
+    contexto = multiprocessing.get_context("spawn")
+    opciones = {
+        "latencia": latencia,
+        "latencia_profundidad": latencia_profundidad,
+        "tasa_errores": tasa_errores,
+    }
+    resultados = []
+
+    for docs in tamanos:
+        print(f"\n>> Índice de {docs:,} ofertas")
+        cola = contexto.Queue()
+        servidor = contexto.Process(target=_servir, args=(docs, opciones, cola), daemon=True)
+        servidor.start()
+        url = cola.get(timeout=300)
+
+        try:
+            with tempfile.TemporaryDirectory() as directorio:
+                for modo in modos:
+                    # Un proceso por modo para que el pico de RSS sea solo suyo
+                    with ProcessPoolExecutor(1, mp_context=contexto) as executor:
+                        r = executor.submit(
+                            _ejecutar_modo, url, modo, directorio, batch_size
+                        ).result()
+                    r["indice"] = docs
+                    resultados.append(r)
+                    rss = f"{r['rss_pico_mb']:8.1f} MB" if r["rss_pico_mb"] is not None else "     s/d"
+                    print(
+                        f"{modo:18} {r['docs']:>9,} docs {r['segundos']:8.2f}s "
+                        f"{r['docs_por_seg']:>10,.0f} docs/s | RSS {rss} | "
+                        f"cuello: {r['cuello_de_botella']}"
+                        + ("" if r["completo"] else " | INCOMPLETO")
+                    )
+        finally:
+            servidor.terminate()
+            servidor.join()
+
+    if archivo_resultados:
+        with open(archivo_resultados, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados guardados en {archivo_resultados}")
+    return resultados
+
+
+if __name__ == "__main__":
+    # Opción 1: Suite completa (10k, 100k y 721k ofertas, todos los modos)
+    ejecutar_benchmark()
+
+    # Opción 2: Rápido, solo 10k
+    # ejecutar_benchmark(tamanos=(10_000,))
+
+    # Opción 3: Con latencia y errores parecidos al servidor real
+    # ejecutar_benchmark(latencia=0.05, latencia_profundidad=0.5, tasa_errores=0.01)
@@ -0,0 +1,234 @@
+"""
+Cliente HTTP compartido para todas las llamadas a la API de APD.
+
+Mantiene una única requests.Session por proceso con un pool de conexiones
+dimensionado, keep-alive y un solo contexto TLS reutilizado, así los
+handshakes contra el servidor con SSL antiguo no se repiten en cada llamada.
+
+El endpoint sale de config.API_ENDPOINT; definiendo END_POINT_LOCAL en el
+.env se apunta todo el proyecto a un servidor local de reemplazo.
+
+Casetes: con modo "grabar" cada par petición/respuesta (cuerpo Latin-1,
+headers, status y tiempo) se agrega a un archivo JSONL; con modo
+"reproducir" esas respuestas se sirven sin red, a la velocidad grabada o
+acelerada. Se activan por sesión (crear_sesion) o para todo el proceso con
+CASETE y CASETE_MODO en el .env.
+"""
+import json
+import ssl
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+import requests
+import urllib3
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from config import CASETE, CASETE_MODO
+
+# Deshabilitar advertencias de SSL
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# Conexiones por host en el pool compartido
+MAX_CONEXIONES = 16
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+    "Referer": "http://servicios.abc.gob.ar/",
+}
+
+_contexto_tls = None
+_sesion = None
+_lock = threading.Lock()
+
+
+def contexto_tls():
+    """Contexto TLS compartido que acepta TLS 1.0+ y cifrados antiguos"""
+    global _contexto_tls
+    if _contexto_tls is None:
+        ctx = ssl.create_default_context()
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+        ctx.set_ciphers("DEFAULT@SECLEVEL=1")
+        # Permitir TLS 1.0 y superiores
+        ctx.minimum_version = ssl.TLSVersion.TLSv1
+        _contexto_tls = ctx
+    return _contexto_tls
+
+
+class TLSAdapter(HTTPAdapter):
+    """Adapter que fuerza TLS 1.0/1.1/1.2 para servidores con SSL antiguo"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["ssl_context"] = contexto_tls()
+        return super().init_poolmanager(*args, **kwargs)
+
+
+# Headers que dejan de valer porque el casete guarda el cuerpo ya descomprimido
+_HEADERS_TRANSPORTE = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+class AdaptadorGrabacion(BaseAdapter):
+    """Envía por el adapter real y agrega cada respuesta al casete"""
+
+    def __init__(self, real, archivo):
+        super().__init__()
+        self.real = real
+        self.archivo = archivo
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        # response.elapsed lo completa la sesión después de send()
+        inicio = time.perf_counter()
+        response = self.real.send(request, **kwargs)
+        segundos = time.perf_counter() - inicio
+        registro = {
+            "fecha": datetime.now().isoformat(),
+            "metodo": request.method,
+            "url": request.url,
+            "clave": clave_peticion(request.method, request.url),
+            "status": response.status_code,
+            "headers": {
+                k: v for k, v in response.headers.items() if k.lower() not in _HEADERS_TRANSPORTE
+            },
+            # Latin-1 mapea cada byte a un carácter: el cuerpo vuelve idéntico
+            "cuerpo": response.content.decode("latin-1"),
+            "segundos": round(segundos, 6),
+        }
+        linea = json.dumps(registro, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.archivo, "a", encoding="utf-8") as f:
+                f.write(linea)
+        return response
+
+    def close(self):
+        self.real.close()
+
+
+class AdaptadorReproduccion(BaseAdapter):
+    """
+    Sirve las respuestas de un casete sin red.
+
+    Las respuestas de una misma petición se entregan en el orden grabado
+    (p.ej. un 503 y después el 200 del reintento); la última se repite si la
+    petición vuelve a llegar. Una petición que no está en el casete recibe
+    un 404.
+
+    Args:
+        archivo: Casete JSONL grabado con AdaptadorGrabacion
+        velocidad: Multiplicador sobre el tiempo grabado (1 = igual que al
+            grabar, 10 = diez veces más rápido). None o 0 = sin esperas.
+    """
+
+    def __init__(self, archivo, velocidad=None):
+        super().__init__()
+        self.velocidad = velocidad
+        self.respuestas = {}
+        self._lock = threading.Lock()
+        with open(archivo, "r", encoding="utf-8") as f:
+            for linea in f:
+                if linea.strip():
+                    registro = json.loads(linea)
+                    self.respuestas.setdefault(registro["clave"], deque()).append(registro)
+
+    def send(self, request, **kwargs):
+        clave = clave_peticion(request.method, request.url)
+        with self._lock:
+            cola = self.respuestas.get(clave)
+            if cola:
+                registro = cola.popleft() if len(cola) > 1 else cola[0]
+            else:
+                registro = None
+
+        if registro is None:
+            registro = {
+                "status": 404,
+                "headers": {"Content-Type": "text/plain"},
+                "cuerpo": f"No está en el casete: {clave}",
+                "segundos": 0.0,
+            }
+        elif self.velocidad:
+            time.sleep(registro["segundos"] / self.velocidad)
+
+        response = requests.Response()
+        response.status_code = registro["status"]
+        response.headers = CaseInsensitiveDict(registro["headers"])
+        response._content = registro["cuerpo"].encode("latin-1")
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=registro["segundos"])
+        response.reason = "Reproducido"
+        return response
+
+    def close(self):
+        pass
+
+
+def clave_peticion(metodo, url):
+    """Método, ruta y parámetros ordenados: identifica una petición en el casete"""
+    partes = urlparse(url)
+    params = urlencode(sorted(parse_qsl(partes.query, keep_blank_values=True)))
+    return f"{metodo} {partes.path}?{params}"
+
+
+def usar_casete(sesion, archivo, modo="reproducir", velocidad=None):
+    """
+    Graba o reproduce todas las peticiones de una sesión con un casete.
+
+    Args:
+        sesion: requests.Session (p.ej. la de crear_sesion)
+        archivo: Casete JSONL
+        modo: "grabar" (agrega al archivo) o "reproducir" (sin red)
+        velocidad: Solo al reproducir, ver AdaptadorReproduccion
+    """
+    if modo == "grabar":
+        for prefijo in ("https://", "http://"):
+            sesion.mount(prefijo, AdaptadorGrabacion(sesion.adapters[prefijo], archivo))
+    elif modo == "reproducir":
+        adaptador = AdaptadorReproduccion(archivo, velocidad)
+        for prefijo in ("https://", "http://"):
+            sesion.mount(prefijo, adaptador)
+    else:
+        raise ValueError(f"Modo de casete desconocido: {modo}")
+    return sesion
+
+
+def crear_sesion(
+    max_conexiones=MAX_CONEXIONES, casete=None, modo_casete="reproducir", velocidad=None
+):
+    """
+    Crea una sesión nueva con el pool dimensionado.
+
+    Preferir get_sesion(); esto es para quien necesite un pool propio.
+
+    Args:
+        max_conexiones: Conexiones por host que se mantienen abiertas
+        casete: Archivo JSONL para grabar o reproducir (ver usar_casete)
+        modo_casete: "grabar" o "reproducir"
+        velocidad: Al reproducir, multiplicador sobre el tiempo grabado
+    """
+    sesion = requests.Session()
+    sesion.mount("https://", TLSAdapter(pool_connections=4, pool_maxsize=max_conexiones))
+    # http:// para el servidor local de reemplazo
+    sesion.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=max_conexiones))
+    sesion.headers.update(HEADERS)
+    sesion.verify = False
+    if casete:
+        usar_casete(sesion, casete, modo_casete, velocidad)
+    return sesion
+
+
+def get_sesion():
+    """Sesión compartida del proceso (se crea en el primer uso)"""
+    global _sesion
+    if _sesion is None:
+        with _lock:
+            if _sesion is None:
+                _sesion = crear_sesion(casete=CASETE, modo_casete=CASETE_MODO)
+    return _sesion
@@ -10,9 +10,16 @@ from dotenv import load_dotenv
 env_path = Path(__file__).parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
-# API Endpoint
-API_ENDPOINT = os.getenv('END_POINT')
+# API Endpoint. END_POINT_LOCAL (opcional) apunta todo el proyecto a un
+# servidor Solr local de reemplazo en lugar del servidor real
+API_ENDPOINT_LOCAL = os.getenv('END_POINT_LOCAL')
+API_ENDPOINT = API_ENDPOINT_LOCAL or os.getenv('END_POINT')
 
 # Validar que el endpoint esté configurado
 if not API_ENDPOINT:
     raise ValueError("END_POINT no está configurado en el archivo .env. Por favor, crea un archivo .env basado en .env.example")
+
+# Casete HTTP (opcional): graba o reproduce las respuestas de la API en un
+# JSONL para pruebas de rendimiento sin red (ver cliente_http.py)
+CASETE = os.getenv('CASETE')
+CASETE_MODO = os.getenv('CASETE_MODO', 'reproducir')
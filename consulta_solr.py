@@ -0,0 +1,177 @@
+"""
+Armado de filtros Solr (fq) con escape de valores.
+
+Cada filtro es un Filtro (un str con la expresión Solr) que se combina con
+&, | y ~. ConsultaSolr junta varios filtros como parámetros fq separados:
+Solr cachea cada fq por su cuenta (filterCache), así las combinaciones
+repetidas de distrito, estado y fechas salen de la caché y solo se descarga
+lo que pasa los filtros.
+
+Ejemplo, ofertas publicadas que cierran en los próximos 7 días en tres
+distritos:
+
+    consulta = (
+        ConsultaSolr()
+        .igual("estado", "Publicada")
+        .rango("finoferta", "NOW", "NOW+7DAYS")
+        .alguno("descdistrito", ["LA PLATA", "QUILMES", "TIGRE"])
+    )
+    scraper.get_all_ofertas(filtros=consulta)
+"""
+import re
+from datetime import date, datetime, timezone
+
+# Expresiones de fecha que Solr entiende sin comillas (NOW, NOW/DAY+7DAYS, ISO)
+_FECHA_SOLR = re.compile(
+    r"^(NOW|\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?Z)([+\-/]\d*[A-Z]+)*$"
+)
+_CAMPO = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class Filtro(str):
+    """
+    Expresión fq. Es un str, así se guarda tal cual en checkpoints y
+    metadata; &, | y ~ arman AND, OR y NOT.
+    """
+
+    negativo = False
+
+    def __and__(self, otro):
+        return Filtro(f"({self._operando()} AND {Filtro._de(otro)._operando()})")
+
+    def __or__(self, otro):
+        return Filtro(f"({self._operando()} OR {Filtro._de(otro)._operando()})")
+
+    def __invert__(self):
+        return no(self)
+
+    def _operando(self):
+        # Un NOT suelto dentro de AND/OR necesita un conjunto del cual restar
+        return f"(*:* {self})" if self.negativo else str(self)
+
+    @staticmethod
+    def _de(valor):
+        return valor if isinstance(valor, Filtro) else Filtro(valor)
+
+
+def igual(campo, valor):
+    """campo:"valor" (o campo:valor para números y booleanos)"""
+    return Filtro(f"{_validar_campo(campo)}:{valor_solr(valor)}")
+
+
+def alguno(campo, valores):
+    """campo:("a" OR "b" ...): alguno de los valores"""
+    valores = list(valores)
+    if not valores:
+        raise ValueError(f"alguno() sin valores para {campo}")
+    if len(valores) == 1:
+        return igual(campo, valores[0])
+    return Filtro(
+        f"{_validar_campo(campo)}:(" + " OR ".join(valor_solr(v) for v in valores) + ")"
+    )
+
+
+def rango(campo, desde=None, hasta=None, incluir_desde=True, incluir_hasta=True):
+    """
+    campo:[desde TO hasta]. None deja el extremo abierto (*).
+
+    Los extremos pueden ser números, date/datetime o expresiones de fecha de
+    Solr como "NOW", "NOW/DAY+7DAYS" o "2024-01-01T00:00:00Z".
+    """
+    abre = "[" if incluir_desde else "{"
+    cierra = "]" if incluir_hasta else "}"
+    return Filtro(
+        f"{_validar_campo(campo)}:{abre}{_extremo(desde)} TO {_extremo(hasta)}{cierra}"
+    )
+
+
+def existe(campo):
+    """El campo tiene algún valor"""
+    return Filtro(f"{_validar_campo(campo)}:[* TO *]")
+
+
+def no(filtro):
+    """Negación de un filtro"""
+    filtro = Filtro._de(filtro)
+    if filtro.negativo:
+        # Doble negación
+        return Filtro(filtro[1:])
+    negado = Filtro(f"-{filtro}")
+    negado.negativo = True
+    return negado
+
+
+class ConsultaSolr(dict):
+    """
+    Filtros de una query como parámetros fq separados.
+
+    Es un dict {"fq": [...]}, el mismo formato de filtros que aceptan todos
+    los métodos de APDScraper, así que se puede pasar como filtros= sin
+    conversión (y se guarda igual en checkpoints y planes de shards).
+    """
+
+    def __init__(self, *filtros):
+        super().__init__(fq=[])
+        self.filtrar(*filtros)
+
+    def filtrar(self, *filtros):
+        """Agrega cada filtro como un fq propio"""
+        for filtro in filtros:
+            self["fq"].append(Filtro._de(filtro))
+        return self
+
+    def igual(self, campo, valor):
+        return self.filtrar(igual(campo, valor))
+
+    def alguno(self, campo, valores):
+        return self.filtrar(alguno(campo, valores))
+
+    def rango(self, campo, desde=None, hasta=None, incluir_desde=True, incluir_hasta=True):
+        return self.filtrar(rango(campo, desde, hasta, incluir_desde, incluir_hasta))
+
+    def existe(self, campo):
+        return self.filtrar(existe(campo))
+
+    def excluir(self, filtro):
+        """Agrega la negación de filtro como un fq propio"""
+        return self.filtrar(no(filtro))
+
+    @property
+    def fq(self):
+        """Lista de expresiones fq"""
+        return list(self["fq"])
+
+
+def valor_solr(valor):
+    """Valor listo para la query: texto entre comillas con escape, números tal cual"""
+    if isinstance(valor, bool):
+        return "true" if valor else "false"
+    if isinstance(valor, (int, float)):
+        return str(valor)
+    if isinstance(valor, (datetime, date)):
+        return fecha_solr(valor)
+    texto = str(valor)
+    return '"' + texto.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def fecha_solr(valor):
+    """date/datetime en el formato de fecha de Solr (UTC, con Z)"""
+    if isinstance(valor, datetime):
+        if valor.tzinfo is not None:
+            valor = valor.astimezone(timezone.utc).replace(tzinfo=None)
+        return valor.strftime("%Y-%m-%dT%H:%M:%SZ")
+    return f"{valor.isoformat()}T00:00:00Z"
+
+
+def _extremo(valor):
+    if valor is None or valor == "*":
+        return "*"
+    if isinstance(valor, str) and _FECHA_SOLR.match(valor):
+        return valor
+    return valor_solr(valor)
+
+
+def _validar_campo(campo):
+    if not _CAMPO.match(campo):
+        raise ValueError(f"Nombre de campo inválido: {campo!r}")
+    return campo
@@ -0,0 +1,142 @@
+"""
+Controladores de ritmo y reintentos para las peticiones a la API.
+
+APDScraper llama a adquirir() antes de cada petición y a liberar() con el
+resultado. El controlador decide cuánto esperar, cuántas peticiones pueden
+estar en vuelo a la vez y cuánto esperar antes de reintentar una página.
+"""
+import random
+import threading
+import time
+
+
+class ControladorFijo:
+    """
+    Pausa fija entre peticiones, como el scraper original (time.sleep(0.5)),
+    pero reintentando los errores con backoff exponencial con jitter.
+    """
+
+    def __init__(self, pausa=0.5, max_reintentos=5, backoff_base=1.0, backoff_max=60.0):
+        self.pausa = pausa
+        self.max_reintentos = max_reintentos
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.peticiones = 0
+        self.errores = 0
+        self._lock = threading.Lock()
+        self._proximo = 0.0
+
+    def adquirir(self):
+        """Bloquea hasta que se pueda enviar la próxima petición"""
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(ahora, self._proximo)
+            self._proximo = turno + self.pausa
+        time.sleep(turno - ahora)
+
+    def liberar(self, latencia, error=False):
+        """Registra el resultado de una petición"""
+        with self._lock:
+            self.peticiones += 1
+            if error:
+                self.errores += 1
+
+    def espera_reintento(self, intento, retry_after=None):
+        """
+        Segundos a esperar antes del reintento número intento (desde 0).
+        Full jitter: uniforme entre 0 y base * 2^intento, acotado a backoff_max.
+        Si el servidor mandó Retry-After se respeta como mínimo.
+        """
+        espera = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** intento))
+        if retry_after:
+            espera = max(espera, retry_after)
+        return espera
+
+    def resumen(self):
+        return f"pausa fija {self.pausa}s | {self.peticiones:,} peticiones | {self.errores:,} errores"
+
+
+class ControladorAIMD(ControladorFijo):
+    """
+    Ajusta tasa (peticiones/s) y concurrencia con AIMD, como el control de
+    congestión de TCP.
+
+    - Cada respuesta sana con latencia <= latencia_objetivo suma `incremento`
+      a la tasa y 1/concurrencia a la concurrencia (crecimiento aditivo).
+    - Un error de red, 429, 5xx o una latencia mayor al objetivo multiplica
+      ambas por factor_baja (reducción multiplicativa), como mucho una vez por
+      latencia_objetivo para no castigar varias veces la misma congestión.
+
+    Así el scraper va tan rápido como el servidor aguanta y no más.
+    """
+
+    def __init__(
+        self,
+        tasa_inicial=2.0,
+        tasa_min=0.2,
+        tasa_max=50.0,
+        incremento=0.2,
+        concurrencia_inicial=2,
+        concurrencia_max=16,
+        factor_baja=0.5,
+        latencia_objetivo=5.0,
+        max_reintentos=5,
+        backoff_base=1.0,
+        backoff_max=60.0,
+    ):
+        super().__init__(
+            pausa=1 / tasa_inicial,
+            max_reintentos=max_reintentos,
+            backoff_base=backoff_base,
+            backoff_max=backoff_max,
+        )
+        self.tasa = tasa_inicial
+        self.tasa_min = tasa_min
+        self.tasa_max = tasa_max
+        self.incremento = incremento
+        self.concurrencia = float(concurrencia_inicial)
+        self.concurrencia_max = concurrencia_max
+        self.factor_baja = factor_baja
+        self.latencia_objetivo = latencia_objetivo
+        self.en_vuelo = 0
+        self._cond = threading.Condition(self._lock)
+        self._ultima_baja = 0.0
+
+    def adquirir(self):
+        """Espera un lugar libre en la ventana de concurrencia y su turno"""
+        with self._cond:
+            while self.en_vuelo >= max(1, int(self.concurrencia)):
+                self._cond.wait()
+            self.en_vuelo += 1
+            ahora = time.monotonic()
+            turno = max(ahora, self._proximo)
+            self._proximo = turno + 1 / self.tasa
+        time.sleep(turno - ahora)
+
+    def liberar(self, latencia, error=False):
+        """Registra el resultado y ajusta tasa y concurrencia"""
+        with self._cond:
+            self.en_vuelo -= 1
+            self.peticiones += 1
+
+            if error or latencia > self.latencia_objetivo:
+                if error:
+                    self.errores += 1
+                ahora = time.monotonic()
+                if ahora - self._ultima_baja >= self.latencia_objetivo:
+                    self._ultima_baja = ahora
+                    self.tasa = max(self.tasa_min, self.tasa * self.factor_baja)
+                    self.concurrencia = max(1.0, self.concurrencia * self.factor_baja)
+            else:
+                self.tasa = min(self.tasa_max, self.tasa + self.incremento)
+                self.concurrencia = min(
+                    self.concurrencia_max, self.concurrencia + 1 / self.concurrencia
+                )
+
+            self._cond.notify_all()
+
+    def resumen(self):
+        return (
+            f"tasa {self.tasa:.1f} req/s | concurrencia {int(self.concurrencia)} | "
+            f"{self.peticiones:,} peticiones | {self.errores:,} errores"
+        )
@@ -0,0 +1,560 @@
+"""
+Dataset de ofertas en Parquet particionado por mes de cierre y distrito.
+
+Estructura en disco (particionado estilo Hive):
+
+    ofertas_completas.parquet/
+        _meta.json                      # metadata de la extracción
+        mes=2024-06/parte-00001.parquet
+        mes=2024-07/parte-00001.parquet
+        ...
+
+El mes de finoferta es la partición de carpetas. El distrito se particiona
+dentro de cada archivo: las filas van ordenadas por numdistrito en row
+groups chicos, y las estadísticas min/max de cada row group permiten saltear
+los que no tienen el distrito pedido. Una carpeta por mes y distrito dejaría
+miles de archivos de pocas decenas de filas, y abrirlos cuesta más que leer
+todo el dataset.
+
+Todas las partes tienen el mismo esquema tipado (ESQUEMA): enteros como
+int64, fechas como timestamp UTC y el resto como texto. Al leer solo se
+abren los meses que pasan el filtro de fecha, y de cada archivo solo las
+columnas y row groups necesarios.
+
+Requiere pyarrow (pip install pyarrow).
+"""
+import json
+import os
+import shutil
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # Se avisa al usar el dataset
+    pa = None
+
+from esquema_ofertas import CATEGORIAS, ENTEROS, ESQUEMA, tipar_ofertas
+from archivo_ofertas import ArchivoOfertas, es_archivo
+from lector_json import LectorJSON
+
+# Partición de carpetas (sale de finoferta) y columna de orden dentro de cada archivo
+PARTICION_MES = "mes"
+PARTICION_DISTRITO = "numdistrito"
+
+ARCHIVO_META = "_meta.json"
+
+# Valor de partición de las ofertas sin finoferta
+# (el mismo que usa pyarrow para los nulos en particiones Hive)
+PARTICION_NULA = "__HIVE_DEFAULT_PARTITION__"
+
+# Ofertas acumuladas antes de escribir un grupo de partes
+FILAS_POR_ESCRITURA = 50_000
+
+# Filas por row group: la granularidad de la poda por distrito
+FILAS_POR_ROW_GROUP = 4096
+
+
+def _requerir_pyarrow():
+    if pa is None:
+        raise ImportError("Para usar el dataset Parquet instala: pip install pyarrow")
+
+
+def _tipo_arrow(tipo):
+    return {
+        "texto": pa.string(),
+        "entero": pa.int64(),
+        "booleano": pa.bool_(),
+        "fecha": pa.timestamp("ms", tz="UTC"),
+    }[tipo]
+
+
+def esquema_arrow(campos=None):
+    """
+    Esquema pyarrow de las ofertas.
+
+    Args:
+        campos: Subconjunto de campos (None = todos los de ESQUEMA)
+    """
+    _requerir_pyarrow()
+    campos = campos or list(ESQUEMA)
+    return pa.schema([(c, _tipo_arrow(ESQUEMA[c])) for c in campos])
+
+
+def tabla_compacta(tabla):
+    """
+    Tabla con la representación compacta del registro (esquema_ofertas.py):
+    las columnas de CATEGORIAS como diccionario y los enteros de ENTEROS en
+    el tipo más chico (si algún valor no entra, quedan como int64).
+    """
+    columnas = []
+    for campo, columna in zip(tabla.column_names, tabla.columns):
+        if campo in CATEGORIAS and pa.types.is_string(columna.type):
+            columna = columna.dictionary_encode()
+        elif campo in ENTEROS and pa.types.is_int64(columna.type):
+            try:
+                columna = columna.cast(getattr(pa, ENTEROS[campo].lower())())
+            except pa.ArrowInvalid:
+                pass
+        columnas.append(columna)
+    return pa.Table.from_arrays(columnas, names=tabla.column_names).replace_schema_metadata(
+        tabla.schema.metadata
+    )
+
+
+def tabla_a_dataframe(tabla):
+    """
+    DataFrame con los dtypes del registro de una tabla compacta: diccionarios
+    como category, enteros y booleanos nullable, fechas como datetime UTC.
+
+    Con split_blocks las columnas sin nulos se usan sin copiar, y el texto
+    queda como str de pandas 3, que guarda los mismos buffers de Arrow.
+    """
+    import pandas as pd
+
+    tipos = {
+        pa.int8(): pd.Int8Dtype(),
+        pa.int16(): pd.Int16Dtype(),
+        pa.int32(): pd.Int32Dtype(),
+        pa.int64(): pd.Int64Dtype(),
+        pa.bool_(): pd.BooleanDtype(),
+    }
+    return tabla.to_pandas(split_blocks=True, types_mapper=tipos.get)
+
+
+def _esquema_particion():
+    return pa.schema([(PARTICION_MES, pa.string())])
+
+
+def ofertas_a_tabla(ofertas):
+    """
+    Convierte una lista de ofertas (dicts de Solr) a una tabla con ESQUEMA.
+
+    Los campos que no están en ESQUEMA se descartan y los que faltan quedan
+    nulos. Un valor que no se puede convertir a su tipo queda nulo en lugar
+    de invalidar la tabla.
+    """
+    _requerir_pyarrow()
+    columnas = []
+    for campo, tipo in ESQUEMA.items():
+        valores = [oferta.get(campo) for oferta in ofertas]
+        columnas.append(_columna(valores, tipo))
+    return pa.Table.from_arrays(columnas, schema=esquema_arrow())
+
+
+def tabla_json(archivo_json):
+    """
+    Lee un ofertas_*.json como tabla con ESQUEMA, de a lotes: en memoria
+    queda la tabla columnar, nunca todas las ofertas como dicts.
+
+    Returns:
+        Tuple con (tabla pyarrow, metadata)
+    """
+    _requerir_pyarrow()
+    lector = LectorJSON(archivo_json)
+    tablas = [ofertas_a_tabla(lote) for lote in lector.lotes()]
+    tabla = pa.concat_tables(tablas) if tablas else ofertas_a_tabla([])
+    return tabla, lector.metadata
+
+
+def _columna(valores, tipo):
+    tipo_arrow = _tipo_arrow(tipo)
+    try:
+        if tipo == "fecha":
+            return pa.array(valores, type=pa.string()).cast(tipo_arrow)
+        return pa.array(valores, type=tipo_arrow)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError, OverflowError):
+        # Algún valor no convierte: se resuelve valor por valor
+        return pa.array([_valor(v, tipo) for v in valores], type=tipo_arrow)
+
+
+def _valor(valor, tipo):
+    """Un valor convertido a su tipo, o None si no convierte"""
+    if valor is None:
+        return None
+    try:
+        if tipo == "texto":
+            return str(valor)
+        if tipo == "entero":
+            return int(valor)
+        if tipo == "booleano":
+            if isinstance(valor, (bool, int)):  # SQLite los guarda como 0/1
+                return bool(valor)
+            return str(valor).lower() == "true"
+        # fecha: se delega el parseo ISO en pyarrow
+        escalar = pa.scalar(str(valor), type=pa.string()).cast(_tipo_arrow("fecha"))
+        return escalar.as_py()
+    except (pa.ArrowInvalid, TypeError, ValueError, OverflowError):
+        return None
+
+
+class EscritorParquet:
+    """
+    Escribe ofertas en un dataset Parquet particionado por mes y distrito.
+
+    Tiene la misma interfaz que los escritores de escritores.py, así
+    save_to_json lo usa con formato="parquet". Acumula hasta
+    FILAS_POR_ESCRITURA ofertas (ya convertidas a tablas, que ocupan mucho
+    menos que los dicts) y escribe una parte por mes; cada grupo de
+    partes lleva un número de secuencia, lo que permite reanudar desde un
+    checkpoint borrando las partes no confirmadas. Al cerrar, los meses con
+    varias partes se compactan en una sola.
+    """
+
+    def __init__(self, directorio, metadata=None):
+        _requerir_pyarrow()
+        self.filename = directorio
+        self.total = 0
+        self.metadata = {"total_ofertas": 0, **(metadata or {})}
+        self._pendientes = []
+        self._filas_pendientes = 0
+        self._secuencia = 0
+        _limpiar_dataset(directorio)
+        os.makedirs(directorio, exist_ok=True)
+
+    def escribir_lote(self, ofertas):
+        """Agrega un lote de ofertas; escribe cuando se juntan suficientes"""
+        if not ofertas:
+            return
+        self._pendientes.append(ofertas_a_tabla(ofertas))
+        self._filas_pendientes += len(ofertas)
+        self.total += len(ofertas)
+        if self._filas_pendientes >= FILAS_POR_ESCRITURA:
+            self._volcar()
+
+    def _volcar(self):
+        """Escribe las ofertas pendientes, una parte por partición"""
+        if not self._pendientes:
+            return
+        tabla = pa.concat_tables(self._pendientes)
+        self._pendientes = []
+        self._filas_pendientes = 0
+        self._secuencia += 1
+
+        meses = pc.fill_null(pc.strftime(tabla["finoferta"], format="%Y-%m"), PARTICION_NULA)
+        for mes in pc.unique(meses).to_pylist():
+            carpeta = os.path.join(self.filename, f"{PARTICION_MES}={mes}")
+            os.makedirs(carpeta, exist_ok=True)
+            _escribir_parte(
+                tabla.filter(pc.equal(meses, mes)),
+                os.path.join(carpeta, f"parte-{self._secuencia:05d}.parquet"),
+            )
+
+    def _compactar(self):
+        """Junta en un solo archivo las partes de cada mes"""
+        for carpeta in Path(self.filename).glob(f"{PARTICION_MES}=*"):
+            partes = sorted(carpeta.glob("parte-*.parquet"))
+            if len(partes) < 2:
+                continue
+            tabla = pa.concat_tables(pq.read_table(p, schema=esquema_arrow()) for p in partes)
+            _escribir_parte(tabla, carpeta / "compacta.tmp")
+            for parte in partes:
+                parte.unlink()
+            os.replace(carpeta / "compacta.tmp", partes[0])
+
+    def confirmar(self):
+        """
+        Devuelve el estado para reanudar, o None si hay ofertas acumuladas
+        sin escribir. No fuerza la escritura: confirmar cada página dejaría
+        miles de partes diminutas, así que el checkpoint avanza cada
+        FILAS_POR_ESCRITURA ofertas.
+        """
+        if self._pendientes:
+            return None
+        return {
+            "secuencia": self._secuencia,
+            "total": self.total,
+            "metadata": self.metadata,
+        }
+
+    @classmethod
+    def reanudar(cls, directorio, estado):
+        """Reabre un dataset a medio escribir y borra las partes no confirmadas"""
+        _requerir_pyarrow()
+        for parte in Path(directorio).glob(f"{PARTICION_MES}=*/parte-*.parquet"):
+            if int(parte.stem.split("-")[1]) > estado["secuencia"]:
+                parte.unlink()
+        escritor = cls.__new__(cls)
+        escritor.filename = directorio
+        escritor.total = estado["total"]
+        escritor.metadata = estado["metadata"]
+        escritor._pendientes = []
+        escritor._filas_pendientes = 0
+        escritor._secuencia = estado["secuencia"]
+        return escritor
+
+    def abortar(self):
+        """Escribe lo pendiente sin la metadata final"""
+        self._volcar()
+
+    def cerrar(self, metadata=None):
+        """Escribe lo pendiente, compacta y guarda la metadata final en _meta.json"""
+        self._volcar()
+        self._compactar()
+        self.metadata.update(metadata or {})
+        self.metadata["total_ofertas"] = self.total
+        self.metadata["esquema"] = ESQUEMA
+        with open(os.path.join(self.filename, ARCHIVO_META), "w", encoding="utf-8") as f:
+            json.dump(self.metadata, f, ensure_ascii=False, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.cerrar()
+        else:
+            self.abortar()
+
+
+def _escribir_parte(tabla, archivo):
+    """Escribe una parte ordenada por distrito, en row groups chicos"""
+    tabla = tabla.sort_by([(PARTICION_DISTRITO, "ascending"), ("finoferta", "descending")])
+    pq.write_table(
+        tabla, archivo, compression="zstd", row_group_size=FILAS_POR_ROW_GROUP
+    )
+
+
+def _limpiar_dataset(directorio):
+    """Borra las particiones y la metadata de un dataset anterior"""
+    if not os.path.isdir(directorio):
+        return
+    for carpeta in Path(directorio).glob(f"{PARTICION_MES}=*"):
+        shutil.rmtree(carpeta)
+    meta = os.path.join(directorio, ARCHIVO_META)
+    if os.path.exists(meta):
+        os.remove(meta)
+
+
+def es_dataset(ruta):
+    """True si ruta es un dataset Parquet (carpeta particionada o archivo .parquet)"""
+    if str(ruta).rstrip("/\\").endswith(".parquet"):
+        return True
+    # Carpeta con otro nombre, pero escrita por EscritorParquet
+    return os.path.isfile(os.path.join(ruta, ARCHIVO_META))
+
+
+def _abrir(ruta):
+    if os.path.isdir(ruta):
+        particion = ds.partitioning(_esquema_particion(), flavor="hive")
+        return ds.dataset(ruta, format="parquet", partitioning=particion)
+    # Archivo suelto (por ejemplo de save_columnar): sin particiones
+    return ds.dataset(ruta, format="parquet")
+
+
+def _filtro(dataset, desde=None, hasta=None, distritos=None, filtro=None):
+    """Expresión de filtro; las condiciones sobre mes podan particiones enteras"""
+    nombres = dataset.schema.names
+    condiciones = []
+    if desde is not None:
+        desde = _timestamp(desde)
+        if PARTICION_MES in nombres:
+            condiciones.append(ds.field(PARTICION_MES) >= desde.strftime("%Y-%m"))
+        condiciones.append(ds.field("finoferta") >= desde)
+    if hasta is not None:
+        dia_entero = _solo_fecha(hasta)
+        hasta = _timestamp(hasta)
+        if PARTICION_MES in nombres:
+            condiciones.append(ds.field(PARTICION_MES) <= hasta.strftime("%Y-%m"))
+        if dia_entero:
+            # Una fecha sin hora incluye todo ese día
+            condiciones.append(ds.field("finoferta") < hasta + timedelta(days=1))
+        else:
+            condiciones.append(ds.field("finoferta") <= hasta)
+    if distritos is not None:
+        # Poda por las estadísticas de los row groups (ver _escribir_parte)
+        condiciones.append(ds.field(PARTICION_DISTRITO).isin([int(d) for d in distritos]))
+    if filtro is not None:
+        condiciones.append(filtro)
+
+    expresion = None
+    for condicion in condiciones:
+        expresion = condicion if expresion is None else expresion & condicion
+    return expresion
+
+
+def _solo_fecha(valor):
+    """True si valor es un día sin hora (date o texto AAAA-MM-DD)"""
+    if isinstance(valor, str):
+        return len(valor.strip()) == 10
+    return not isinstance(valor, datetime)
+
+
+def _timestamp(valor):
+    """Fecha (str ISO, date o datetime) como datetime UTC"""
+    if isinstance(valor, str):
+        valor = datetime.fromisoformat(valor)
+    elif not isinstance(valor, datetime):
+        valor = datetime(valor.year, valor.month, valor.day)
+    if valor.tzinfo is None:
+        return valor.replace(tzinfo=timezone.utc)
+    return valor.astimezone(timezone.utc)
+
+
+def leer_tabla(ruta, columnas=None, desde=None, hasta=None, distritos=None, filtro=None):
+    """
+    Lee el dataset como tabla pyarrow, con poda de particiones y columnas.
+
+    Args:
+        ruta: Carpeta del dataset (o un archivo .parquet suelto)
+        columnas: Columnas a leer (None = todas las de ESQUEMA)
+        desde, hasta: Rango de finoferta (inclusive; str ISO, date o
+            datetime). Un hasta sin hora incluye todo ese día. Solo se abren
+            los meses que lo intersectan.
+        distritos: numdistrito a incluir. Solo se leen los row groups que
+            pueden contenerlos.
+        filtro: Expresión pyarrow.dataset adicional
+
+    Returns:
+        pyarrow.Table con las columnas en el orden pedido
+    """
+    _requerir_pyarrow()
+    dataset = _abrir(ruta)
+    nombres = dataset.schema.names
+    columnas = [c for c in (columnas or ESQUEMA) if c in nombres]
+    return dataset.to_table(
+        columns=columnas, filter=_filtro(dataset, desde, hasta, distritos, filtro)
+    )
+
+
+def leer_dataset(ruta, columnas=None, desde=None, hasta=None, distritos=None, filtro=None):
+    """
+    Lee el dataset como DataFrame (ver leer_tabla para los argumentos).
+
+    Los tipos son los del registro de esquema_ofertas.py (category, enteros
+    chicos nullable, fechas como datetime64 UTC).
+    """
+    tabla = leer_tabla(ruta, columnas, desde, hasta, distritos, filtro)
+    return tabla_a_dataframe(tabla_compacta(tabla))
+
+
+def leer_metadata(ruta):
+    """Metadata de la extracción guardada junto al dataset ({} si no hay)"""
+    meta = os.path.join(ruta, ARCHIVO_META)
+    if not os.path.isfile(meta):
+        return {}
+    with open(meta, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def iterar_ofertas(ruta, columnas=None, filas_por_lote=10_000):
+    """
+    Recorre el dataset oferta por oferta como dicts listos para JSON.
+
+    Las fechas vuelven al formato de Solr (2024-06-27T07:45:26.867Z). Lee de
+    a filas_por_lote, así la memoria no depende del tamaño del dataset.
+    """
+    _requerir_pyarrow()
+    dataset = _abrir(ruta)
+    nombres = dataset.schema.names
+    columnas = [c for c in (columnas or ESQUEMA) if c in nombres]
+    for lote in dataset.to_batches(columns=columnas, batch_size=filas_por_lote):
+        for oferta in lote.to_pylist():
+            for campo, valor in oferta.items():
+                if ESQUEMA.get(campo) == "fecha" and valor is not None:
+                    oferta[campo] = _fecha_solr(valor)
+            yield oferta
+
+
+def _fecha_solr(valor):
+    texto = valor.strftime("%Y-%m-%dT%H:%M:%S")
+    if valor.microsecond:
+        texto += f".{valor.microsecond // 1000:03d}"
+    return texto + "Z"
+
+
+def cargar_ofertas(ruta, columnas=None, reportar=False):
+    """
+    Carga ofertas como DataFrame desde un dataset Parquet, un JSON o un
+    archivo comprimido .jsonz.
+
+    Los scripts de análisis usan esta función para aceptar cualquiera de los
+    formatos; con Parquet solo se leen las columnas pedidas. En todos los
+    casos las columnas quedan con los tipos compactos de esquema_ofertas.py.
+
+    Args:
+        ruta: Archivo JSON, archivo .jsonz (ver archivo_ofertas.py) o
+            dataset Parquet
+        columnas: Columnas a cargar (None = todas)
+        reportar: Imprimir la memoria del DataFrame sin tipar y tipado
+
+    Returns:
+        Tuple con (DataFrame de ofertas, metadata)
+    """
+    import pandas as pd
+
+    if es_dataset(ruta):
+        if not reportar:
+            return leer_dataset(ruta, columnas), leer_metadata(ruta)
+        # Sin tipar = como lo dejaría pandas con texto y enteros de 64 bits
+        df = leer_tabla(ruta, columnas).to_pandas()
+        return tipar_ofertas(df, reportar=True), leer_metadata(ruta)
+
+    # JSON de a lotes (o de a bloques del .jsonz): en memoria quedan solo
+    # las columnas pedidas, nunca el archivo entero como objetos Python
+    lector = ArchivoOfertas(ruta) if es_archivo(ruta) else LectorJSON(ruta)
+    partes = []
+    for lote in lector.lotes():
+        parte = pd.DataFrame(lote)
+        if columnas:
+            parte = parte[[c for c in columnas if c in parte.columns]]
+        partes.append(parte)
+    if partes:
+        df = pd.concat(partes, ignore_index=True)
+    else:
+        df = pd.DataFrame(columns=list(columnas or []))
+    return tipar_ofertas(df, reportar=reportar), lector.metadata
+
+
+def convertir_json(archivo_json, directorio=None):
+    """
+    Convierte un ofertas_*.json existente al dataset Parquet particionado.
+
+    El JSON se lee de a lotes (ver lector_json.py), así que la memoria no
+    depende del tamaño del archivo.
+
+    Args:
+        archivo_json: Archivo {"metadata": ..., "ofertas": [...]}
+        directorio: Carpeta de salida (default: mismo nombre con .parquet)
+
+    Returns:
+        Ruta del dataset
+    """
+    directorio = directorio or os.path.splitext(archivo_json)[0] + ".parquet"
+
+    # Una sola pasada de a lotes: sirve para JSON de varios GB
+    lector = LectorJSON(archivo_json)
+    escritor = EscritorParquet(directorio)
+    try:
+        for lote in lector.lotes():
+            escritor.escribir_lote(lote)
+    except BaseException:
+        escritor.abortar()
+        raise
+    escritor.cerrar({**lector.metadata, "origen": os.path.basename(archivo_json)})
+
+    print(f"Dataset guardado: {directorio} ({escritor.total:,} ofertas)")
+    return directorio
+
+
+if __name__ == "__main__":
+    import time
+
+    # Opción 1: Convertir la muestra JSON a dataset Parquet
+    destino = convertir_json("ofertas_muestra.json")
+
+    inicio = time.perf_counter()
+    df, metadata = cargar_ofertas(destino)
+    print(f"Carga completa: {len(df):,} ofertas en {time.perf_counter() - inicio:.3f}s")
+
+    # Opción 2: Solo algunas columnas, un distrito y un rango de cierre
+    # df = leer_dataset(
+    #     "ofertas_muestra.parquet",
+    #     columnas=["cargo", "estado", "finoferta"],
+    #     desde="2025-01-01",
+    #     hasta="2025-06-30",
+    #     distritos=[9],
+    # )
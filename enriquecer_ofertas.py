@@ -1,8 +1,10 @@
 """
 Script para enriquecer ofertas con información de cargos
 """
-import json
 from cargos import CargoRepository
+from dataset_ofertas import es_dataset, iterar_ofertas, leer_metadata
+from escritores import EscritorJSON
+from lector_json import TAMANO_LOTE, LectorJSON
 
 
 def enriquecer_ofertas(archivo_ofertas='ofertas_muestra.json',
@@ -14,27 +16,38 @@ def enriquecer_ofertas(archivo_ofertas='ofertas_muestra.json',
 
     print("Cargando datos...")
 
-    # Cargar ofertas
-    with open(archivo_ofertas, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # Cargar ofertas (JSON o dataset Parquet) de a lotes: la memoria no
+    # depende del tamaño del archivo
+    if es_dataset(archivo_ofertas):
+        lector = None
+        ofertas = iterar_ofertas(archivo_ofertas)
+    else:
+        lector = LectorJSON(archivo_ofertas)
+        ofertas = iter(lector)
 
     # Cargar cargos
     repo = CargoRepository.load_from_file(archivo_cargos)
-
-    print(f"Ofertas: {len(data['ofertas']):,}")
     print(f"Cargos: {len(repo)}")
 
-    # Enriquecer cada oferta
-    ofertas_enriquecidas = []
+    # Enriquecer cada oferta y escribirla apenas se procesa
+    escritor = EscritorJSON(archivo_salida)
     match_count = 0
-
-    for oferta in data['ofertas']:
-        # Buscar cargo
-        cargo_encontrado = repo.buscar_area_exacta(oferta['cargo'])
-
-        if not cargo_encontrado:
-            # Intentar por código
-            cargo_encontrado = repo.buscar_por_codigo(oferta.get('areaincumbencia', ''))
+    # Los valores de cargo y areaincumbencia se repiten mucho (son category
+    # en esquema_ofertas.py): cada par se busca una sola vez
+    encontrados = {}
+    lote = []
+
+    for oferta in ofertas:
+        par = (oferta['cargo'], oferta.get('areaincumbencia', ''))
+        if par not in encontrados:
+            # Buscar cargo
+            cargo_encontrado = repo.buscar_area_exacta(par[0])
+
+            if not cargo_encontrado:
+                # Intentar por código
+                cargo_encontrado = repo.buscar_por_codigo(par[1])
+            encontrados[par] = cargo_encontrado
+        cargo_encontrado = encontrados[par]
 
         # Agregar información del cargo
         oferta_enriquecida = oferta.copy()
@@ -55,23 +68,25 @@ def enriquecer_ofertas(archivo_ofertas='ofertas_muestra.json',
                 'valor': 0.0
             }
 
-        ofertas_enriquecidas.append(oferta_enriquecida)
-
-    # Guardar
-    resultado = {
-        'metadata': {
-            **data['metadata'],
-            'ofertas_validadas': match_count,
-            'porcentaje_validacion': round((match_count / len(ofertas_enriquecidas)) * 100, 2)
-        },
-        'ofertas': ofertas_enriquecidas
-    }
-
-    with open(archivo_salida, 'w', encoding='utf-8') as f:
-        json.dump(resultado, f, ensure_ascii=False, indent=2)
-
+        lote.append(oferta_enriquecida)
+        if len(lote) >= TAMANO_LOTE:
+            escritor.escribir_lote(lote)
+            lote = []
+    escritor.escribir_lote(lote)
+
+    # Guardar (la metadata del JSON de origen ya la leyó el lector)
+    metadata = lector.metadata if lector else leer_metadata(archivo_ofertas)
+    total = escritor.total
+    porcentaje = round((match_count / total) * 100, 2) if total else 0.0
+    escritor.cerrar({
+        **metadata,
+        'ofertas_validadas': match_count,
+        'porcentaje_validacion': porcentaje
+    })
+
+    print(f"Ofertas: {total:,}")
     print(f"\n✓ Ofertas enriquecidas guardadas en: {archivo_salida}")
-    print(f"  Validadas: {match_count}/{len(ofertas_enriquecidas)} ({resultado['metadata']['porcentaje_validacion']}%)")
+    print(f"  Validadas: {match_count}/{total} ({porcentaje}%)")
 
 
 if __name__ == "__main__":
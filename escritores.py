@@ -0,0 +1,259 @@
+"""
+Escritores incrementales de ofertas.
+
+Escriben cada lote apenas llega, así la memoria del scraper no crece con la
+cantidad de ofertas extraídas y un corte a mitad de camino deja en disco todo
+lo escrito hasta ese momento.
+"""
+import json
+import os
+
+# Espacio reservado para reescribir la metadata al cerrar el archivo JSON
+RESERVA_METADATA = 4096
+
+
+class EscritorJSON:
+    """
+    Escribe el formato {"metadata": ..., "ofertas": [...]} en streaming.
+
+    La metadata se escribe al principio con espacio reservado (relleno con
+    blancos, que JSON ignora) y se reescribe en su lugar al cerrar, con
+    total_ofertas ya calculado. Si al cerrar no entra en el espacio
+    reservado (muchos filtros fq, por ejemplo), el espacio queda en blanco
+    y la metadata va al final, después de las ofertas: sigue siendo el
+    mismo objeto JSON y LectorJSON la lee igual. Las ofertas van una por
+    línea.
+    """
+
+    def __init__(self, filename, metadata=None):
+        self.filename = filename
+        self.total = 0
+        self.metadata = {"total_ofertas": 0, **(metadata or {})}
+        self._f = open(filename, "wb")
+        self._f.write(b"{\n  ")
+        self._pos_metadata = self._f.tell()
+        self._escribir_metadata(self.metadata)
+        self._f.write(b'\n  "ofertas": [')
+
+    def _escribir_metadata(self, metadata):
+        """
+        Escribe la clave metadata en el espacio reservado. Si no entra lo
+        deja en blanco y devuelve False.
+        """
+        texto = json.dumps(metadata, ensure_ascii=False)
+        contenido = f'"metadata": {texto},'.encode("utf-8")
+        entra = len(contenido) <= RESERVA_METADATA
+        self._f.write((contenido if entra else b"").ljust(RESERVA_METADATA))
+        return entra
+
+    def escribir_lote(self, ofertas):
+        """Agrega un lote de ofertas al final del array"""
+        partes = []
+        for oferta in ofertas:
+            separador = ",\n    " if self.total else "\n    "
+            partes.append(separador + json.dumps(oferta, ensure_ascii=False))
+            self.total += 1
+        if partes:
+            self._f.write("".join(partes).encode("utf-8"))
+            self._f.flush()
+
+    def confirmar(self):
+        """
+        Fuerza lo escrito a disco y devuelve el estado necesario para
+        reanudar la escritura desde este punto (ver reanudar_escritor).
+        """
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        return {
+            "bytes": self._f.tell(),
+            "total": self.total,
+            "pos_metadata": self._pos_metadata,
+            "metadata": self.metadata,
+        }
+
+    @classmethod
+    def reanudar(cls, filename, estado):
+        """Reabre un archivo a medio escribir y descarta lo no confirmado"""
+        escritor = cls.__new__(cls)
+        escritor.filename = filename
+        escritor.total = estado["total"]
+        escritor.metadata = estado["metadata"]
+        escritor._pos_metadata = estado["pos_metadata"]
+        escritor._f = open(filename, "r+b")
+        escritor._f.truncate(estado["bytes"])
+        escritor._f.seek(estado["bytes"])
+        return escritor
+
+    def abortar(self):
+        """Cierra el archivo sin completarlo, dejando lo escrito hasta ahora"""
+        self._f.close()
+
+    def cerrar(self, metadata=None):
+        """Cierra el array y reescribe la metadata con total_ofertas final"""
+        self.metadata.update(metadata or {})
+        self.metadata["total_ofertas"] = self.total
+        self._f.write(b"\n  ]" if self.total else b"]")
+        fin = self._f.tell()
+        self._f.seek(self._pos_metadata)
+        if not self._escribir_metadata(self.metadata):
+            # Las ofertas ya están escritas: la metadata va como última clave
+            self._f.seek(fin)
+            self._f.write(b',\n  "metadata": ')
+            self._f.write(json.dumps(self.metadata, ensure_ascii=False).encode("utf-8"))
+            fin = self._f.tell()
+        self._f.seek(fin)
+        self._f.write(b"\n}\n")
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.cerrar()
+        else:
+            self.abortar()
+
+
+class EscritorNDJSON:
+    """
+    Escribe una oferta por línea (NDJSON).
+
+    La metadata se guarda al cerrar en un archivo aparte <filename>.meta.json,
+    así el archivo de datos es siempre válido línea por línea aunque la
+    extracción se corte.
+    """
+
+    def __init__(self, filename, metadata=None):
+        self.filename = filename
+        self.total = 0
+        self.metadata = {"total_ofertas": 0, **(metadata or {})}
+        self._f = open(filename, "w", encoding="utf-8")
+
+    def escribir_lote(self, ofertas):
+        """Agrega un lote de ofertas al archivo"""
+        lineas = [json.dumps(oferta, ensure_ascii=False) + "\n" for oferta in ofertas]
+        if lineas:
+            self._f.writelines(lineas)
+            self._f.flush()
+            self.total += len(lineas)
+
+    def confirmar(self):
+        """Fuerza lo escrito a disco y devuelve el estado para reanudar"""
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        return {
+            "bytes": self._f.tell(),
+            "total": self.total,
+            "metadata": self.metadata,
+        }
+
+    @classmethod
+    def reanudar(cls, filename, estado):
+        """Reabre un archivo a medio escribir y descarta lo no confirmado"""
+        with open(filename, "r+b") as f:
+            f.truncate(estado["bytes"])
+        escritor = cls.__new__(cls)
+        escritor.filename = filename
+        escritor.total = estado["total"]
+        escritor.metadata = estado["metadata"]
+        escritor._f = open(filename, "a", encoding="utf-8")
+        return escritor
+
+    def abortar(self):
+        """Cierra el archivo sin escribir la metadata final"""
+        self._f.close()
+
+    def cerrar(self, metadata=None):
+        """Cierra el archivo y escribe la metadata final"""
+        self._f.close()
+        self.metadata.update(metadata or {})
+        self.metadata["total_ofertas"] = self.total
+        with open(ruta_metadata(self.filename), "w", encoding="utf-8") as f:
+            json.dump(self.metadata, f, ensure_ascii=False, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.cerrar()
+        else:
+            self.abortar()
+
+
+def ruta_metadata(filename):
+    """Archivo de metadata que acompaña a un NDJSON"""
+    return f"{filename}.meta.json"
+
+
+def formato_archivo(filename):
+    """Formato de un archivo de ofertas según su extensión ("json" si no es otro)"""
+    extension = os.path.splitext(str(filename).rstrip("/\\"))[1]
+    if extension in (".ndjson", ".jsonl"):
+        return "ndjson"
+    if extension == ".parquet":
+        return "parquet"
+    if extension in (".sqlite", ".sqlite3", ".db"):
+        return "sqlite"
+    if extension == ".segmentos":
+        return "segmentos"
+    if extension == ".jsonz":
+        return "jsonz"
+    return "json"
+
+
+def _clase_escritor(filename, formato):
+    formato = formato or formato_archivo(filename)
+
+    if formato == "json":
+        return EscritorJSON
+    if formato == "ndjson":
+        return EscritorNDJSON
+    if formato == "parquet":
+        # Import diferido: pyarrow es opcional
+        from dataset_ofertas import EscritorParquet
+
+        return EscritorParquet
+    if formato == "sqlite":
+        from base_ofertas import EscritorSQLite
+
+        return EscritorSQLite
+    if formato == "segmentos":
+        from log_ofertas import EscritorLog
+
+        return EscritorLog
+    if formato == "jsonz":
+        from archivo_ofertas import EscritorArchivo
+
+        return EscritorArchivo
+    raise ValueError(f"Formato desconocido: {formato}")
+
+
+def crear_escritor(filename, metadata=None, formato=None):
+    """
+    Crea el escritor adecuado para el formato pedido.
+
+    Args:
+        filename: Archivo de salida
+        metadata: Dict de metadata inicial
+        formato: "json", "ndjson", "parquet" (dataset particionado, ver
+            dataset_ofertas.py), "sqlite" (upsert en una base con índices,
+            ver base_ofertas.py), "segmentos" (log de solo agregado, ver
+            log_ofertas.py) o "jsonz" (archivo comprimido, ver
+            archivo_ofertas.py). Si es None se deduce de la extensión.
+    """
+    return _clase_escritor(filename, formato)(filename, metadata)
+
+
+def reanudar_escritor(filename, estado, formato=None):
+    """
+    Reabre un archivo a partir del estado devuelto por confirmar().
+
+    Args:
+        filename: Archivo de salida a medio escribir
+        estado: Dict devuelto por confirmar() en la última página confirmada
+        formato: "json", "ndjson", "parquet", "sqlite" o "segmentos". Si es
+            None se deduce de la extensión.
+    """
+    return _clase_escritor(filename, formato).reanudar(filename, estado)
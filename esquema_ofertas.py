@@ -0,0 +1,212 @@
+"""
+Registro de tipos de las columnas de ofertas.
+
+ESQUEMA es el tipo lógico de cada campo (texto, entero, booleano o fecha);
+lo usan el dataset Parquet, la base SQLite y el snapshot Arrow. Para los
+DataFrames se agrega la representación compacta de cada campo:
+
+- texto con pocos valores distintos (estado, distrito, modalidad, turno,
+  horarios de cada día...) como category: un código por fila en lugar del
+  texto repetido; el resto del texto como str
+- enteros de rango acotado en el tipo nullable más chico que alcanza
+- booleanos como boolean nullable y fechas como datetime UTC
+
+Todos los cargadores (load_ofertas del dashboard y cargar_ofertas y
+leer_dataset de dataset_ofertas.py) pasan por acá, así un campo tiene el
+mismo dtype venga del formato que venga.
+"""
+import numpy as np
+import pandas as pd
+
+# Campo -> tipo. El orden es el de ejemplo_oferta.json
+ESQUEMA = {
+    "estado": "texto",
+    "tipooferta": "texto",
+    "jornada": "texto",
+    "ige": "entero",
+    "miercoles": "texto",
+    "martes": "texto",
+    "acargodireccion": "texto",
+    "cuilautor": "texto",
+    "supl_hasta": "fecha",
+    "turno": "texto",
+    "idoferta": "entero",
+    "sabado": "texto",
+    "id": "texto",
+    "iddetalle": "entero",
+    "cargo": "texto",
+    "tomaposesion": "fecha",
+    "supl_revista": "texto",
+    "postulacion_idganador": "entero",
+    "domiciliodesempeno": "texto",
+    "reemp_apeynom": "texto",
+    "numdistrito": "entero",
+    "areaincumbencia": "texto",
+    "finoferta": "fecha",
+    "observaciones": "texto",
+    "cupof": "entero",
+    "tipooferta_id": "entero",
+    "supl_desde": "fecha",
+    "reemp_cuil": "texto",
+    "escuela": "texto",
+    "iniciooferta": "fecha",
+    "hsmodulos": "entero",
+    "cursodivision": "texto",
+    "idsuna": "entero",
+    "descnivelmodalidad": "texto",
+    "lunes": "texto",
+    "infectocontagiosa": "booleano",
+    "reemp_motivo": "texto",
+    "descdistrito": "texto",
+    "jueves": "texto",
+    "nivelmodalidad": "texto",
+    "viernes": "texto",
+    "descripcionarea": "texto",
+    "descripcioncargo": "texto",
+    "ult_movimiento": "fecha",
+    "_version_": "entero",
+    "timestamp": "fecha",
+}
+
+# Texto con pocos valores distintos que se repiten en muchas ofertas: como
+# category ocupa un código de 1 o 2 bytes por fila en lugar del texto. Los
+# campos casi únicos (escuela, domicilio, CUIL y nombre del reemplazado,
+# autor) quedan como texto: como category ocuparían el texto en el
+# diccionario más los códigos
+CATEGORIAS = (
+    "estado", "tipooferta", "jornada", "turno", "acargodireccion",
+    "supl_revista", "reemp_motivo",
+    "lunes", "martes", "miercoles", "jueves", "viernes", "sabado",
+    "descdistrito", "nivelmodalidad", "descnivelmodalidad",
+    "areaincumbencia", "cargo", "descripcionarea", "descripcioncargo",
+    "cursodivision",
+)
+
+# Enteros de rango acotado -> tipo nullable más chico. Si algún valor no
+# entra, la columna queda como Int64
+ENTEROS = {
+    "numdistrito": "Int16",
+    "hsmodulos": "Int16",
+    "tipooferta_id": "Int8",
+    "ige": "Int32",
+    "cupof": "Int32",
+    "idoferta": "Int32",
+    "iddetalle": "Int32",
+    "idsuna": "Int32",
+    "postulacion_idganador": "Int32",
+}
+
+# Tipo lógico -> dtype de pandas para los campos sin representación compacta
+_TIPOS_BASE = {
+    "texto": "str",
+    "entero": "Int64",
+    "booleano": "boolean",
+    "fecha": "datetime64[ms, UTC]",
+}
+
+
+def tipo_pandas(campo):
+    """dtype de pandas de un campo de ofertas (None si no está en ESQUEMA)"""
+    if campo in CATEGORIAS:
+        return "category"
+    if campo in ENTEROS:
+        return ENTEROS[campo]
+    return _TIPOS_BASE.get(ESQUEMA.get(campo))
+
+
+def tipar_ofertas(df, reportar=False):
+    """
+    Convierte las columnas de ofertas de un DataFrame a sus dtypes compactos.
+
+    Las columnas que ya tienen su tipo no se tocan y las que no están en
+    ESQUEMA quedan como están. Un valor que no convierte queda nulo.
+
+    Args:
+        df: DataFrame de ofertas (de JSON, SQLite, Parquet...)
+        reportar: Imprimir la memoria antes y después
+
+    Returns:
+        DataFrame con los dtypes del registro
+    """
+    antes = memoria(df) if reportar else 0
+
+    convertidas = {}
+    for campo in df.columns:
+        tipo = tipo_pandas(campo)
+        if tipo is None or str(df[campo].dtype) == tipo:
+            continue
+        convertidas[campo] = _convertir(df[campo], tipo)
+    if convertidas:
+        df = df.assign(**convertidas)
+
+    if reportar:
+        reporte_memoria(antes, memoria(df))
+    return df
+
+
+def _convertir(serie, tipo):
+    if tipo == "category":
+        return serie.astype("category")
+    if tipo == "str":
+        return _texto(serie)
+    if tipo.startswith("datetime64"):
+        # ISO8601: Solr manda los milisegundos solo a veces; con el formato
+        # inferido de la primera fecha, las demás quedarían en NaT
+        return pd.to_datetime(serie, errors="coerce", utc=True, format="ISO8601").astype(tipo)
+    if tipo == "boolean":
+        if serie.dtype == object or pd.api.types.is_string_dtype(serie):
+            texto = _texto(serie).str.lower()
+            return texto.map({"true": True, "false": False, "1": True, "0": False}).astype("boolean")
+        return serie.astype("boolean")
+    return _entero(serie, tipo)
+
+
+def _texto(serie):
+    """
+    Texto con los nulos como nulos: astype("str") de pandas 2 los convierte
+    en "None" y "nan"
+    """
+    return serie.astype("str").where(serie.notna())
+
+
+def _entero(serie, tipo):
+    """Entero nullable de tipo, o Int64 si algún valor no entra"""
+    numeros = pd.to_numeric(serie, errors="coerce")
+    if len(numeros.dropna()):
+        rango = np.iinfo(pd.api.types.pandas_dtype(tipo).numpy_dtype)
+        if numeros.min() < rango.min or numeros.max() > rango.max:
+            tipo = "Int64"
+    try:
+        return numeros.astype(tipo)
+    except (TypeError, ValueError):
+        # Valores con decimales: se dejan como número con decimales
+        return numeros.astype("Float64")
+
+
+def sin_categorias_vacias(df):
+    """
+    Quita de las columnas category los valores que no quedan en df.
+
+    Después de filtrar, value_counts() de una category lista también los
+    valores sin filas (con 0); esto los saca.
+    """
+    vacias = {
+        campo: df[campo].cat.remove_unused_categories()
+        for campo in df.columns
+        if isinstance(df[campo].dtype, pd.CategoricalDtype)
+    }
+    return df.assign(**vacias) if vacias else df
+
+
+def memoria(df):
+    """Bytes que ocupa un DataFrame (contando el texto)"""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def reporte_memoria(antes, despues):
+    """Imprime la memoria antes y después de tipar"""
+    factor = antes / despues if despues else 0
+    print(
+        f"Memoria: {antes / 1e6:,.1f} MB -> {despues / 1e6:,.1f} MB "
+        f"({factor:.1f}x menos)"
+    )
@@ -2,29 +2,10 @@
 Script para explorar la API de APD y entender los datos disponibles
 """
 
-import requests
 import json
-from collections import Counter
-import urllib3
-import ssl
-from requests.adapters import HTTPAdapter
 from config import API_ENDPOINT
-
-# Deshabilitar advertencias de SSL
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-
-class TLSAdapter(HTTPAdapter):
-    """Adapter que fuerza TLS 1.0/1.1/1.2 para servidores con SSL antiguo"""
-    def init_poolmanager(self, *args, **kwargs):
-        ctx = ssl.create_default_context()
-        ctx.check_hostname = False
-        ctx.verify_mode = ssl.CERT_NONE
-        ctx.set_ciphers('DEFAULT@SECLEVEL=1')
-        # Permitir TLS 1.0 y superiores
-        ctx.minimum_version = ssl.TLSVersion.TLSv1
-        kwargs['ssl_context'] = ctx
-        return super().init_poolmanager(*args, **kwargs)
+from cliente_http import get_sesion
+from scraper_apd import APDScraper
 
 
 def explorar_api():
@@ -35,7 +16,7 @@ def explorar_api():
     # Obtener una muestra grande para análisis
     params = {
         "q": "*:*",
-        "rows": 500,  # Muestra de 500 ofertas
+        "rows": 500,  # Muestra de 500 ofertas (solo para ver los campos)
         "start": 0,
         "wt": "json",
         "json.nl": "map",
@@ -44,11 +25,8 @@ def explorar_api():
 
     print("Explorando la API de Actos Publicos Digitales...\n")
 
-    # Crear sesión con adapter personalizado para SSL antiguo
-    session = requests.Session()
-    session.mount('https://', TLSAdapter())
-
-    response = session.get(url, params=params, verify=False)
+    # Sesión compartida (pool y contexto TLS para el SSL antiguo)
+    response = get_sesion().get(url, params=params)
     data = response.json()
 
     total = data["response"]["numFound"]
@@ -57,7 +35,7 @@ def explorar_api():
     print("ESTADÍSTICAS GENERALES")
     print(f"{'=' * 50}")
     print(f"Total de ofertas en la base: {total:,}")
-    print(f"Muestra analizada: {len(docs)} ofertas\n")
+    print(f"Muestra para ver los campos: {len(docs)} ofertas\n")
 
     # Analizar campos disponibles
     print("CAMPOS DISPONIBLES EN CADA OFERTA")
@@ -71,44 +49,49 @@ def explorar_api():
                 ejemplo = ejemplo[:50] + "..."
             print(f"{i:2}. {campo:30} -> {ejemplo}")
 
+    # Distribuciones exactas sobre todo el índice (facetas, sin descargar docs)
+    scraper = APDScraper()
+    estadisticas = scraper.get_estadisticas()
+    cargos = scraper.get_facetas(["cargo"], limite=10)
+    if estadisticas is None or cargos is None:
+        print("No se pudieron obtener las facetas")
+        return
+    facetas = estadisticas["facetas"]
+
     # Estadísticas de estados
     print("\n>> DISTRIBUCION POR ESTADO")
     print(f"{'=' * 50}")
-    estados = Counter(doc.get("estado", "Sin estado") for doc in docs)
-    for estado, cantidad in estados.most_common():
-        porcentaje = (cantidad / len(docs)) * 100
-        print(f"{estado:20} -> {cantidad:4} ({porcentaje:5.1f}%)")
+    for estado, cantidad in facetas["estado"].items():
+        porcentaje = (cantidad / total) * 100
+        print(f"{estado:20} -> {cantidad:9,} ({porcentaje:5.1f}%)")
 
     # Estadísticas de distritos
     print("\n>> TOP 10 DISTRITOS CON MAS OFERTAS")
     print(f"{'=' * 50}")
-    distritos = Counter(doc.get("descdistrito", "Sin distrito") for doc in docs)
-    for distrito, cantidad in distritos.most_common(10):
-        print(f"{distrito:30} -> {cantidad:4}")
+    for distrito, cantidad in list(facetas["descdistrito"].items())[:10]:
+        horas = estadisticas["hsmodulos_por_distrito"].get(distrito, 0)
+        print(f"{distrito:30} -> {cantidad:9,} ({horas:,.0f} hs/módulos)")
 
     # Estadísticas de cargos
     print("\n>> TOP 10 CARGOS MAS OFERTADOS")
     print(f"{'=' * 50}")
-    cargos = Counter(doc.get("cargo", "Sin cargo") for doc in docs)
-    for cargo, cantidad in cargos.most_common(10):
+    for cargo, cantidad in cargos["facetas"]["cargo"].items():
         cargo_corto = cargo[:45] + "..." if len(cargo) > 45 else cargo
-        print(f"{cargo_corto:48} -> {cantidad:4}")
+        print(f"{cargo_corto:48} -> {cantidad:9,}")
 
     # Estadísticas de niveles
     print("\n>> DISTRIBUCION POR NIVEL/MODALIDAD")
     print(f"{'=' * 50}")
-    niveles = Counter(doc.get("descnivelmodalidad", "Sin nivel") for doc in docs)
-    for nivel, cantidad in niveles.most_common():
-        porcentaje = (cantidad / len(docs)) * 100
-        print(f"{nivel:30} -> {cantidad:4} ({porcentaje:5.1f}%)")
+    for nivel, cantidad in facetas["descnivelmodalidad"].items():
+        porcentaje = (cantidad / total) * 100
+        print(f"{nivel:30} -> {cantidad:9,} ({porcentaje:5.1f}%)")
 
     # Tipos de oferta
     print("\n>> TIPOS DE OFERTA")
     print(f"{'=' * 50}")
-    tipos = Counter(doc.get("tipooferta", "Sin tipo") for doc in docs)
-    for tipo, cantidad in tipos.most_common():
-        porcentaje = (cantidad / len(docs)) * 100
-        print(f"{tipo:30} -> {cantidad:4} ({porcentaje:5.1f}%)")
+    for tipo, cantidad in facetas["tipooferta"].items():
+        porcentaje = (cantidad / total) * 100
+        print(f"{tipo:30} -> {cantidad:9,} ({porcentaje:5.1f}%)")
 
     # Guardar un ejemplo completo
     print("\n>> Guardando ejemplo de oferta completa en 'ejemplo_oferta.json'")
@@ -141,11 +124,8 @@ def buscar_ofertas_activas():
     print("\n>> OFERTAS ACTIVAS (proximas a cerrar)")
     print(f"{'=' * 50}")
 
-    # Crear sesión con adapter personalizado para SSL antiguo
-    session = requests.Session()
-    session.mount('https://', TLSAdapter())
-
-    response = session.get(url, params=params, verify=False)
+    # Sesión compartida (pool y contexto TLS para el SSL antiguo)
+    response = get_sesion().get(url, params=params)
     data = response.json()
 
     total_activas = data["response"]["numFound"]
@@ -0,0 +1,853 @@
+"""
+Servidor Solr local de reemplazo para pruebas y benchmarks.
+
+Sirve documentos sintéticos con la forma de ejemplo_oferta.json en un
+endpoint /select compatible con lo que usa el proyecto: start/rows,
+cursorMark, fq (igualdad, OR, rangos, negación, AND, paréntesis), fl,
+facet.field, facet.range, facet.pivot con stats, wt=json y wt=csv, en Latin-1
+y con gzip.
+También permite inyectar latencia (fija y proporcional a la profundidad de
+start, como en Solr) y errores 429/503 con Retry-After.
+
+Los documentos no se guardan: se arman al vuelo a partir de columnas numpy,
+así se pueden servir 721.000 ofertas con poca memoria.
+
+Uso:
+    python fake_solr.py
+    # y en el .env: END_POINT_LOCAL = "http://127.0.0.1:8983/solr/apd/select"
+"""
+import base64
+import csv
+import gzip
+import io
+import json
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+RUTA = "/solr/apd/select"
+
+ESTADOS = ["Publicada", "Finalizada", "Designada", "Anulada", "Desierta"]
+PESOS_ESTADOS = [0.05, 0.45, 0.3, 0.15, 0.05]
+
+DISTRITOS = [
+    (1, "ADOLFO ALSINA"), (9, "BALCARCE"), (13, "BERAZATEGUI"), (20, "CAMPANA"),
+    (28, "CHIVILCOY"), (36, "ESCOBAR"), (37, "ESTEBAN ECHEVERRIA"),
+    (44, "GENERAL PUEYRREDON"), (55, "GENERAL SAN MARTIN"), (70, "LA MATANZA"),
+    (71, "LA PLATA"), (72, "LANUS"), (76, "LOMAS DE ZAMORA"), (84, "MERLO"),
+    (85, "MORENO"), (86, "MORON"), (89, "OLAVARRIA"), (95, "QUILMES"),
+    (99, "ROJAS"), (110, "TANDIL"), (112, "TIGRE"), (117, "TRES DE FEBRERO"),
+]
+
+AREAS = [
+    ("/MI", "MAESTRA DE INFANTES (/MI)"),
+    ("/MG", "MAESTRO DE GRADO (/MG)"),
+    ("/PR", "PRECEPTOR (/PR)"),
+    ("/BI", "BIBLIOTECARIO (/BI)"),
+    ("MTM", "MATEMATICA"),
+    ("PLG", "PRACTICAS DEL LENGUAJE"),
+    ("EFC", "EDUCACION FISICA"),
+    ("ING", "INGLES"),
+    ("ADZ", "DANZA"),
+    ("CJZ", "PROYECTO PRODUCCION DANZA  - PROYECTO DE PRODUCCION"),
+    ("CCD", "COMPOSICION COREOGRAFICA"),
+    ("MUS", "EDUCACION MUSICAL"),
+]
+
+NIVELES = [
+    ("J", "INICIAL"), ("P", "PRIMARIA"), ("S", "SECUNDARIA"),
+    ("A", "ARTISTICA"), ("E", "EDUCACION ESPECIAL"), ("D", "ADULTOS y CENS"),
+]
+
+TIPOS_OFERTA = [(3, "DESIGNACIONES DOCENTES "), (1, "HORAS CATEDRA"), (2, "MODULOS")]
+TURNOS = ["M", "T", "V", "N"]
+HORARIOS = ["8 A 12 HS", "13 A 17 HS", "18 A 22 HS", ""]
+
+# Campos filtrables / facetables y la columna que los respalda
+CAMPOS_TEXTO = {
+    "estado": ("estado", ESTADOS),
+    "descdistrito": ("distrito", [d for _, d in DISTRITOS]),
+    "areaincumbencia": ("area", [a for a, _ in AREAS]),
+    "cargo": ("area", [c for _, c in AREAS]),
+    "descripcioncargo": ("area", [c for _, c in AREAS]),
+    "nivelmodalidad": ("nivel", [n for n, _ in NIVELES]),
+    "descnivelmodalidad": ("nivel", [d for _, d in NIVELES]),
+    "tipooferta": ("tipo", [t for _, t in TIPOS_OFERTA]),
+    "turno": ("turno", TURNOS),
+}
+CAMPOS_NUMERO = {
+    "numdistrito": ("distrito", np.array([n for n, _ in DISTRITOS])),
+    "tipooferta_id": ("tipo", np.array([t for t, _ in TIPOS_OFERTA])),
+}
+CAMPOS_COLUMNA = ("iddetalle", "idoferta", "id", "hsmodulos", "finoferta", "timestamp")
+CAMPOS_FECHA = ("finoferta", "timestamp")
+
+ORDEN_CAMPOS = [
+    "estado", "tipooferta", "jornada", "ige", "miercoles", "martes", "acargodireccion",
+    "cuilautor", "supl_hasta", "turno", "idoferta", "sabado", "id", "iddetalle", "cargo",
+    "tomaposesion", "supl_revista", "postulacion_idganador", "domiciliodesempeno",
+    "reemp_apeynom", "numdistrito", "areaincumbencia", "finoferta", "observaciones",
+    "cupof", "tipooferta_id", "supl_desde", "reemp_cuil", "escuela", "iniciooferta",
+    "hsmodulos", "cursodivision", "idsuna", "descnivelmodalidad", "lunes",
+    "infectocontagiosa", "reemp_motivo", "descdistrito", "jueves", "nivelmodalidad",
+    "viernes", "descripcionarea", "descripcioncargo", "ult_movimiento", "_version_",
+    "timestamp",
+]
+
+
+class SolrError(Exception):
+    """Error de la query, se responde como HTTP 400 al estilo Solr"""
+
+
+class IndiceSintetico:
+    """
+    Índice de ofertas sintéticas en columnas numpy.
+
+    El orden de los índices ya es el de "finoferta desc, id asc" (finoferta
+    decrece y el id crece con la posición), así paginar es tomar rebanadas
+    de las posiciones que pasan los filtros.
+    """
+
+    def __init__(self, cantidad=10000, semilla=0, fin=None):
+        rng = np.random.default_rng(semilla)
+        self.cantidad = cantidad
+        fin = fin or datetime(2026, 6, 30, tzinfo=timezone.utc)
+        fin_seg = int(fin.timestamp())
+        # ~10 años de ofertas repartidos parejo
+        paso = max(1, (10 * 365 * 86400) // max(cantidad, 1))
+        posiciones = np.arange(cantidad, dtype=np.int64)
+
+        self.columnas = {
+            "estado": rng.choice(len(ESTADOS), cantidad, p=PESOS_ESTADOS).astype(np.int8),
+            "distrito": rng.integers(0, len(DISTRITOS), cantidad, dtype=np.int16),
+            "area": rng.integers(0, len(AREAS), cantidad, dtype=np.int16),
+            "nivel": rng.integers(0, len(NIVELES), cantidad, dtype=np.int8),
+            "tipo": rng.integers(0, len(TIPOS_OFERTA), cantidad, dtype=np.int8),
+            "turno": rng.integers(0, len(TURNOS), cantidad, dtype=np.int8),
+            "hsmodulos": np.where(
+                rng.random(cantidad) < 0.4, 0, rng.integers(1, 30, cantidad)
+            ).astype(np.int16),
+            "iddetalle": 2_000_000 + posiciones,
+            "idoferta": 2_500_000 + posiciones // 2,
+            "finoferta": fin_seg - posiciones * paso,
+        }
+        # La última modificación es posterior al inicio de la oferta
+        self.columnas["timestamp"] = self.columnas["finoferta"] - 3 * 86400 + rng.integers(
+            0, 60 * 86400, cantidad
+        )
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    # --- documentos -------------------------------------------------------
+
+    def documento(self, i, campos=None):
+        """Arma el dict de la oferta en la posición i"""
+        c = self.columnas
+        num_distrito, distrito = DISTRITOS[c["distrito"][i]]
+        area, cargo = AREAS[c["area"][i]]
+        nivel, desc_nivel = NIVELES[c["nivel"][i]]
+        tipo_id, tipo = TIPOS_OFERTA[c["tipo"][i]]
+        iddetalle = int(c["iddetalle"][i])
+        horario = HORARIOS[iddetalle % len(HORARIOS)]
+        finoferta = int(c["finoferta"][i])
+        inicio = finoferta - 2 * 86400
+
+        doc = {
+            "estado": ESTADOS[c["estado"][i]],
+            "tipooferta": tipo,
+            "jornada": nivel + "S",
+            "ige": int(c["idoferta"][i]),
+            "miercoles": horario,
+            "martes": horario,
+            "acargodireccion": "Si" if iddetalle % 7 == 0 else "No",
+            "cuilautor": f"27{20000000 + iddetalle % 9999999:08d}3",
+            "supl_hasta": _fecha(finoferta + 30 * 86400),
+            "turno": TURNOS[c["turno"][i]],
+            "idoferta": int(c["idoferta"][i]),
+            "sabado": "",
+            "id": str(iddetalle),
+            "iddetalle": iddetalle,
+            "cargo": cargo,
+            "tomaposesion": _fecha(finoferta + 3 * 86400),
+            "supl_revista": "S",
+            "postulacion_idganador": 0,
+            "domiciliodesempeno": f"CALLE {iddetalle % 500} Nº {iddetalle % 3000}        ",
+            "reemp_apeynom": "PEÑA MARÍA JOSÉ       " if iddetalle % 3 else "",
+            "numdistrito": num_distrito,
+            "areaincumbencia": area,
+            "finoferta": _fecha(finoferta),
+            "observaciones": "",
+            "cupof": 100000 + iddetalle % 900000,
+            "tipooferta_id": tipo_id,
+            "supl_desde": _fecha(finoferta + 3 * 86400),
+            "reemp_cuil": f"27{30000000 + iddetalle % 9999999:08d}6",
+            "escuela": f"{num_distrito:04d}{nivel}S{iddetalle % 100:04d}",
+            "iniciooferta": _fecha(inicio, milis=True),
+            "hsmodulos": int(c["hsmodulos"][i]),
+            "cursodivision": "MULTIEDAD" if nivel == "J" else f"{iddetalle % 6 + 1}º{iddetalle % 4 + 1}",
+            "idsuna": 0,
+            "descnivelmodalidad": desc_nivel,
+            "lunes": horario,
+            "infectocontagiosa": iddetalle % 11 == 0,
+            "reemp_motivo": "Licencia medica(ART114medica)" if iddetalle % 3 else "",
+            "descdistrito": distrito,
+            "jueves": horario,
+            "nivelmodalidad": nivel,
+            "viernes": horario,
+            "descripcionarea": cargo,
+            "descripcioncargo": cargo,
+            "ult_movimiento": _fecha(inicio + 180, milis=True),
+            # Como en Solr, crece con cada modificación (acá, con timestamp)
+            "_version_": (int(c["timestamp"][i]) << 22) + iddetalle % (1 << 22),
+            "timestamp": _fecha(int(c["timestamp"][i]), milis=True),
+        }
+        if campos:
+            return {k: doc[k] for k in campos if k in doc}
+        return doc
+
+    # --- filtros ----------------------------------------------------------
+
+    def seleccion(self, fqs):
+        """Posiciones (ordenadas) que cumplen todos los fq, con caché"""
+        clave = tuple(sorted(fqs))
+        with self._lock:
+            if clave in self._cache:
+                self._cache.move_to_end(clave)
+                return self._cache[clave]
+
+        mascara = np.ones(self.cantidad, dtype=bool)
+        for fq in fqs:
+            mascara &= self._mascara_fq(fq)
+        posiciones = np.flatnonzero(mascara)
+
+        with self._lock:
+            self._cache[clave] = posiciones
+            if len(self._cache) > 64:
+                self._cache.popitem(last=False)
+        return posiciones
+
+    def _mascara_fq(self, fq):
+        return self._mascara_arbol(_parsear_fq(fq))
+
+    def _mascara_arbol(self, nodo):
+        if nodo[0] == "clausula":
+            return self._mascara_clausula(*nodo[1:])
+        if nodo[0] == "no":
+            return ~self._mascara_arbol(nodo[1])
+        mascaras = [self._mascara_arbol(hijo) for hijo in nodo[1]]
+        if nodo[0] == "y":
+            return np.logical_and.reduce(mascaras)
+        return np.logical_or.reduce(mascaras)
+
+    def _mascara_clausula(self, campo, tipo, valor):
+        if campo == "*" and tipo == "todos":
+            return np.ones(self.cantidad, dtype=bool)
+
+        columna, convertir = self._columna(campo)
+        if tipo == "todos":
+            # campo:* o campo:[* TO *]: todos los documentos tienen valor
+            return np.ones(self.cantidad, dtype=bool)
+        if tipo == "valores":
+            mascara = np.zeros(self.cantidad, dtype=bool)
+            for v in valor:
+                codigo = convertir(v)
+                if codigo is not None:
+                    mascara |= columna == codigo
+            return mascara
+        if tipo == "rango":
+            desde, hasta, incl_desde, incl_hasta = valor
+            mascara = np.ones(self.cantidad, dtype=bool)
+            if desde != "*":
+                d = convertir(desde, rango=True)
+                mascara &= columna >= d if incl_desde else columna > d
+            if hasta != "*":
+                h = convertir(hasta, rango=True)
+                mascara &= columna <= h if incl_hasta else columna < h
+            return mascara
+        raise SolrError(f"Consulta no soportada: {campo}")
+
+    def _columna(self, campo):
+        """Columna numpy del campo y función que convierte un valor de la query"""
+        if campo in CAMPOS_TEXTO:
+            nombre, valores = CAMPOS_TEXTO[campo]
+            indice = {v: i for i, v in enumerate(valores)}
+
+            def convertir(v, rango=False):
+                if rango:
+                    raise SolrError(f"Rango sobre campo de texto: {campo}")
+                return indice.get(v)
+
+            return self.columnas[nombre], convertir
+
+        if campo in CAMPOS_NUMERO:
+            nombre, tabla = CAMPOS_NUMERO[campo]
+            return tabla[self.columnas[nombre]], lambda v, rango=False: _entero(campo, v)
+
+        if campo in CAMPOS_FECHA:
+            return self.columnas[campo], lambda v, rango=False: _segundos(v)
+
+        if campo in ("iddetalle", "idoferta", "hsmodulos"):
+            return self.columnas[campo], lambda v, rango=False: _entero(campo, v)
+
+        if campo == "id":
+            return self.columnas["iddetalle"], lambda v, rango=False: _entero(campo, v)
+
+        raise SolrError(f"undefined field {campo}")
+
+    # --- facetas ----------------------------------------------------------
+
+    def valores(self, campo, posiciones):
+        """Valores (como se muestran en los documentos) del campo en posiciones"""
+        columna, _ = self._columna(campo)
+        if campo in CAMPOS_TEXTO:
+            return columna[posiciones], CAMPOS_TEXTO[campo][1]
+        return columna[posiciones], None
+
+    def faceta_campo(self, campo, posiciones, limite=-1, mincount=1):
+        datos, etiquetas = self.valores(campo, posiciones)
+        codigos, cuentas = np.unique(datos, return_counts=True)
+        orden = np.lexsort((codigos, -cuentas))
+        resultado = {}
+        for k in orden:
+            if cuentas[k] < mincount:
+                continue
+            if 0 <= limite <= len(resultado):
+                break
+            valor = etiquetas[codigos[k]] if etiquetas else str(int(codigos[k]))
+            resultado[valor] = int(cuentas[k])
+        return resultado
+
+    def faceta_rango(self, campo, posiciones, inicio, fin, gap):
+        if campo not in CAMPOS_FECHA:
+            raise SolrError(f"facet.range solo soportado en fechas: {campo}")
+        datos = self.columnas[campo][posiciones]
+        desde = _fecha_math(inicio)
+        hasta = _fecha_math(fin)
+
+        limites = [desde]
+        while limites[-1] < hasta:
+            limites.append(_sumar_gap(limites[-1], gap))
+        bordes = np.array([int(b.timestamp()) for b in limites])
+        cuentas = np.bincount(np.searchsorted(bordes, datos, side="right"), minlength=len(bordes) + 1)
+
+        return {
+            "counts": {_fecha(int(b)): int(cuentas[i + 1]) for i, b in enumerate(bordes[:-1])},
+            "gap": gap,
+            "start": _fecha(int(bordes[0])),
+            "end": _fecha(int(bordes[-1])),
+            "before": int(cuentas[0]),
+            "after": int(cuentas[len(bordes):].sum()),
+            "between": int(cuentas[1:len(bordes)].sum()),
+        }
+
+    def stats(self, campo, posiciones):
+        columna, _ = self._columna(campo)
+        datos = columna[posiciones].astype(np.float64)
+        if not len(datos):
+            return {"min": None, "max": None, "count": 0, "missing": 0, "sum": 0.0,
+                    "sumOfSquares": 0.0, "mean": "NaN", "stddev": 0.0}
+        return {
+            "min": float(datos.min()),
+            "max": float(datos.max()),
+            "count": int(len(datos)),
+            "missing": 0,
+            "sum": float(datos.sum()),
+            "sumOfSquares": float((datos ** 2).sum()),
+            "mean": float(datos.mean()),
+            "stddev": float(datos.std(ddof=1)) if len(datos) > 1 else 0.0,
+        }
+
+    def pivot(self, campos, posiciones, campo_stats=None):
+        campo = campos[0]
+        datos, etiquetas = self.valores(campo, posiciones)
+        codigos, inversa, cuentas = np.unique(datos, return_inverse=True, return_counts=True)
+        nodos = []
+        for k in np.lexsort((codigos, -cuentas)):
+            sub = posiciones[inversa == k]
+            nodo = {
+                "field": campo,
+                "value": etiquetas[codigos[k]] if etiquetas else int(codigos[k]),
+                "count": int(cuentas[k]),
+            }
+            if len(campos) > 1:
+                nodo["pivot"] = self.pivot(campos[1:], sub, campo_stats)
+            if campo_stats:
+                nodo["stats"] = {"stats_fields": {campo_stats: self.stats(campo_stats, sub)}}
+            nodos.append(nodo)
+        return nodos
+
+
+class FakeSolr:
+    """
+    Servidor HTTP con el índice sintético.
+
+    Args:
+        docs: Cantidad de ofertas sintéticas
+        latencia: Segundos agregados a cada respuesta
+        latencia_profundidad: Segundos extra por cada 100.000 de start (costo
+            del deep paging con start/rows; no aplica a cursorMark)
+        tasa_errores: Probabilidad de responder 429/503 con Retry-After
+        retry_after: Valor del header Retry-After en los errores
+        semilla: Semilla de los datos y de los errores inyectados
+    """
+
+    def __init__(
+        self,
+        docs=10000,
+        latencia=0.0,
+        latencia_profundidad=0.0,
+        tasa_errores=0.0,
+        retry_after=1,
+        semilla=0,
+    ):
+        self.indice = IndiceSintetico(docs, semilla)
+        self.latencia = latencia
+        self.latencia_profundidad = latencia_profundidad
+        self.tasa_errores = tasa_errores
+        self.retry_after = retry_after
+        self.peticiones = 0
+        self._random = random.Random(semilla)
+        self._servidor = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, puerto = self._servidor.server_address[:2]
+        return f"http://{host}:{puerto}{RUTA}"
+
+    def iniciar(self, host="127.0.0.1", puerto=0):
+        """Levanta el servidor en un thread y devuelve la URL del /select"""
+        fake = self
+
+        class Manejador(_Manejador):
+            servidor = fake
+
+        self._servidor = ThreadingHTTPServer((host, puerto), Manejador)
+        self._servidor.daemon_threads = True
+        self._thread = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def detener(self):
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+
+    def __enter__(self):
+        if self._servidor is None:
+            self.iniciar()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.detener()
+
+    # --- respuesta --------------------------------------------------------
+
+    def responder(self, q, acepta_gzip):
+        """Devuelve (status, headers, cuerpo) para los parámetros q"""
+        self.peticiones += 1
+        inicio = time.perf_counter()
+
+        if self.tasa_errores and self._random.random() < self.tasa_errores:
+            return self._random.choice([429, 503]), {"Retry-After": str(self.retry_after)}, b""
+
+        try:
+            posiciones = self.indice.seleccion(q.get("fq", []))
+            rows = int(_param(q, "rows", "10"))
+            wt = _param(q, "wt", "json")
+            cursor = _param(q, "cursorMark")
+            fl = _campos_fl(_param(q, "fl"))
+
+            if cursor is not None:
+                desde = _leer_cursor(cursor)
+                pagina = posiciones[desde:desde + rows]
+                siguiente = _cursor(desde + len(pagina)) if len(pagina) else cursor
+                start = 0
+            else:
+                start = int(_param(q, "start", "0"))
+                pagina = posiciones[start:start + rows]
+                espera = self.latencia_profundidad * start / 100_000
+                if espera:
+                    time.sleep(espera)
+
+            if wt == "csv":
+                cuerpo = _csv(self.indice, pagina, fl)
+                tipo = "text/plain; charset=ISO-8859-1"
+            else:
+                data = {
+                    "responseHeader": {"status": 0, "QTime": 0},
+                    "response": {
+                        "numFound": int(len(posiciones)),
+                        "start": start,
+                        "docs": [self.indice.documento(i, fl) for i in pagina],
+                    },
+                }
+                if cursor is not None:
+                    data["nextCursorMark"] = siguiente
+                if _param(q, "facet") == "true":
+                    data["facet_counts"] = self._facetas(q, posiciones)
+                if _param(q, "stats") == "true":
+                    data["stats"] = {
+                        "stats_fields": {
+                            _sin_local(c): self.indice.stats(_sin_local(c), posiciones)
+                            for c in q.get("stats.field", [])
+                        }
+                    }
+                data["responseHeader"]["QTime"] = int((time.perf_counter() - inicio) * 1000)
+                cuerpo = json.dumps(data, ensure_ascii=False).encode("latin-1", "replace")
+                tipo = "application/json; charset=ISO-8859-1"
+        except SolrError as e:
+            cuerpo = json.dumps({"error": {"msg": str(e), "code": 400}}).encode("latin-1")
+            return 400, {"Content-Type": "application/json"}, cuerpo
+        except (ValueError, KeyError) as e:
+            cuerpo = json.dumps({"error": {"msg": f"Parámetro inválido: {e}", "code": 400}})
+            return 400, {"Content-Type": "application/json"}, cuerpo.encode("latin-1", "replace")
+
+        if self.latencia:
+            time.sleep(self.latencia)
+
+        headers = {"Content-Type": tipo}
+        if acepta_gzip:
+            cuerpo = gzip.compress(cuerpo, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+        return 200, headers, cuerpo
+
+    def _facetas(self, q, posiciones):
+        limite = int(_param(q, "facet.limit", "100"))
+        mincount = int(_param(q, "facet.mincount", "0"))
+        facetas = {"facet_fields": {}, "facet_ranges": {}, "facet_pivot": {}}
+
+        for campo in q.get("facet.field", []):
+            facetas["facet_fields"][campo] = self.indice.faceta_campo(
+                campo, posiciones, limite, max(mincount, 0)
+            )
+
+        for campo in q.get("facet.range", []):
+            facetas["facet_ranges"][campo] = self.indice.faceta_rango(
+                campo,
+                posiciones,
+                _param(q, "facet.range.start"),
+                _param(q, "facet.range.end"),
+                _param(q, "facet.range.gap"),
+            )
+
+        for pivot in q.get("facet.pivot", []):
+            campos = _sin_local(pivot)
+            campo_stats = None
+            if "{!stats=" in pivot:
+                campo_stats = _sin_local(_param(q, "stats.field"))
+            facetas["facet_pivot"][campos] = self.indice.pivot(
+                campos.split(","), posiciones, campo_stats
+            )
+        return facetas
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    servidor = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if not url.path.endswith("/select"):
+            self.send_error(404)
+            return
+
+        q = parse_qs(url.query, keep_blank_values=True)
+        acepta_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+        status, headers, cuerpo = self.servidor.responder(q, acepta_gzip)
+
+        self.send_response(status)
+        for nombre, valor in headers.items():
+            self.send_header(nombre, valor)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+
+# --- parseo de fq -----------------------------------------------------------
+
+_CAMPO = re.compile(r"([\w*]+):")
+
+
+def _parsear_fq(fq):
+    """
+    Parsea un fq con AND, OR, NOT/-, paréntesis y cláusulas campo:valor.
+
+    Returns:
+        Árbol de tuplas: ("y", [hijos]), ("o", [hijos]), ("no", hijo) o
+        ("clausula", campo, tipo, valor) con tipo "valores" (lista), "rango"
+        ((desde, hasta, incl_desde, incl_hasta)) o "todos"
+    """
+    arbol, i = _expresion(fq, 0)
+    if fq[i:].strip():
+        raise SolrError(f"No se puede parsear el fq: {fq!r}")
+    return arbol
+
+
+def _saltar_blancos(texto, i):
+    while i < len(texto) and texto[i] == " ":
+        i += 1
+    return i
+
+
+def _expresion(texto, i):
+    """expresion := conjuncion (OR conjuncion)*"""
+    hijos = []
+    nodo, i = _conjuncion(texto, i)
+    hijos.append(nodo)
+    while True:
+        i = _saltar_blancos(texto, i)
+        if not texto.startswith("OR ", i):
+            break
+        nodo, i = _conjuncion(texto, i + 3)
+        hijos.append(nodo)
+    return (hijos[0] if len(hijos) == 1 else ("o", hijos)), i
+
+
+def _conjuncion(texto, i):
+    """conjuncion := unario ((AND)? unario)*  (sin operador = AND)"""
+    hijos = []
+    while True:
+        i = _saltar_blancos(texto, i)
+        if i >= len(texto) or texto[i] == ")" or texto.startswith("OR ", i):
+            break
+        if texto.startswith("AND ", i):
+            i += 4
+            continue
+        nodo, i = _unario(texto, i)
+        hijos.append(nodo)
+    if not hijos:
+        raise SolrError(f"Expresión vacía en el fq: {texto!r}")
+    return (hijos[0] if len(hijos) == 1 else ("y", hijos)), i
+
+
+def _unario(texto, i):
+    """unario := (- | NOT) unario | ( expresion ) | clausula"""
+    if texto[i] == "-":
+        nodo, i = _unario(texto, i + 1)
+        return ("no", nodo), i
+    if texto.startswith("NOT ", i):
+        nodo, i = _unario(texto, _saltar_blancos(texto, i + 4))
+        return ("no", nodo), i
+    if texto[i] == "(":
+        nodo, i = _expresion(texto, i + 1)
+        i = _saltar_blancos(texto, i)
+        if i >= len(texto) or texto[i] != ")":
+            raise SolrError(f"Falta ')' en el fq: {texto!r}")
+        return nodo, i + 1
+    return _clausula(texto, i)
+
+
+def _clausula(texto, i):
+    m = _CAMPO.match(texto, i)
+    if not m:
+        raise SolrError(f"No se puede parsear el fq: {texto!r}")
+    campo = m.group(1)
+    i = m.end()
+
+    if texto[i] == '"':
+        valor, i = _leer_comillas(texto, i)
+        return ("clausula", campo, "valores", [valor]), i
+
+    if texto[i] == "(":
+        # campo:(a OR b ...)
+        valores = []
+        i += 1
+        while True:
+            i = _saltar_blancos(texto, i)
+            if texto[i] == ")":
+                i += 1
+                break
+            if texto.startswith("OR ", i):
+                i += 3
+                continue
+            if texto[i] == '"':
+                valor, i = _leer_comillas(texto, i)
+            else:
+                valor, i = _leer_termino(texto, i, ") ")
+            valores.append(valor)
+        return ("clausula", campo, "valores", valores), i
+
+    if texto[i] in "[{":
+        cierre = min(p for p in (texto.find("]", i), texto.find("}", i)) if p != -1)
+        desde, hasta = texto[i + 1:cierre].split(" TO ")
+        desde, hasta = desde.strip().strip('"'), hasta.strip().strip('"')
+        tipo = "todos" if desde == hasta == "*" else "rango"
+        valor = (desde, hasta, texto[i] == "[", texto[cierre] == "]")
+        return ("clausula", campo, tipo, valor), cierre + 1
+
+    valor, i = _leer_termino(texto, i, " )")
+    if valor == "*":
+        return ("clausula", campo, "todos", None), i
+    return ("clausula", campo, "valores", [valor]), i
+
+
+def _leer_comillas(texto, i):
+    """Lee "..." desde i (con escapes \\) y devuelve (valor, posición siguiente)"""
+    partes = []
+    i += 1
+    while texto[i] != '"':
+        if texto[i] == "\\":
+            i += 1
+        partes.append(texto[i])
+        i += 1
+    return "".join(partes), i + 1
+
+
+def _leer_termino(texto, i, fin):
+    """Lee un término sin comillas hasta un carácter de fin no escapado"""
+    partes = []
+    while i < len(texto) and texto[i] not in fin:
+        if texto[i] == "\\":
+            i += 1
+        partes.append(texto[i])
+        i += 1
+    return "".join(partes), i
+
+
+# --- helpers ----------------------------------------------------------------
+
+
+def _param(q, nombre, defecto=None):
+    valores = q.get(nombre)
+    return valores[0] if valores else defecto
+
+
+def _sin_local(valor):
+    """Quita los local params {!...} del principio"""
+    return re.sub(r"^\{![^}]*\}", "", valor or "")
+
+
+def _campos_fl(fl):
+    if not fl:
+        return None
+    campos = [c.strip() for c in fl.split(",") if c.strip() and c.strip() != "score"]
+    return None if "*" in campos else campos
+
+
+def _cursor(posicion):
+    return "AoE" + base64.urlsafe_b64encode(str(posicion).encode()).decode()
+
+
+def _leer_cursor(cursor):
+    if cursor == "*":
+        return 0
+    try:
+        return int(base64.urlsafe_b64decode(cursor[3:].encode()).decode())
+    except ValueError:
+        raise SolrError(f"Cursor inválido: {cursor}")
+
+
+def _csv(indice, posiciones, fl):
+    campos = fl or ORDEN_CAMPOS
+    salida = io.StringIO()
+    escritor = csv.writer(salida, lineterminator="\n")
+    escritor.writerow(campos)
+    for i in posiciones:
+        doc = indice.documento(i, campos)
+        escritor.writerow(
+            [
+                str(v).lower() if isinstance(v, bool) else v
+                for v in (doc.get(c, "") for c in campos)
+            ]
+        )
+    return salida.getvalue().encode("latin-1", "replace")
+
+
+def _entero(campo, valor):
+    try:
+        return int(valor)
+    except ValueError:
+        raise SolrError(f"Valor inválido para {campo}: {valor}")
+
+
+def _fecha(segundos, milis=False):
+    texto = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(segundos))
+    return texto + (".000Z" if milis else "Z")
+
+
+def _segundos(valor):
+    return int(_fecha_math(valor).timestamp())
+
+
+def _fecha_math(expresion):
+    """Fecha ISO o expresión de date math de Solr (NOW/MONTH+1MONTH, ...)"""
+    m = re.match(r"^(NOW|[\d\-:T.]+Z)(.*)$", expresion)
+    if not m:
+        raise SolrError(f"Fecha inválida: {expresion}")
+    base, resto = m.groups()
+    if base == "NOW":
+        fecha = datetime.now(timezone.utc)
+    else:
+        fecha = datetime.fromisoformat(base.replace("Z", "+00:00"))
+
+    for operador, cantidad, unidad in re.findall(r"([/+\-])(\d*)([A-Z]+?)S?(?=[/+\-]|$)", resto):
+        if operador == "/":
+            fecha = _redondear(fecha, unidad)
+        else:
+            fecha = _sumar(fecha, int(cantidad or 1) * (1 if operador == "+" else -1), unidad)
+    return fecha
+
+
+def _sumar_gap(fecha, gap):
+    m = re.match(r"^\+(\d+)([A-Z]+?)S?$", gap)
+    if not m:
+        raise SolrError(f"Gap inválido: {gap}")
+    return _sumar(fecha, int(m.group(1)), m.group(2))
+
+
+def _redondear(fecha, unidad):
+    if unidad == "YEAR":
+        return fecha.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    if unidad == "MONTH":
+        return fecha.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    if unidad == "DAY":
+        return fecha.replace(hour=0, minute=0, second=0, microsecond=0)
+    if unidad == "HOUR":
+        return fecha.replace(minute=0, second=0, microsecond=0)
+    raise SolrError(f"Unidad inválida: {unidad}")
+
+
+def _sumar(fecha, cantidad, unidad):
+    if unidad in ("YEAR", "MONTH"):
+        meses = fecha.month - 1 + cantidad * (12 if unidad == "YEAR" else 1)
+        return fecha.replace(year=fecha.year + meses // 12, month=meses % 12 + 1)
+    if unidad == "DAY":
+        return fecha + timedelta(days=cantidad)
+    if unidad == "HOUR":
+        return fecha + timedelta(hours=cantidad)
+    if unidad == "MINUTE":
+        return fecha + timedelta(minutes=cantidad)
+    raise SolrError(f"Unidad inválida: {unidad}")
+
+
+def servir(docs=10000, puerto=8983, **opciones):
+    """Levanta el servidor y bloquea hasta Ctrl+C"""
+    fake = FakeSolr(docs, **opciones)
+    url = fake.iniciar(puerto=puerto)
+    print(f"Solr local con {docs:,} ofertas en {url}")
+    print(f'Agregá al .env: END_POINT_LOCAL = "{url}"')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.detener()
+
+
+if __name__ == "__main__":
+    # Opción 1: Índice chico sin latencia
+    servir(docs=10000)
+
+    # Opción 2: Tamaño real, con latencia y errores como el servidor de ABC
+    # servir(docs=721000, latencia=0.2, latencia_profundidad=0.5, tasa_errores=0.02)
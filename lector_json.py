@@ -0,0 +1,282 @@
+"""
+Lectura incremental de archivos de ofertas JSON.
+
+Los ofertas_*.json son un solo objeto {"metadata": ..., "ofertas": [...]}
+y los viejos pueden tener cientos de miles de ofertas: json.load arma todo
+el árbol de objetos en memoria antes de devolver la primera. LectorJSON
+recorre el archivo de a bloques y devuelve las ofertas en lotes de tamaño
+fijo; la memoria queda acotada por el lote, no por el archivo.
+
+Acepta cualquier JSON válido con esa forma (indentado o no, con la metadata
+antes o después de las ofertas) y también un array de ofertas suelto:
+
+    lector = LectorJSON("ofertas_completas.json")
+    for lote in lector.lotes():
+        procesar(lote)
+    print(lector.metadata)
+"""
+import codecs
+import json
+
+from escritores import ruta_metadata
+
+# Ofertas por lote
+TAMANO_LOTE = 10_000
+
+# Bytes leídos del archivo por vez
+BLOQUE = 1 << 20
+
+# Tamaño máximo de un valor (una oferta o la metadata): más que esto es un
+# archivo dañado, no una oferta grande
+MAX_VALOR = 64 * BLOQUE
+
+_BLANCOS = " \t\n\r"
+
+
+class LectorJSON:
+    """
+    Recorre un archivo de ofertas JSON sin cargarlo entero.
+
+    metadata se completa al pasar por ella: en los archivos que escribe
+    EscritorJSON está al principio, así que ya está disponible con el primer
+    lote; si está después de las ofertas, recién al terminar el recorrido.
+    """
+
+    def __init__(self, archivo, tamano_lote=TAMANO_LOTE):
+        self.archivo = archivo
+        self.tamano_lote = tamano_lote
+        self.metadata = {}
+        self.total = 0
+
+    def lotes(self):
+        """Genera listas de hasta tamano_lote ofertas, en el orden del archivo"""
+        self.metadata = {}
+        self.total = 0
+        with open(self.archivo, "rb") as f:
+            self._f = f
+            self._decodificador = codecs.getincrementaldecoder("utf-8")()
+            self._buffer = ""
+            self._pos = 0
+            self._fin = False
+            try:
+                yield from self._documento()
+            finally:
+                self._f = None
+
+    def __iter__(self):
+        """Las ofertas de a una"""
+        for lote in self.lotes():
+            yield from lote
+
+    # -- Recorrido ---------------------------------------------------------
+
+    def _documento(self):
+        self._saltar_blancos()
+        inicio = self._caracter()
+        if inicio == "[":
+            # Array de ofertas sin metadata
+            yield from self._array()
+        elif inicio == "{":
+            yield from self._objeto()
+        else:
+            self._error("se esperaba un objeto o un array")
+
+        self._saltar_blancos()
+        if self._caracter():
+            self._error("contenido después del documento")
+
+    def _objeto(self):
+        """Claves del objeto principal: la de ofertas se recorre de a lotes"""
+        self._avanzar()  # {
+        self._saltar_blancos()
+        if self._caracter() == "}":
+            self._avanzar()
+            return
+        while True:
+            self._saltar_blancos()
+            clave = self._valor()
+            if not isinstance(clave, str):
+                self._error("se esperaba el nombre de una clave")
+            self._saltar_blancos()
+            self._esperar(":")
+            self._saltar_blancos()
+
+            if clave == "ofertas" and self._caracter() == "[":
+                yield from self._array()
+            else:
+                valor = self._valor()
+                if clave == "metadata":
+                    self.metadata = valor
+
+            self._saltar_blancos()
+            if self._caracter() == "}":
+                self._avanzar()
+                return
+            self._esperar(",")
+
+    def _array(self):
+        """Elementos del array de ofertas, en lotes"""
+        self._avanzar()  # [
+        lote = []
+        self._saltar_blancos()
+        if self._caracter() == "]":
+            self._avanzar()
+            return
+        while True:
+            self._saltar_blancos()
+            lote.append(self._valor())
+            self.total += 1
+            if len(lote) >= self.tamano_lote:
+                yield lote
+                lote = []
+
+            self._saltar_blancos()
+            if self._caracter() == "]":
+                self._avanzar()
+                break
+            self._esperar(",")
+        if lote:
+            yield lote
+
+    # -- Buffer ------------------------------------------------------------
+
+    def _leer(self):
+        """Agrega un bloque al buffer descartando lo ya consumido; False al final"""
+        if self._fin:
+            return False
+        datos = self._f.read(BLOQUE)
+        self._fin = not datos
+        texto = self._decodificador.decode(datos, final=self._fin)
+        self._buffer = self._buffer[self._pos :] + texto
+        self._pos = 0
+        return bool(texto) or not self._fin
+
+    def _caracter(self):
+        """Caracter actual sin consumirlo ("" al final del archivo)"""
+        while self._pos >= len(self._buffer):
+            if not self._leer():
+                return ""
+        return self._buffer[self._pos]
+
+    def _avanzar(self):
+        self._pos += 1
+
+    def _saltar_blancos(self):
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _BLANCOS:
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._leer():
+                return
+
+    def _esperar(self, caracter):
+        if self._caracter() != caracter:
+            self._error(f"se esperaba '{caracter}'")
+        self._avanzar()
+
+    def _valor(self):
+        """
+        Decodifica el valor JSON que empieza en la posición actual. Si el
+        buffer lo corta (o termina justo donde termina el valor, como un
+        número que puede seguir en el próximo bloque), lee más y reintenta.
+        """
+        while True:
+            try:
+                valor, fin = _DECODIFICADOR.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as e:
+                if len(self._buffer) - self._pos < MAX_VALOR and self._leer():
+                    continue
+                self._error(f"{e.msg} (cerca del byte {self._f.tell()})")
+            if fin < len(self._buffer) or self._fin:
+                self._pos = fin
+                return valor
+            # Termina justo al final del buffer: puede seguir en el próximo
+            # bloque. Leer lo desplaza, así que se decodifica de nuevo
+            self._leer()
+
+    def _error(self, mensaje):
+        raise ValueError(f"{self.archivo}: JSON de ofertas inválido, {mensaje}")
+
+
+_DECODIFICADOR = json.JSONDecoder()
+
+
+class LectorNDJSON:
+    """
+    Recorre un archivo NDJSON de ofertas (una por línea, como lo escribe
+    EscritorNDJSON) con la misma interfaz que LectorJSON.
+
+    La metadata está en el archivo aparte <archivo>.meta.json; si no existe
+    (la extracción se cortó antes de cerrar) queda vacía.
+    """
+
+    def __init__(self, archivo, tamano_lote=TAMANO_LOTE):
+        self.archivo = archivo
+        self.tamano_lote = tamano_lote
+        self.metadata = {}
+        self.total = 0
+
+    def lotes(self):
+        """Genera listas de hasta tamano_lote ofertas, en el orden del archivo"""
+        self.metadata = self._leer_metadata()
+        self.total = 0
+        lote = []
+        with open(self.archivo, "r", encoding="utf-8") as f:
+            for numero, linea in enumerate(f, 1):
+                if not linea.strip():
+                    continue
+                try:
+                    lote.append(json.loads(linea))
+                except json.JSONDecodeError as e:
+                    raise ValueError(
+                        f"{self.archivo}: NDJSON de ofertas inválido, {e.msg} (línea {numero})"
+                    ) from None
+                self.total += 1
+                if len(lote) >= self.tamano_lote:
+                    yield lote
+                    lote = []
+        if lote:
+            yield lote
+
+    def __iter__(self):
+        """Las ofertas de a una"""
+        for lote in self.lotes():
+            yield from lote
+
+    def _leer_metadata(self):
+        try:
+            with open(ruta_metadata(self.archivo), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+
+def leer_metadata_json(archivo):
+    """
+    Metadata de un archivo de ofertas JSON.
+
+    Si la metadata está antes de las ofertas (como la escribe EscritorJSON)
+    no lee el resto del archivo.
+    """
+    lector = LectorJSON(archivo, tamano_lote=1)
+    lotes = lector.lotes()
+    for _ in lotes:
+        if lector.metadata:
+            lotes.close()
+            break
+    return lector.metadata
+
+
+if __name__ == "__main__":
+    import time
+
+    # Opción 1: Recorrer un archivo grande de a lotes
+    inicio = time.perf_counter()
+    lector = LectorJSON("ofertas_muestra.json")
+    for lote in lector.lotes():
+        pass
+    print(f"{lector.total:,} ofertas en {time.perf_counter() - inicio:.2f}s")
+    print(f"Metadata: {lector.metadata}")
+
+    # Opción 2: Convertir en una pasada al dataset Parquet
+    # from dataset_ofertas import convertir_json
+    # convertir_json("ofertas_muestra.json")
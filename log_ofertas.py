@@ -0,0 +1,632 @@
+"""
+Log de ofertas en segmentos NDJSON de solo agregado.
+
+Estructura en disco:
+
+    ofertas_completas.segmentos/
+        manifiesto.json             # segmentos confirmados (en orden) y metadata
+        segmento-000001.ndjson      # una oferta por línea
+        segmento-000001.idx         # clave, offset y _version_ de cada línea (int64)
+        segmento-000002.ndjson
+        ...
+
+Cada sincronización agrega un segmento chico con las ofertas nuevas o
+modificadas, así escribir cuesta lo que cambió y no lo que ya estaba. Una
+oferta reemplaza a la anterior con la misma clave (iddetalle) solo si su
+_version_ es mayor; las repetidas sin cambios no se escriben.
+
+El manifiesto es el punto de confirmación: se reemplaza atómicamente y solo
+cuenta filas ya escritas y bajadas a disco, así un corte a mitad de escritura
+deja el log en el último estado confirmado.
+
+Al abrir se arma en memoria el índice clave -> (segmento, fila) leyendo los
+.idx, sin parsear JSON. Las lecturas recorren los segmentos y entregan solo
+la fila vigente de cada clave: una vista sin duplicados. La compactación
+reescribe los segmentos en uno solo con la última versión de cada oferta y
+corre en un thread aparte.
+
+Pensado para un solo proceso escritor; otros procesos pueden leer con
+solo_lectura=True. Si el escritor compacta y borra un segmento que un lector
+todavía no abrió, el lector vuelve a leer el manifiesto y sigue con los
+segmentos nuevos.
+"""
+import json
+import os
+import threading
+from array import array
+
+from dedup import clave_oferta
+
+EXTENSION = ".segmentos"
+MANIFIESTO = "manifiesto.json"
+
+# Ubicación empaquetada en un int: número de segmento y fila dentro de él
+BITS_FILA = 40
+MASCARA_FILA = (1 << BITS_FILA) - 1
+
+# La compactación automática arranca con más segmentos que esto...
+MAX_SEGMENTOS = 8
+# ...o cuando las filas reemplazadas superan esta fracción del total
+MAX_OBSOLETAS = 0.5
+
+# Veces que un lector solo_lectura recarga el manifiesto cuando le borran
+# un segmento (compactaciones seguidas del escritor)
+REINTENTOS_LECTURA = 3
+
+
+def es_log(ruta):
+    """True si ruta es un log segmentado de ofertas (por extensión)"""
+    return str(ruta).rstrip("/\\").endswith(EXTENSION)
+
+
+class _Segmento:
+    """Filas confirmadas de un segmento: clave, offset y versión por fila"""
+
+    def __init__(self, numero, nombre):
+        self.numero = numero
+        self.nombre = nombre
+        self.claves = array("q")
+        self.offsets = array("q")
+        self.versiones = array("q")
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self.claves)
+
+
+class LogOfertas:
+    """
+    Log segmentado de ofertas con índice en memoria.
+
+    Args:
+        directorio: Carpeta del log (se crea si no existe)
+        compactar_auto: Compactar en segundo plano cuando hay muchos segmentos
+            o muchas filas reemplazadas
+        solo_lectura: Abrir sin escribir ni compactar (otro proceso puede
+            estar escribiendo y compactando)
+    """
+
+    def __init__(self, directorio, compactar_auto=True, solo_lectura=False):
+        self.directorio = directorio
+        self.compactar_auto = compactar_auto and not solo_lectura
+        self.solo_lectura = solo_lectura
+        self.indice = {}
+        self.segmentos = []
+        self.metadata = {}
+        self._siguiente = 1
+        self._lock = threading.RLock()
+        self._lock_compactacion = threading.Lock()
+        self._abiertos = set()
+        self._lectores = 0
+        self._por_borrar = []
+        self._compactacion = None
+
+        if not solo_lectura:
+            os.makedirs(directorio, exist_ok=True)
+        self._cargar()
+
+    # -- Manifiesto e índice ------------------------------------------------
+
+    def _ruta(self, nombre, extension):
+        return os.path.join(self.directorio, nombre + extension)
+
+    def _cargar(self):
+        """Lee el manifiesto y arma el índice desde los .idx"""
+        for intento in range(REINTENTOS_LECTURA):
+            try:
+                self._leer_manifiesto()
+                break
+            except FileNotFoundError:
+                # Solo lectura: el escritor compactó entre que se leyó el
+                # manifiesto y se abrieron los .idx
+                if not self.solo_lectura or intento == REINTENTOS_LECTURA - 1:
+                    raise
+
+        if not self.solo_lectura:
+            self._limpiar_huerfanos()
+
+    def _leer_manifiesto(self):
+        ruta = os.path.join(self.directorio, MANIFIESTO)
+        manifiesto = {}
+        if os.path.exists(ruta):
+            with open(ruta, "r", encoding="utf-8") as f:
+                manifiesto = json.load(f)
+
+        indice = {}
+        segmentos = []
+        for entrada in manifiesto.get("segmentos", []):
+            segmento = _Segmento(_numero(entrada["nombre"]), entrada["nombre"])
+            segmento.bytes = entrada["bytes"]
+            filas = array("q")
+            with open(self._ruta(segmento.nombre, ".idx"), "rb") as f:
+                filas.fromfile(f, entrada["filas"] * 3)
+            segmento.claves = filas[0::3]
+            segmento.offsets = filas[1::3]
+            segmento.versiones = filas[2::3]
+            base = segmento.numero << BITS_FILA
+            # Los segmentos están en orden: el último con cada clave gana
+            indice.update(zip(segmento.claves, range(base, base + len(segmento))))
+            segmentos.append(segmento)
+
+        with self._lock:
+            self.indice = indice
+            self.segmentos = segmentos
+            self.metadata = manifiesto.get("metadata", {})
+            self._siguiente = manifiesto.get("siguiente", 1)
+
+    def _guardar_manifiesto(self):
+        """Reemplaza el manifiesto de forma atómica"""
+        manifiesto = {
+            "siguiente": self._siguiente,
+            "segmentos": [
+                {"nombre": s.nombre, "filas": len(s), "bytes": s.bytes} for s in self.segmentos
+            ],
+            "metadata": self.metadata,
+        }
+        ruta = os.path.join(self.directorio, MANIFIESTO)
+        temporal = f"{ruta}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, ruta)
+
+    def _limpiar_huerfanos(self):
+        """Borra segmentos que no llegaron al manifiesto (escrituras cortadas)"""
+        vigentes = {s.nombre for s in self.segmentos}
+        for archivo in os.listdir(self.directorio):
+            nombre, extension = os.path.splitext(archivo)
+            if nombre.startswith("segmento-") and nombre not in vigentes:
+                if extension in (".ndjson", ".idx"):
+                    os.remove(os.path.join(self.directorio, archivo))
+
+    def _reservar_segmento(self):
+        with self._lock:
+            numero = self._siguiente
+            self._siguiente += 1
+            self._abiertos.add(numero)
+        return _Segmento(numero, f"segmento-{numero:06d}")
+
+    # -- Escritura ------------------------------------------------------------
+
+    def abrir_segmento(self):
+        """
+        Segmento nuevo para escribir de a lotes (ver EscritorSegmento).
+        Lo escrito se ve en las lecturas recién al confirmar cada lote.
+        """
+        if self.solo_lectura:
+            raise ValueError("El log se abrió en modo solo lectura")
+        return EscritorSegmento(self, self._reservar_segmento())
+
+    def agregar(self, ofertas):
+        """
+        Escribe en un segmento nuevo las ofertas nuevas o con _version_ mayor.
+
+        Returns:
+            Cantidad de ofertas escritas
+        """
+        segmento = self.abrir_segmento()
+        try:
+            segmento.escribir(ofertas)
+        finally:
+            segmento.cerrar()
+        return segmento.escritas
+
+    def es_mas_nueva(self, clave, version):
+        """True si una oferta con esta clave y versión reemplaza a la guardada"""
+        with self._lock:
+            ubicacion = self.indice.get(clave)
+            if ubicacion is None:
+                return True
+            vigente = self._segmento(ubicacion >> BITS_FILA).versiones[ubicacion & MASCARA_FILA]
+        # Sin _version_ (0) gana la última escrita
+        return not (version and vigente and version <= vigente)
+
+    def _confirmar(self, segmento, claves, offsets, versiones, bytes_totales):
+        """Agrega filas ya bajadas a disco al índice y al manifiesto"""
+        with self._lock:
+            if segmento not in self.segmentos:
+                self.segmentos.append(segmento)
+            base = (segmento.numero << BITS_FILA) + len(segmento)
+            segmento.claves.extend(claves)
+            segmento.offsets.extend(offsets)
+            segmento.versiones.extend(versiones)
+            segmento.bytes = bytes_totales
+            self.indice.update(zip(claves, range(base, base + len(claves))))
+            self._guardar_manifiesto()
+
+    def _liberar(self, segmento):
+        with self._lock:
+            self._abiertos.discard(segmento.numero)
+        if self.compactar_auto and self.necesita_compactar():
+            self.compactar_en_segundo_plano()
+
+    def guardar_metadata(self, metadata):
+        """Actualiza la metadata del log (se guarda en el manifiesto)"""
+        with self._lock:
+            self.metadata.update(metadata)
+            self._guardar_manifiesto()
+
+    # -- Lectura --------------------------------------------------------------
+
+    def __len__(self):
+        return len(self.indice)
+
+    def __contains__(self, clave):
+        return clave in self.indice
+
+    def _segmento(self, numero):
+        for segmento in self.segmentos:
+            if segmento.numero == numero:
+                return segmento
+        raise KeyError(numero)
+
+    def _reintentar(self, intento):
+        """
+        Tras un FileNotFoundError al abrir un segmento: en solo lectura el
+        escritor lo compactó y lo borró, así que se recarga el manifiesto.
+
+        Returns:
+            True si hay que reintentar la lectura
+        """
+        if not self.solo_lectura or intento == REINTENTOS_LECTURA - 1:
+            return False
+        self._cargar()
+        return True
+
+    def leer(self, clave):
+        """La versión vigente de una oferta, o None"""
+        for intento in range(REINTENTOS_LECTURA):
+            try:
+                return self._leer(clave)
+            except FileNotFoundError:
+                if not self._reintentar(intento):
+                    raise
+
+    def _leer(self, clave):
+        with self._lock:
+            ubicacion = self.indice.get(clave)
+            if ubicacion is None:
+                return None
+            segmento = self._segmento(ubicacion >> BITS_FILA)
+            offset = segmento.offsets[ubicacion & MASCARA_FILA]
+            self._lectores += 1
+        try:
+            with open(self._ruta(segmento.nombre, ".ndjson"), "rb") as f:
+                f.seek(offset)
+                return json.loads(f.readline())
+        finally:
+            self._soltar_lector()
+
+    def ofertas(self):
+        """
+        Recorre las ofertas vigentes, una vez cada una.
+
+        Trabaja sobre una foto del índice tomada al empezar: lo que se agregue
+        o compacte mientras tanto no cambia lo que devuelve. En solo lectura,
+        si el escritor borra un segmento de la foto se sigue con una foto
+        nueva, salteando las claves ya entregadas.
+        """
+        entregadas = set() if self.solo_lectura else None
+        for intento in range(REINTENTOS_LECTURA):
+            try:
+                yield from self._ofertas(entregadas)
+                return
+            except FileNotFoundError:
+                if not self._reintentar(intento):
+                    raise
+
+    def _ofertas(self, entregadas):
+        with self._lock:
+            segmentos = list(self.segmentos)
+            filas = {s.numero: len(s) for s in segmentos}
+            indice = dict(self.indice)
+            self._lectores += 1
+        try:
+            for segmento in segmentos:
+                base = segmento.numero << BITS_FILA
+                with open(self._ruta(segmento.nombre, ".ndjson"), "rb") as f:
+                    for fila in range(filas[segmento.numero]):
+                        linea = f.readline()
+                        clave = segmento.claves[fila]
+                        if indice.get(clave) != base + fila:
+                            continue
+                        if entregadas is not None:
+                            if clave in entregadas:
+                                continue
+                            entregadas.add(clave)
+                        yield json.loads(linea)
+        finally:
+            self._soltar_lector()
+
+    def _soltar_lector(self):
+        with self._lock:
+            self._lectores -= 1
+        self._borrar_pendientes()
+
+    # -- Compactación ---------------------------------------------------------
+
+    def filas_obsoletas(self):
+        """Filas confirmadas que ya fueron reemplazadas por una versión nueva"""
+        return sum(len(s) for s in self.segmentos) - len(self.indice)
+
+    def necesita_compactar(self):
+        total = sum(len(s) for s in self.segmentos)
+        return len(self.segmentos) > MAX_SEGMENTOS or (
+            total and self.filas_obsoletas() > MAX_OBSOLETAS * total
+        )
+
+    def compactar(self):
+        """
+        Reescribe los segmentos cerrados en uno solo con la fila vigente de
+        cada clave. Solo toma el prefijo de segmentos que no se están
+        escribiendo, así el orden (el último gana) se mantiene.
+
+        Returns:
+            Filas descartadas, o None si no había nada para compactar (o ya
+            había otra compactación en curso)
+        """
+        if not self._lock_compactacion.acquire(blocking=False):
+            return None
+        try:
+            return self._compactar()
+        finally:
+            self._lock_compactacion.release()
+
+    def _compactar(self):
+        with self._lock:
+            prefijo = []
+            for segmento in self.segmentos:
+                if segmento.numero in self._abiertos:
+                    break
+                prefijo.append(segmento)
+            obsoletas = sum(len(s) for s in prefijo) - sum(
+                1 for s in prefijo for i in range(len(s))
+                if self.indice.get(s.claves[i]) == (s.numero << BITS_FILA) + i
+            )
+            if len(prefijo) < 2 and not obsoletas:
+                return None
+            filas = {s.numero: len(s) for s in prefijo}
+            indice = dict(self.indice)
+            self._lectores += 1
+        nuevo = self._reservar_segmento()
+
+        try:
+            movidas = []
+            claves, offsets, versiones = array("q"), array("q"), array("q")
+            with open(self._ruta(nuevo.nombre, ".ndjson"), "wb") as salida:
+                for segmento in prefijo:
+                    base = segmento.numero << BITS_FILA
+                    with open(self._ruta(segmento.nombre, ".ndjson"), "rb") as f:
+                        for fila in range(filas[segmento.numero]):
+                            linea = f.readline()
+                            clave = segmento.claves[fila]
+                            if indice.get(clave) != base + fila:
+                                continue
+                            movidas.append((clave, base + fila))
+                            claves.append(clave)
+                            offsets.append(salida.tell())
+                            versiones.append(segmento.versiones[fila])
+                            salida.write(linea)
+                salida.flush()
+                os.fsync(salida.fileno())
+                nuevo.bytes = salida.tell()
+            _escribir_idx(self._ruta(nuevo.nombre, ".idx"), claves, offsets, versiones)
+            nuevo.claves, nuevo.offsets, nuevo.versiones = claves, offsets, versiones
+
+            with self._lock:
+                base = nuevo.numero << BITS_FILA
+                for fila, (clave, anterior) in enumerate(movidas):
+                    # Si se reemplazó mientras se compactaba, gana la nueva
+                    if self.indice.get(clave) == anterior:
+                        self.indice[clave] = base + fila
+                compactados = {s.numero for s in prefijo}
+                self.segmentos = [nuevo] + [
+                    s for s in self.segmentos if s.numero not in compactados
+                ]
+                self._guardar_manifiesto()
+                self._por_borrar.extend(s.nombre for s in prefijo)
+        finally:
+            with self._lock:
+                self._abiertos.discard(nuevo.numero)
+            self._soltar_lector()
+
+        return sum(filas.values()) - len(movidas)
+
+    def compactar_en_segundo_plano(self):
+        """Lanza compactar() en un thread si no hay otra en curso"""
+        with self._lock:
+            if self._compactacion is not None and self._compactacion.is_alive():
+                return self._compactacion
+            self._compactacion = threading.Thread(
+                target=self.compactar, name="compactacion-log", daemon=True
+            )
+            self._compactacion.start()
+            return self._compactacion
+
+    def _borrar_pendientes(self):
+        """Borra los segmentos compactados cuando nadie los está leyendo"""
+        with self._lock:
+            if self._lectores or not self._por_borrar:
+                return
+            nombres, self._por_borrar = self._por_borrar, []
+        for nombre in nombres:
+            for extension in (".ndjson", ".idx"):
+                try:
+                    os.remove(self._ruta(nombre, extension))
+                except FileNotFoundError:
+                    pass
+
+    def cerrar(self):
+        """Espera la compactación en curso y borra los segmentos reemplazados"""
+        if self._compactacion is not None:
+            self._compactacion.join()
+        self._borrar_pendientes()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cerrar()
+
+
+class EscritorSegmento:
+    """
+    Escribe lotes de ofertas en un segmento; cada lote se confirma en el
+    manifiesto apenas está en disco.
+    """
+
+    def __init__(self, log, segmento):
+        self.log = log
+        self.segmento = segmento
+        self.escritas = 0
+        self.sin_clave = 0
+        self._datos = open(log._ruta(segmento.nombre, ".ndjson"), "wb")
+        self._idx = open(log._ruta(segmento.nombre, ".idx"), "wb")
+
+    def escribir(self, ofertas):
+        """Agrega las ofertas nuevas o con _version_ mayor y confirma"""
+        claves, offsets, versiones = array("q"), array("q"), array("q")
+        lineas = []
+        vistas = {}
+        posicion = self._datos.tell()
+
+        for oferta in ofertas:
+            clave = clave_oferta(oferta)
+            if clave is None:
+                self.sin_clave += 1
+                continue
+            version = _version(oferta)
+            if clave in vistas:
+                # Repetida dentro del lote: se compara contra la del lote
+                if version and versiones[vistas[clave]] and version <= versiones[vistas[clave]]:
+                    continue
+            elif not self.log.es_mas_nueva(clave, version):
+                continue
+            linea = (json.dumps(oferta, ensure_ascii=False) + "\n").encode("utf-8")
+            vistas[clave] = len(claves)
+            claves.append(clave)
+            offsets.append(posicion)
+            versiones.append(version)
+            lineas.append(linea)
+            posicion += len(linea)
+
+        if not lineas:
+            return 0
+        self._datos.write(b"".join(lineas))
+        self._datos.flush()
+        os.fsync(self._datos.fileno())
+        _escribir_idx(self._idx, claves, offsets, versiones)
+        self.log._confirmar(self.segmento, claves, offsets, versiones, posicion)
+        self.escritas += len(lineas)
+        return len(lineas)
+
+    def cerrar(self):
+        """Cierra el segmento; si quedó vacío se descarta"""
+        self._datos.close()
+        self._idx.close()
+        if not len(self.segmento):
+            for extension in (".ndjson", ".idx"):
+                os.remove(self.log._ruta(self.segmento.nombre, extension))
+        self.log._liberar(self.segmento)
+
+
+class EscritorLog:
+    """
+    Escritor de save_to_json sobre un LogOfertas (formato="segmentos").
+
+    Toda la extracción va a un segmento nuevo. Como las ofertas con la misma
+    _version_ no se vuelven a escribir, reanudar desde un checkpoint no
+    necesita descartar nada: lo repetido se saltea.
+    """
+
+    def __init__(self, filename, metadata=None):
+        self.filename = filename
+        self.total = 0
+        self.metadata = dict(metadata or {})
+        self.log = LogOfertas(filename)
+        self._segmento = self.log.abrir_segmento()
+
+    def escribir_lote(self, ofertas):
+        """Escribe y confirma las ofertas nuevas o modificadas del lote"""
+        self._segmento.escribir(ofertas)
+        self.total += len(ofertas)
+
+    def confirmar(self):
+        """Estado para reanudar (cada lote ya quedó confirmado)"""
+        return {"total": self.total, "metadata": self.metadata}
+
+    @classmethod
+    def reanudar(cls, filename, estado):
+        escritor = cls(filename, estado["metadata"])
+        escritor.total = estado["total"]
+        return escritor
+
+    def abortar(self):
+        """Cierra el segmento; los lotes escritos quedan confirmados"""
+        self._segmento.cerrar()
+        self.log.cerrar()
+
+    def cerrar(self, metadata=None):
+        """Cierra el segmento y guarda la metadata en el manifiesto"""
+        self._segmento.cerrar()
+        self.metadata.update(metadata or {})
+        self.metadata["ofertas_escritas"] = self._segmento.escritas
+        self.metadata["total_ofertas"] = len(self.log)
+        self.log.guardar_metadata(self.metadata)
+        self.log.cerrar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.cerrar()
+        else:
+            self.abortar()
+
+
+def _escribir_idx(destino, claves, offsets, versiones):
+    """Agrega filas (clave, offset, versión) a un .idx (archivo o ruta)"""
+    filas = array("q", bytes(8 * 3 * len(claves)))
+    filas[0::3], filas[1::3], filas[2::3] = claves, offsets, versiones
+    if isinstance(destino, str):
+        with open(destino, "wb") as f:
+            filas.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+    else:
+        filas.tofile(destino)
+        destino.flush()
+        os.fsync(destino.fileno())
+
+
+def _numero(nombre):
+    return int(nombre.rsplit("-", 1)[1])
+
+
+def _version(oferta):
+    """_version_ de Solr como entero (0 si no viene)"""
+    try:
+        return int(oferta.get("_version_") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+if __name__ == "__main__":
+    # Opción 1: Pasar un JSON existente a un log segmentado
+    with open("ofertas_muestra.json", "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    with LogOfertas("ofertas_muestra.segmentos") as log:
+        print(f"Escritas: {log.agregar(data['ofertas']):,} ofertas")
+        log.guardar_metadata({**data["metadata"], "total_ofertas": len(log)})
+        print(f"Vigentes: {len(log):,} | segmentos: {len(log.segmentos)}")
+
+    # Opción 2: Sincronizar cambios en el log (un segmento chico por sync)
+    # from scraper_apd import APDScraper
+    # APDScraper().sync_incremental("ofertas_completas.segmentos")
+
+    # Opción 3: Compactar a mano
+    # with LogOfertas("ofertas_completas.segmentos") as log:
+    #     print(f"Filas descartadas: {log.compactar()}")
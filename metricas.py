@@ -0,0 +1,277 @@
+"""
+Métricas de instrumentación del scraper.
+
+APDScraper registra acá la latencia de cada petición, el tiempo de consulta
+que informa Solr (QTime), los bytes de cada respuesta, el tiempo de
+decodificación y el de escritura a disco, además de reintentos y errores.
+Al final de cada extracción el resumen se exporta como JSON y en el formato
+de texto de Prometheus, para ver si el cuello de botella está en la red, en
+Solr, en la decodificación JSON o en el disco.
+"""
+import json
+import threading
+import time
+
+# Límites superiores de los buckets de cada histograma
+BUCKETS = {
+    "peticion_segundos": (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+    "solr_segundos": (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    "decodificacion_segundos": (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1),
+    "escritura_segundos": (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1),
+    "respuesta_bytes": (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 5e6),
+}
+
+AYUDA = {
+    "peticion_segundos": "Latencia de cada petición HTTP, reintentos incluidos",
+    "solr_segundos": "Tiempo de consulta informado por Solr (QTime)",
+    "decodificacion_segundos": "Tiempo de decodificación de cada página",
+    "escritura_segundos": "Tiempo de escritura a disco de cada página",
+    "respuesta_bytes": "Bytes recibidos por respuesta (comprimidos)",
+    "peticiones": "Peticiones HTTP enviadas",
+    "reintentos": "Peticiones repetidas por error de red, 429 o 5xx",
+    "errores": "Peticiones fallidas",
+    "paginas": "Páginas decodificadas",
+    "docs": "Documentos decodificados",
+}
+
+# Etapas comparadas para señalar el cuello de botella
+ETAPAS = {
+    "red": "tiempo de red (latencia - QTime)",
+    "solr": "Solr (QTime)",
+    "decodificacion": "decodificación",
+    "escritura": "escritura a disco",
+}
+
+
+class Histograma:
+    """Histograma acumulativo al estilo Prometheus (no guarda las muestras)"""
+
+    def __init__(self, limites):
+        self.limites = tuple(limites)
+        self.cuentas = [0] * (len(self.limites) + 1)
+        self.total = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+
+    def observar(self, valor):
+        for i, limite in enumerate(self.limites):
+            if valor <= limite:
+                break
+        else:
+            i = len(self.limites)
+        self.cuentas[i] += 1
+        self.total += 1
+        self.suma += valor
+        self.maximo = max(self.maximo, valor)
+
+    def percentil(self, p):
+        """Estimación por interpolación lineal dentro del bucket"""
+        if not self.total:
+            return 0.0
+        objetivo = p / 100 * self.total
+        acumulado = 0
+        inferior = 0.0
+        for i, cuenta in enumerate(self.cuentas):
+            superior = self.limites[i] if i < len(self.limites) else self.maximo
+            if cuenta and acumulado + cuenta >= objetivo:
+                estimado = inferior + (superior - inferior) * (objetivo - acumulado) / cuenta
+                return min(estimado, self.maximo)
+            acumulado += cuenta
+            inferior = superior
+        return self.maximo
+
+    def resumen(self):
+        return {
+            "cantidad": self.total,
+            "suma": round(self.suma, 6),
+            "media": round(self.suma / self.total, 6) if self.total else 0.0,
+            "p50": round(self.percentil(50), 6),
+            "p95": round(self.percentil(95), 6),
+            "p99": round(self.percentil(99), 6),
+            "max": round(self.maximo, 6),
+        }
+
+
+class MetricasScraper:
+    """
+    Contadores e histogramas de una extracción, seguros entre threads.
+
+    Args:
+        en_vivo: Si se indica, cada cuántos segundos imprimir una línea con el
+            progreso (docs/s, latencia p95, reintentos). None = sin salida.
+    """
+
+    def __init__(self, en_vivo=None):
+        self.en_vivo = en_vivo
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Vuelve a cero todas las métricas (al empezar una extracción)"""
+        with self._lock:
+            self.inicio = time.monotonic()
+            self.histogramas = {nombre: Histograma(b) for nombre, b in BUCKETS.items()}
+            self.contadores = dict.fromkeys(
+                ("peticiones", "reintentos", "errores", "paginas", "docs"), 0
+            )
+            self._ultimo_vivo = self.inicio
+
+    def observar(self, nombre, valor):
+        """Agrega una muestra al histograma nombre"""
+        with self._lock:
+            self.histogramas[nombre].observar(valor)
+
+    def sumar(self, nombre, cantidad=1):
+        """Incrementa el contador nombre"""
+        with self._lock:
+            self.contadores[nombre] += cantidad
+
+    def pagina(self, docs):
+        """Registra una página decodificada y muestra el progreso si corresponde"""
+        with self._lock:
+            self.contadores["paginas"] += 1
+            self.contadores["docs"] += docs
+            ahora = time.monotonic()
+            mostrar = self.en_vivo and ahora - self._ultimo_vivo >= self.en_vivo
+            if mostrar:
+                self._ultimo_vivo = ahora
+                linea = self._linea_vivo(ahora)
+        if mostrar:
+            print(linea)
+
+    def _linea_vivo(self, ahora):
+        segundos = max(ahora - self.inicio, 1e-9)
+        c = self.contadores
+        return (
+            f"[metricas] {c['docs']:,} docs | {c['docs'] / segundos:,.0f} docs/s | "
+            f"p95 {self.histogramas['peticion_segundos'].percentil(95) * 1000:.0f} ms | "
+            f"{c['reintentos']:,} reintentos | {c['errores']:,} errores"
+        )
+
+    def resumen(self, transferencia=None):
+        """
+        Resumen legible por máquina de la extracción.
+
+        Args:
+            transferencia: Dict APDScraper.transferencia, para incluir los bytes
+                en red y descomprimidos
+
+        Returns:
+            Dict con duración, docs/s, contadores, histogramas y el tiempo
+            acumulado por etapa
+        """
+        with self._lock:
+            segundos = time.monotonic() - self.inicio
+            histogramas = {n: h.resumen() for n, h in self.histogramas.items()}
+            contadores = dict(self.contadores)
+
+        etapas = {
+            "red": max(
+                0.0,
+                histogramas["peticion_segundos"]["suma"] - histogramas["solr_segundos"]["suma"],
+            ),
+            "solr": histogramas["solr_segundos"]["suma"],
+            "decodificacion": histogramas["decodificacion_segundos"]["suma"],
+            "escritura": histogramas["escritura_segundos"]["suma"],
+        }
+        total_etapas = sum(etapas.values())
+
+        return {
+            "duracion_seg": round(segundos, 3),
+            "docs_por_seg": round(contadores["docs"] / segundos, 1) if segundos else 0.0,
+            "contadores": contadores,
+            "transferencia": dict(transferencia or {}),
+            "histogramas": histogramas,
+            "etapas_seg": {e: round(s, 3) for e, s in etapas.items()},
+            "etapas_pct": {
+                e: round(100 * s / total_etapas, 1) if total_etapas else 0.0
+                for e, s in etapas.items()
+            },
+            "cuello_de_botella": max(etapas, key=etapas.get) if total_etapas else None,
+        }
+
+    def prometheus(self, transferencia=None, prefijo="apd"):
+        """
+        Exporta las métricas en el formato de texto de Prometheus.
+
+        Args:
+            transferencia: Dict APDScraper.transferencia (bytes_red, ...)
+            prefijo: Prefijo de los nombres de métrica
+
+        Returns:
+            String listo para un textfile collector o un endpoint /metrics
+        """
+        lineas = []
+        with self._lock:
+            for nombre, h in self.histogramas.items():
+                metrica = f"{prefijo}_{nombre}"
+                lineas.append(f"# HELP {metrica} {AYUDA[nombre]}")
+                lineas.append(f"# TYPE {metrica} histogram")
+                acumulado = 0
+                for limite, cuenta in zip(h.limites, h.cuentas):
+                    acumulado += cuenta
+                    lineas.append(f'{metrica}_bucket{{le="{limite:g}"}} {acumulado}')
+                lineas.append(f'{metrica}_bucket{{le="+Inf"}} {h.total}')
+                lineas.append(f"{metrica}_sum {h.suma:.6f}")
+                lineas.append(f"{metrica}_count {h.total}")
+
+            for nombre, valor in self.contadores.items():
+                metrica = f"{prefijo}_{nombre}_total"
+                lineas.append(f"# HELP {metrica} {AYUDA[nombre]}")
+                lineas.append(f"# TYPE {metrica} counter")
+                lineas.append(f"{metrica} {valor}")
+
+            segundos = time.monotonic() - self.inicio
+            docs = self.contadores["docs"]
+
+        for nombre in ("bytes_red", "bytes_contenido"):
+            if transferencia and nombre in transferencia:
+                metrica = f"{prefijo}_{nombre}_total"
+                lineas.append(f"# TYPE {metrica} counter")
+                lineas.append(f"{metrica} {transferencia[nombre]}")
+
+        lineas.append(f"# TYPE {prefijo}_docs_por_segundo gauge")
+        lineas.append(f"{prefijo}_docs_por_segundo {docs / segundos if segundos else 0:.3f}")
+        lineas.append(f"# TYPE {prefijo}_duracion_segundos gauge")
+        lineas.append(f"{prefijo}_duracion_segundos {segundos:.3f}")
+        return "\n".join(lineas) + "\n"
+
+    def exportar(self, base, transferencia=None):
+        """
+        Guarda <base>.metricas.json y <base>.metricas.prom
+
+        Returns:
+            Dict resumen (el mismo que se guarda en el JSON)
+        """
+        resumen = self.resumen(transferencia)
+        with open(f"{base}.metricas.json", "w", encoding="utf-8") as f:
+            json.dump(resumen, f, ensure_ascii=False, indent=2)
+        with open(f"{base}.metricas.prom", "w", encoding="utf-8") as f:
+            f.write(self.prometheus(transferencia))
+        return resumen
+
+    def imprimir(self, transferencia=None):
+        """Imprime el resumen por etapa y devuelve el dict"""
+        r = self.resumen(transferencia)
+        h = r["histogramas"]
+        c = r["contadores"]
+
+        print("\n>> Métricas")
+        print(
+            f"Docs: {c['docs']:,} en {r['duracion_seg']:.1f}s ({r['docs_por_seg']:,.0f} docs/s) | "
+            f"Peticiones: {c['peticiones']:,} | Reintentos: {c['reintentos']:,} | "
+            f"Errores: {c['errores']:,}"
+        )
+        for nombre in ("peticion_segundos", "solr_segundos", "decodificacion_segundos",
+                       "escritura_segundos"):
+            if h[nombre]["cantidad"]:
+                print(
+                    f"{nombre:24} p50 {h[nombre]['p50'] * 1000:8.1f} ms | "
+                    f"p95 {h[nombre]['p95'] * 1000:8.1f} ms | "
+                    f"max {h[nombre]['max'] * 1000:8.1f} ms"
+                )
+        for etapa, pct in r["etapas_pct"].items():
+            print(f"  {ETAPAS[etapa]:34} {r['etapas_seg'][etapa]:9.2f}s ({pct:.0f}%)")
+        if r["cuello_de_botella"]:
+            print(f"Cuello de botella: {ETAPAS[r['cuello_de_botella']]}")
+        return r
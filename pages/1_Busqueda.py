@@ -3,7 +3,14 @@ Página de búsqueda de ofertas de cargos docentes
 """
 import streamlit as st
 import pandas as pd
-from utils.data_loader import load_ofertas, filtrar_ofertas, format_oferta_detalle
+from utils.data_loader import (
+    COLUMNAS_DASHBOARD,
+    consultar_ofertas,
+    es_base_sqlite,
+    filtrar_ofertas,
+    format_oferta_detalle,
+    load_ofertas,
+)
 
 st.set_page_config(page_title="Búsqueda de Ofertas", page_icon="🔎", layout="wide")
 
@@ -12,7 +19,12 @@ st.markdown("Encuentra ofertas de cargos docentes con filtros avanzados")
 
 # Cargar datos
 archivo_ofertas = st.session_state.get('archivo_ofertas', 'ofertas_muestra.json')
-df, metadata = load_ofertas(archivo_ofertas)
+
+# Con una base SQLite solo se cargan las columnas de los filtros; las ofertas
+# filtradas se piden después con una consulta indexada
+usar_sql = es_base_sqlite(archivo_ofertas)
+columnas_filtros = ('descnivelmodalidad', 'descdistrito', 'areaincumbencia', 'estado', 'finoferta')
+df, metadata = load_ofertas(archivo_ofertas, columnas_filtros if usar_sql else COLUMNAS_DASHBOARD)
 
 if df.empty:
     st.error("No se pudieron cargar las ofertas. Verifica que el archivo exista.")
@@ -76,8 +88,7 @@ if usar_filtro_fecha and 'finoferta' in df.columns:
         )
 
 # Aplicar filtros
-df_filtrado = filtrar_ofertas(
-    df,
+filtros = dict(
     modalidad=filtro_modalidad,
     distrito=filtro_distrito,
     areaincumbencia=filtro_area,
@@ -86,6 +97,10 @@ df_filtrado = filtrar_ofertas(
     fecha_inicio=filtro_fecha_inicio,
     fecha_fin=filtro_fecha_fin
 )
+if usar_sql:
+    df_filtrado = consultar_ofertas(archivo_ofertas, **filtros)
+else:
+    df_filtrado = filtrar_ofertas(df, **filtros)
 
 # Mostrar resultados
 col1, col2, col3 = st.columns(3)
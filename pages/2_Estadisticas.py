@@ -5,7 +5,7 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from utils.data_loader import load_ofertas
+from utils.data_loader import load_ofertas, sin_categorias_vacias
 
 st.set_page_config(page_title="Estadísticas", page_icon="📊", layout="wide")
 
@@ -298,6 +298,7 @@ if modalidad_seleccionada != 'Todas':
     df_custom = df_custom[df_custom['descnivelmodalidad'] == modalidad_seleccionada]
 if distrito_seleccionado != 'Todos':
     df_custom = df_custom[df_custom['descdistrito'] == distrito_seleccionado]
+df_custom = sin_categorias_vacias(df_custom)
 
 if not df_custom.empty:
     col1, col2, col3 = st.columns(3)
@@ -0,0 +1,128 @@
+"""
+Piezas para armar extracciones en etapas concurrentes.
+
+Cada etapa corre en su propio thread y se conecta con la siguiente por una
+cola acotada: si una etapa se atrasa (disco lento, decodificación lenta), la
+anterior se bloquea al encolar en lugar de acumular páginas en memoria.
+Cada etapa mide su tiempo ocupado, el tiempo esperando entrada y el tiempo
+bloqueada por la etapa siguiente, así se ve cuál limita el ritmo.
+"""
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+# Marca de fin de la corriente de páginas
+FIN = object()
+
+
+class Detenida(Exception):
+    """La extracción se canceló mientras la etapa esperaba en una cola"""
+
+
+class Etapa:
+    """Contadores de tiempo de una etapa"""
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.items = 0
+        self.ocupado = 0.0
+        self.esperando = 0.0
+        self.bloqueado = 0.0
+
+    @contextmanager
+    def trabajando(self):
+        """Mide como tiempo ocupado lo que corre dentro del with"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.ocupado += time.perf_counter() - inicio
+
+    def resumen(self, segundos):
+        return {
+            "etapa": self.nombre,
+            "items": self.items,
+            "ocupado_seg": round(self.ocupado, 3),
+            "esperando_seg": round(self.esperando, 3),
+            "bloqueado_seg": round(self.bloqueado, 3),
+            "utilizacion": round(self.ocupado / segundos, 3) if segundos else 0.0,
+        }
+
+
+def poner(cola, item, etapa, detener):
+    """Encola item; el tiempo bloqueado cuenta como contrapresión de la etapa"""
+    inicio = time.perf_counter()
+    try:
+        while True:
+            if detener.is_set():
+                raise Detenida()
+            try:
+                cola.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+    finally:
+        etapa.bloqueado += time.perf_counter() - inicio
+
+
+def tomar(cola, etapa, detener):
+    """Desencola el próximo item; el tiempo esperando cuenta como falta de trabajo"""
+    inicio = time.perf_counter()
+    try:
+        while True:
+            if detener.is_set():
+                raise Detenida()
+            try:
+                return cola.get(timeout=0.1)
+            except queue.Empty:
+                continue
+    finally:
+        etapa.esperando += time.perf_counter() - inicio
+
+
+def iniciar_etapa(funcion, etapa, salida, detener):
+    """
+    Corre funcion en un thread. Al terminar encola FIN; si falla, encola la
+    excepción para que la etapa siguiente la propague.
+    """
+
+    def correr():
+        try:
+            funcion()
+        except Detenida:
+            return
+        except Exception as e:
+            try:
+                poner(salida, e, etapa, detener)
+            except Detenida:
+                pass
+            return
+        try:
+            poner(salida, FIN, etapa, detener)
+        except Detenida:
+            pass
+
+    thread = threading.Thread(target=correr, name=f"etapa-{etapa.nombre}", daemon=True)
+    thread.start()
+    return thread
+
+
+def reporte_etapas(etapas, segundos):
+    """
+    Imprime la utilización de cada etapa.
+
+    Returns:
+        Lista de dicts de Etapa.resumen
+    """
+    filas = [e.resumen(segundos) for e in etapas]
+    print("\n>> Etapas del pipeline")
+    for f in filas:
+        print(
+            f"{f['etapa']:15} {f['utilizacion'] * 100:5.1f}% ocupada | "
+            f"esperando {f['esperando_seg']:7.2f}s | bloqueada {f['bloqueado_seg']:7.2f}s | "
+            f"{f['items']:,} páginas"
+        )
+    limitante = max(filas, key=lambda f: f["utilizacion"])
+    print(f"Etapa limitante: {limitante['etapa']}")
+    return filas
@@ -1,102 +1,353 @@
 import requests
 import json
+import os
 import time
 from datetime import datetime
-import urllib3
-import ssl
-from requests.adapters import HTTPAdapter
 import re
+import io
+import threading
+import queue
+import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
 from config import API_ENDPOINT
+from consulta_solr import igual, rango
+from cliente_http import MAX_CONEXIONES, crear_sesion, get_sesion
+from control_tasa import ControladorAIMD
+from dedup import Deduplicador, clave_oferta
+from metricas import MetricasScraper
+from pipeline import FIN, Detenida, Etapa, iniciar_etapa, poner, reporte_etapas, tomar
+from archivo_ofertas import ArchivoOfertas
+from escritores import crear_escritor, formato_archivo, reanudar_escritor, ruta_metadata
+from lector_json import LectorJSON, LectorNDJSON
+from log_ofertas import LogOfertas, es_log
 
-# Deshabilitar advertencias de SSL
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+# Formatos que sync_incremental sabe leer y reescribir
+FORMATOS_SYNC = ("json", "ndjson", "jsonz", "segmentos")
 
+# Orden de la paginación por offset (start/rows)
+ORDEN_OFFSET = "finoferta desc"
+# cursorMark exige que el sort termine en la clave única (id) como desempate
+ORDEN_CURSOR = "finoferta desc, id asc"
 
-class TLSAdapter(HTTPAdapter):
-    """Adapter que fuerza TLS 1.0/1.1/1.2 para servidores con SSL antiguo"""
+# Perfiles de campos (parámetro fl de Solr). None = todos los campos (~47)
+PERFILES_CAMPOS = {
+    # Identificación, fechas de control y campos de filtro
+    "minimal": [
+        "id", "iddetalle", "idoferta", "_version_", "timestamp", "ult_movimiento",
+        "estado", "finoferta", "numdistrito", "descdistrito", "areaincumbencia",
+        "descnivelmodalidad", "cargo",
+    ],
+    # Lo que usan las páginas de Streamlit y utils.data_loader
+    "dashboard": [
+        "id", "iddetalle", "idoferta", "_version_", "timestamp", "ult_movimiento",
+        "estado", "tipooferta", "cargo", "descripcionarea", "descnivelmodalidad",
+        "numdistrito", "descdistrito", "escuela", "domiciliodesempeno",
+        "areaincumbencia", "turno", "jornada", "hsmodulos", "ige",
+        "iniciooferta", "finoferta", "tomaposesion", "supl_desde", "supl_hasta",
+        "observaciones",
+    ],
+    "full": None,
+}
 
-    def init_poolmanager(self, *args, **kwargs):
-        ctx = ssl.create_default_context()
-        ctx.check_hostname = False
-        ctx.verify_mode = ssl.CERT_NONE
-        ctx.set_ciphers("DEFAULT@SECLEVEL=1")
-        # Permitir TLS 1.0 y superiores
-        ctx.minimum_version = ssl.TLSVersion.TLSv1
-        kwargs["ssl_context"] = ctx
-        return super().init_poolmanager(*args, **kwargs)
+# Tipos de las columnas numéricas y booleanas en el modo CSV. El resto se
+# lee como texto, así todas las páginas tienen el mismo esquema.
+TIPOS_CSV = {
+    "iddetalle": "Int64",
+    "idoferta": "Int64",
+    "ige": "Int64",
+    "cupof": "Int64",
+    "numdistrito": "Int64",
+    "hsmodulos": "Int64",
+    "tipooferta_id": "Int64",
+    "idsuna": "Int64",
+    "postulacion_idganador": "Int64",
+    "_version_": "Int64",
+    "infectocontagiosa": "boolean",
+}
+
+# Campos con conteos exactos en get_facetas / get_estadisticas
+CAMPOS_FACETA = (
+    "estado",
+    "descdistrito",
+    "descnivelmodalidad",
+    "areaincumbencia",
+    "tipooferta",
+)
 
 
 class APDScraper:
     """Scraper para Actos Públicos Digitales de ABC Buenos Aires"""
 
-    def __init__(self):
-        self.base_url = API_ENDPOINT
-        self.session = requests.Session()
-        self.session.mount("https://", TLSAdapter())
-        self.session.headers.update(
-            {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                "Accept": "application/json",
-                "Referer": "http://servicios.abc.gob.ar/",
-            }
-        )
+    def __init__(
+        self,
+        max_conexiones=None,
+        controlador=None,
+        perfil_campos="full",
+        base_url=None,
+        metricas_en_vivo=None,
+        casete=None,
+        modo_casete="reproducir",
+        velocidad_casete=None,
+    ):
+        """
+        Args:
+            max_conexiones: Si se indica, usa una sesión propia con ese tamaño de
+                pool en lugar de la sesión compartida (ver cliente_http.py).
+                Debe ser mayor o igual a la concurrencia usada en get_all_ofertas.
+            controlador: Controlador de ritmo y reintentos (ver control_tasa.py).
+                Por defecto ControladorAIMD; ControladorFijo(0.5) reproduce la
+                pausa fija original.
+            perfil_campos: Campos a descargar: "minimal", "dashboard", "full"
+                (ver PERFILES_CAMPOS) o una lista de campos
+            base_url: Endpoint a usar en lugar de config.API_ENDPOINT
+                (p.ej. un servidor Solr local)
+            metricas_en_vivo: Cada cuántos segundos imprimir una línea de
+                métricas durante la extracción (None = solo al final)
+            casete: Archivo JSONL donde grabar las respuestas o desde el cual
+                reproducirlas sin red (ver cliente_http.usar_casete)
+            modo_casete: "grabar" o "reproducir"
+            velocidad_casete: Al reproducir, multiplicador sobre los tiempos
+                grabados (1 = real, None = sin esperas)
+        """
+        self.base_url = base_url or API_ENDPOINT
+        if isinstance(perfil_campos, str):
+            if perfil_campos not in PERFILES_CAMPOS:
+                raise ValueError(f"Perfil de campos desconocido: {perfil_campos}")
+            self.campos = PERFILES_CAMPOS[perfil_campos]
+        else:
+            self.campos = list(perfil_campos)
+        self.controlador = controlador or ControladorAIMD()
+        if max_conexiones or casete:
+            self.session = crear_sesion(
+                max_conexiones or MAX_CONEXIONES, casete, modo_casete, velocidad_casete
+            )
+        else:
+            self.session = get_sesion()
+        # Bytes recibidos (comprimidos) vs. bytes de contenido y docs decodificados
+        self.transferencia = {
+            "peticiones": 0,
+            "bytes_red": 0,
+            "bytes_contenido": 0,
+            "docs": 0,
+        }
+        self._lock_transferencia = threading.Lock()
+        # Latencias, tamaños, decodificación, escritura y reintentos (ver metricas.py)
+        self.metricas = MetricasScraper(en_vivo=metricas_en_vivo)
+        # (modo, profundidad, segundos) de cada página pedida
+        self.latencias_pagina = []
+        # True si la última extracción recorrió la query hasta el final
+        self.extraccion_completa = False
+        # Cursor de la próxima página en el modo cursor
+        self.cursor_mark = None
+        # numFound de la última respuesta
+        self.num_found = None
+        # Duplicados descartados en la última extracción (ver dedup.py)
+        self.deduplicador = None
+        # Utilización de cada etapa de la última extracción con pipeline
+        self.reporte_pipeline = None
 
-    def get_ofertas(self, start=0, rows=100, filtros=None):
+    def get_ofertas(self, start=0, rows=100, filtros=None, cursor_mark=None):
         """
         Obtiene ofertas de la API
 
         Args:
-            start: Índice de inicio (paginación)
+            start: Índice de inicio (paginación). Con cursor_mark no se envía a
+                Solr y solo indica la profundidad para el reporte de latencias.
             rows: Cantidad de resultados por página
-            filtros: Dict con filtros adicionales
+            filtros: Dict con filtros adicionales. La clave "fq" admite una
+                lista de filtros Solr crudos que se envían como parámetros fq
+                separados (p.ej. rangos de fechas).
+            cursor_mark: Cursor de Solr ("*" para la primera página). Si se
+                indica, pagina con cursorMark en lugar de start.
 
         Returns:
             Dict con la respuesta JSON
         """
+        params = self._params_json(start, rows, filtros, cursor_mark)
+        response = self._pedir(params)
+        if response is None:
+            return None
+        return self._procesar_json(response, "offset" if cursor_mark is None else "cursor", start)
+
+    def _procesar_json(self, response, modo, start):
+        """Decodifica una página wt=json y registra latencia, docs y métricas"""
+        self.latencias_pagina.append((modo, start, response.elapsed.total_seconds()))
+
+        inicio = time.perf_counter()
+        data = _decodificar(response)
+        self.metricas.observar("decodificacion_segundos", time.perf_counter() - inicio)
+
+        if data and "response" in data:
+            self.num_found = data["response"].get("numFound")
+            docs = len(data["response"].get("docs", []))
+            with self._lock_transferencia:
+                self.transferencia["docs"] += docs
+            qtime = data.get("responseHeader", {}).get("QTime")
+            if qtime is not None:
+                self.metricas.observar("solr_segundos", qtime / 1000)
+            self.metricas.pagina(docs)
+        return data
+
+    def _params_json(self, start, rows, filtros, cursor_mark=None):
+        """Parámetros de una página wt=json (ver get_ofertas)"""
         params = {
             "q": "*:*",  # Query básica: todos los registros
             "rows": rows,
-            "start": start,
             "wt": "json",
             "json.nl": "map",
-            "sort": "finoferta desc",  # Ordenar por fecha de cierre
         }
 
+        if cursor_mark is None:
+            params["start"] = start
+            params["sort"] = ORDEN_OFFSET  # Ordenar por fecha de cierre
+        else:
+            params["cursorMark"] = cursor_mark
+            params["sort"] = ORDEN_CURSOR
+
+        if self.campos:
+            params["fl"] = ",".join(self.campos)
+
         # Agregar filtros si existen
-        if filtros:
-            fq_filters = []
-            if "distrito" in filtros:
-                fq_filters.append(f'descdistrito:"{filtros["distrito"]}"')
-            if "estado" in filtros:
-                fq_filters.append(f'estado:"{filtros["estado"]}"')
-            if "cargo" in filtros:
-                fq_filters.append(f'cargo:"{filtros["cargo"]}"')
-            if "areaincumbencia" in filtros:
-                fq_filters.append(f'areaincumbencia:"{filtros["areaincumbencia"]}"')
-            if 'idoferta' in filtros:
-                fq_filters.append(f'idoferta:"{filtros["idoferta"]}"')
-
-            # Unir todos los filtros con AND
-            if fq_filters:
-                params["fq"] = " AND ".join(fq_filters)
+        fq_params = _filtros_a_fq(filtros)
+        if fq_params:
+            params["fq"] = fq_params
 
-        try:
-            response = self.session.get(
-                self.base_url, params=params, timeout=30, verify=False
-            )
-            response.raise_for_status()
+        return params
 
-            # El servidor envía los datos en ISO-8859-1 (Latin-1)
-            response.encoding = 'ISO-8859-1'
+    def _params_csv(self, start, rows, filtros, campos):
+        """Parámetros de una página wt=csv (ver get_ofertas_csv)"""
+        params = {
+            "q": "*:*",
+            "rows": rows,
+            "start": start,
+            "wt": "csv",
+            "fl": ",".join(campos),
+            "sort": ORDEN_OFFSET,
+        }
+        fq_params = _filtros_a_fq(filtros)
+        if fq_params:
+            params["fq"] = fq_params
+        return params
+
+    def _pedir(self, params):
+        """
+        Hace la petición a la API respetando el controlador de ritmo.
 
-            data = response.json()
-            return data
+        Los errores de red, 429 y 5xx se reintentan con backoff exponencial con
+        jitter hasta controlador.max_reintentos veces; otros errores HTTP no.
 
-        except requests.exceptions.RequestException as e:
-            print(f"Error en la petición: {e}")
-            return None
+        Returns:
+            requests.Response exitosa, o None si se agotaron los reintentos
+        """
+        for intento in range(self.controlador.max_reintentos + 1):
+            retry_after = None
+            self.controlador.adquirir()
+            inicio = time.perf_counter()
+
+            self.metricas.sumar("peticiones")
+
+            response = None
+            fallida = True
+            try:
+                response = self.session.get(self.base_url, params=params, timeout=30)
+                fallida = response.status_code == 429 or response.status_code >= 500
+            except requests.exceptions.RequestException as e:
+                self.metricas.sumar("errores")
+                error = e
+            finally:
+                # Cada adquirir() se libera una sola vez, también si session.get
+                # lanza algo que no es RequestException (un adaptador montado
+                # en la sesión, por ejemplo): si no, el lugar en vuelo del
+                # controlador queda ocupado y la concurrencia se traba
+                latencia = time.perf_counter() - inicio
+                self.controlador.liberar(latencia, error=fallida)
+                self.metricas.observar("peticion_segundos", latencia)
+
+            if response is not None:
+                if fallida:
+                    self.metricas.sumar("errores")
+                    error = f"HTTP {response.status_code}"
+                    retry_after = _segundos_retry_after(response)
+                else:
+                    try:
+                        response.raise_for_status()
+                    except requests.exceptions.HTTPError as e:
+                        self.metricas.sumar("errores")
+                        print(f"Error en la petición: {e}")
+                        return None
+                    self._registrar_transferencia(response)
+                    return response
+
+            if intento == self.controlador.max_reintentos:
+                break
+            self.metricas.sumar("reintentos")
+            espera = self.controlador.espera_reintento(intento, retry_after)
+            print(f"Error en la petición ({error}), reintento {intento + 1} en {espera:.1f}s")
+            time.sleep(espera)
+
+        print(f"Error en la petición: {error}")
+        return None
+
+    def _registrar_transferencia(self, response):
+        """Suma los bytes de la respuesta: en el cable (gzip) y descomprimidos"""
+        contenido = len(response.content)
+        # tell() cuenta los bytes leídos del socket, antes de descomprimir
+        en_red = response.raw.tell() if response.raw is not None else 0
+        with self._lock_transferencia:
+            self.transferencia["peticiones"] += 1
+            self.transferencia["bytes_red"] += en_red or contenido
+            self.transferencia["bytes_contenido"] += contenido
+        self.metricas.observar("respuesta_bytes", en_red or contenido)
+
+    def reporte_transferencia(self):
+        """
+        Resume el costo de transferencia para comparar perfiles de campos.
+
+        Returns:
+            Dict con los totales y los bytes por documento
+        """
+        t = dict(self.transferencia)
+        docs = max(t["docs"], 1)
+        t["bytes_red_por_doc"] = round(t["bytes_red"] / docs, 1)
+        t["bytes_contenido_por_doc"] = round(t["bytes_contenido"] / docs, 1)
+        t["compresion"] = round(t["bytes_contenido"] / max(t["bytes_red"], 1), 2)
+
+        print("\n>> Transferencia")
+        print(f"Peticiones: {t['peticiones']:,} | Docs: {t['docs']:,}")
+        print(
+            f"En red: {t['bytes_red'] / 1e6:,.2f} MB "
+            f"({t['bytes_red_por_doc']:,.0f} B/doc) | "
+            f"Descomprimido: {t['bytes_contenido'] / 1e6:,.2f} MB "
+            f"({t['bytes_contenido_por_doc']:,.0f} B/doc) | "
+            f"Compresión: {t['compresion']}x"
+        )
+        return t
+
+    def exportar_metricas(self, filename):
+        """
+        Imprime las métricas de la última extracción y las guarda en
+        <filename>.metricas.json y <filename>.metricas.prom (Prometheus).
 
-    def get_all_ofertas(self, batch_size=100, max_ofertas=None, filtros=None):
+        Returns:
+            Dict con el resumen de métricas
+        """
+        self.metricas.imprimir(self.transferencia)
+        resumen = self.metricas.exportar(filename, self.transferencia)
+        print(f"Métricas guardadas: {filename}.metricas.json / .metricas.prom")
+        return resumen
+
+    def get_all_ofertas(
+        self,
+        batch_size=100,
+        max_ofertas=None,
+        filtros=None,
+        concurrencia=1,
+        ordenado=True,
+        cursor=False,
+        dedup=True,
+    ):
         """
         Obtiene todas las ofertas disponibles
 
@@ -104,13 +355,108 @@ class APDScraper:
             batch_size: Cantidad de registros por petición
             max_ofertas: Límite máximo de ofertas a extraer (None = todas)
             filtros: Dict con filtros adicionales
+            concurrencia: Cantidad máxima de páginas pedidas en paralelo
+                (1 = modo secuencial original)
+            ordenado: Con concurrencia > 1, entrega las páginas en el orden de
+                la query. Si es False, entrega cada página apenas llega.
+            cursor: Paginar con cursorMark en lugar de start/rows. El costo por
+                página se mantiene constante en toda la profundidad del índice
+                y las filas no se desplazan entre páginas durante el recorrido.
+                Es intrínsecamente secuencial.
+            dedup: Descartar las ofertas repetidas por iddetalle (las que se
+                corren de página durante una extracción con start/rows). Al
+                terminar se informan duplicados y faltantes estimadas.
 
         Yields:
             Dict con cada oferta
         """
+        paginas = self._paginas(
+            batch_size, max_ofertas, filtros, concurrencia, ordenado, cursor, dedup
+        )
+        ofertas_extraidas = 0
+
+        try:
+            for docs in paginas:
+                for doc in docs:
+                    yield doc
+                    ofertas_extraidas += 1
+
+                    # Verificar límite máximo
+                    if max_ofertas and ofertas_extraidas >= max_ofertas:
+                        print(f"Alcanzado límite de {max_ofertas} ofertas")
+                        return
+        finally:
+            paginas.close()
+
+        if dedup:
+            self.reporte_duplicados()
+
+    def _paginas(
+        self, batch_size, max_ofertas, filtros, concurrencia, ordenado, cursor, dedup=True
+    ):
+        """Elige el recorrido de páginas según el modo pedido"""
+        if cursor and concurrencia > 1:
+            raise ValueError("El modo cursor no admite concurrencia > 1")
+
+        self.extraccion_completa = False
+
+        if cursor:
+            paginas = self._paginas_cursor(batch_size, filtros)
+        elif concurrencia > 1:
+            paginas = self._paginas_concurrentes(
+                batch_size, max_ofertas, filtros, concurrencia, ordenado
+            )
+        else:
+            paginas = self._paginas_secuenciales(batch_size, filtros)
+
+        return self._sin_duplicados(paginas) if dedup else paginas
+
+    def _sin_duplicados(self, paginas):
+        """
+        Quita de cada página las ofertas ya entregadas (ver dedup.py).
+        Entrega también las páginas que quedan vacías, así quien consume
+        sigue viendo una página por petición (p.ej. para el checkpoint).
+        """
+        self.deduplicador = Deduplicador()
+        try:
+            for docs in paginas:
+                self.deduplicador.registrar_total(self.num_found)
+                yield self.deduplicador.filtrar(docs)
+        finally:
+            paginas.close()
+
+    def reporte_duplicados(self, limite=None):
+        """
+        Informa duplicados descartados y faltantes estimadas de la última
+        extracción con dedup.
+
+        Args:
+            limite: max_ofertas usado en la extracción, si hubo
+
+        Returns:
+            Dict de Deduplicador.reporte, o None si no hubo deduplicación
+        """
+        if self.deduplicador is None:
+            return None
+
+        r = self.deduplicador.reporte(self.extraccion_completa, limite)
+        faltantes = r["faltantes_estimadas"]
+        print(
+            f"Duplicados descartados: {r['duplicados']:,} | "
+            f"Faltantes estimadas: {'s/d' if faltantes is None else f'{faltantes:,}'} | "
+            f"Únicas: {r['unicas']:,} | Memoria dedup: {r['memoria_bytes'] / 1024:,.0f} KB"
+        )
+        return r
+
+    def _paginas_secuenciales(self, batch_size, filtros):
+        """
+        Recorre la query página por página con start/rows.
+
+        Yields:
+            Lista de docs de cada página
+        """
         start = 0
         total_found = None
-        ofertas_extraidas = 0
 
         while True:
             print(f"Extrayendo ofertas desde {start}...")
@@ -132,83 +478,1128 @@ class APDScraper:
 
             if not docs:
                 print("No hay más ofertas")
+                self.extraccion_completa = True
                 break
 
-            for doc in docs:
-                yield doc
-                ofertas_extraidas += 1
-
-                # Verificar límite máximo
-                if max_ofertas and ofertas_extraidas >= max_ofertas:
-                    print(f"Alcanzado límite de {max_ofertas} ofertas")
-                    return
+            yield docs
 
             start += batch_size
 
             # Verificar si ya extrajimos todo
             if start >= total_found:
                 print("Todas las ofertas extraídas")
+                self.extraccion_completa = True
+                break
+
+    def _paginas_cursor(self, batch_size, filtros, cursor_mark="*", vistos=0):
+        """
+        Recorre la query con cursorMark hasta que el cursor deja de avanzar.
+
+        Antes de entregar cada página deja en self.cursor_mark el cursor de la
+        página siguiente, para poder guardarlo en un checkpoint.
+
+        Args:
+            cursor_mark: Cursor desde el cual continuar ("*" = desde el inicio)
+            vistos: Ofertas ya recorridas antes de cursor_mark
+
+        Yields:
+            Lista de docs de cada página
+        """
+        total_found = None
+
+        while True:
+            print(f"Extrayendo ofertas desde {vistos} (cursor)...")
+
+            data = self.get_ofertas(
+                start=vistos, rows=batch_size, filtros=filtros, cursor_mark=cursor_mark
+            )
+
+            if not data or "response" not in data:
+                print("No se pudo obtener datos o fin de resultados")
+                break
+
+            response = data["response"]
+
+            if total_found is None:
+                total_found = response["numFound"]
+                print(f"Total de ofertas encontradas: {total_found:,}")
+
+            docs = response.get("docs", [])
+
+            if not docs:
+                print("No hay más ofertas")
+                self.extraccion_completa = True
+                break
+
+            siguiente = data.get("nextCursorMark")
+            self.cursor_mark = siguiente
+            yield docs
+            vistos += len(docs)
+
+            # Solr devuelve el mismo cursor cuando no quedan resultados
+            if not siguiente or siguiente == cursor_mark:
+                print("Todas las ofertas extraídas")
+                self.extraccion_completa = True
                 break
+            cursor_mark = siguiente
+
+    def _paginas_concurrentes(
+        self, batch_size, max_ofertas, filtros, concurrencia, ordenado
+    ):
+        """
+        Pide las páginas en paralelo con un pool acotado de workers.
+
+        La primera página se pide sola para conocer numFound; con eso los
+        offsets restantes quedan definidos de antemano. Nunca hay más de
+        2 * concurrencia peticiones encoladas, así la memoria no crece con el
+        total de páginas.
+
+        Yields:
+            Lista de docs de cada página
+        """
+        data = self.get_ofertas(start=0, rows=batch_size, filtros=filtros)
+
+        if not data or "response" not in data:
+            print("No se pudo obtener datos o fin de resultados")
+            return
+
+        total_found = data["response"]["numFound"]
+        print(f"Total de ofertas encontradas: {total_found:,}")
+
+        docs = data["response"].get("docs", [])
+        if not docs:
+            print("No hay más ofertas")
+            self.extraccion_completa = True
+            return
+        yield docs
+
+        limite = min(total_found, max_ofertas) if max_ofertas else total_found
+        offsets = iter(range(batch_size, limite, batch_size))
+
+        executor = ThreadPoolExecutor(max_workers=concurrencia)
+        # futuro -> start, en orden de envío
+        pendientes = OrderedDict()
+
+        def enviar(start):
+            futuro = executor.submit(self.get_ofertas, start, batch_size, filtros)
+            pendientes[futuro] = start
+
+        try:
+            for start in islice(offsets, concurrencia * 2):
+                enviar(start)
+
+            while pendientes:
+                if ordenado:
+                    futuro = next(iter(pendientes))
+                else:
+                    listos, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+                    futuro = next(iter(listos))
+                start = pendientes.pop(futuro)
+
+                data = futuro.result()
+                if not data or "response" not in data:
+                    print(f"No se pudo obtener la página desde {start}, se detiene la extracción")
+                    return
+
+                siguiente = next(offsets, None)
+                if siguiente is not None:
+                    enviar(siguiente)
+
+                print(f"Extraídas ofertas desde {start}...")
+                yield data["response"].get("docs", [])
+
+            print("Todas las ofertas extraídas")
+            self.extraccion_completa = True
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _paginas_pipeline(
+        self,
+        batch_size,
+        max_ofertas,
+        filtros,
+        cursor,
+        cursor_mark="*",
+        vistos=0,
+        dedup=True,
+        profundidad_cola=4,
+    ):
+        """
+        Recorre la query en tres etapas concurrentes unidas por colas acotadas:
+        descarga (thread) -> decodificación y dedup (thread) -> quien consume
+        el generador (p.ej. la escritura de save_to_json).
+
+        La descarga no espera a que se decodifique la página anterior: numFound
+        y nextCursorMark se leen directo de los bytes de la respuesta. Si una
+        etapa se atrasa, las colas se llenan y la anterior se frena.
+
+        Args:
+            cursor: Paginar con cursorMark (si no, start/rows)
+            cursor_mark, vistos: Punto de partida en modo cursor (ver _paginas_cursor)
+            dedup: Descartar repetidas en la etapa de decodificación
+            profundidad_cola: Páginas que puede haber en cada cola
+
+        Yields:
+            Lista de docs de cada página. Antes de entregarla deja en
+            self.cursor_mark el cursor de la página siguiente.
+        """
+        self.extraccion_completa = False
+        self.deduplicador = Deduplicador() if dedup else None
+        modo = "cursor" if cursor else "offset"
+
+        descarga = Etapa("descarga")
+        decodificacion = Etapa("decodificacion")
+        consumo = Etapa("escritura")
+        crudas = queue.Queue(profundidad_cola)
+        decodificadas = queue.Queue(profundidad_cola)
+        detener = threading.Event()
+        estado = {"completo": False}
+
+        def descargar():
+            start = vistos
+            actual = cursor_mark if cursor else None
+            limite = None
+            while True:
+                params = self._params_json(start, batch_size, filtros, actual)
+                with descarga.trabajando():
+                    response = self._pedir(params)
+                if response is None:
+                    print("No se pudo obtener datos o fin de resultados")
+                    return
+
+                siguiente = _cursor_siguiente(response.content) if cursor else None
+                if limite is None:
+                    total = _num_found(response.content)
+                    if total is None:
+                        print("Respuesta sin numFound, se detiene la extracción")
+                        return
+                    limite = min(total, max_ofertas) if max_ofertas else total
+
+                descarga.items += 1
+                poner(crudas, (start, siguiente, response), descarga, detener)
+
+                if cursor:
+                    # Solr devuelve el mismo cursor cuando no quedan resultados
+                    if not siguiente or siguiente == actual:
+                        break
+                    actual = siguiente
+                    start += batch_size
+                else:
+                    start += batch_size
+                    if start >= limite:
+                        break
+            estado["completo"] = True
+
+        def decodificar():
+            while True:
+                item = tomar(crudas, decodificacion, detener)
+                if item is FIN or isinstance(item, Exception):
+                    if item is FIN and not estado["completo"]:
+                        item = None
+                    poner(decodificadas, item, decodificacion, detener)
+                    return
 
-            # Pausa para no saturar el servidor
-            time.sleep(0.5)
+                start, siguiente, response = item
+                with decodificacion.trabajando():
+                    data = self._procesar_json(response, modo, start)
+                    if not data or "response" not in data:
+                        print(f"Respuesta inválida desde {start}, se detiene la extracción")
+                        poner(decodificadas, None, decodificacion, detener)
+                        return
+                    docs = data["response"].get("docs", [])
+                    if self.deduplicador is not None:
+                        self.deduplicador.registrar_total(self.num_found)
+                        docs = self.deduplicador.filtrar(docs)
+                decodificacion.items += 1
+                poner(decodificadas, (start, siguiente, docs), decodificacion, detener)
 
-    def save_to_json(self, filename, filtros=None, max_ofertas=None):
+        inicio = time.perf_counter()
+        hilos = [
+            iniciar_etapa(descargar, descarga, crudas, detener),
+            iniciar_etapa(decodificar, decodificacion, decodificadas, detener),
+        ]
+
+        try:
+            while True:
+                item = tomar(decodificadas, consumo, detener)
+                if item is FIN:
+                    print("Todas las ofertas extraídas")
+                    self.extraccion_completa = True
+                    break
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+
+                start, siguiente, docs = item
+                print(f"Extraídas ofertas desde {start} (pipeline)...")
+                self.cursor_mark = siguiente
+                pausa = time.perf_counter()
+                yield docs
+                consumo.ocupado += time.perf_counter() - pausa
+                consumo.items += 1
+        except Detenida:
+            pass
+        finally:
+            detener.set()
+            for hilo in hilos:
+                hilo.join()
+            self.reporte_pipeline = reporte_etapas(
+                [descarga, decodificacion, consumo], time.perf_counter() - inicio
+            )
+
+    def get_ofertas_csv(self, start=0, rows=1000, filtros=None, campos=None):
+        """
+        Obtiene una página de ofertas con wt=csv y la parsea en un solo paso
+        vectorizado, sin pasar por un dict de Python por documento.
+
+        Args:
+            start: Índice de inicio (paginación)
+            rows: Cantidad de resultados por página
+            filtros: Dict con filtros adicionales (ver get_ofertas)
+            campos: Lista fija de columnas. Por defecto el perfil del scraper,
+                o el perfil "dashboard" si el scraper pide todos los campos.
+
+        Returns:
+            DataFrame con una fila por oferta, o None si falló
+        """
+        campos = campos or self.campos or PERFILES_CAMPOS["dashboard"]
+        response = self._pedir(self._params_csv(start, rows, filtros, campos))
+        if response is None:
+            return None
+
+        self.latencias_pagina.append(("offset", start, response.elapsed.total_seconds()))
+
+        # El servidor envía los datos en ISO-8859-1 (Latin-1)
+        inicio = time.perf_counter()
+        df = _leer_csv(response.content, campos)
+        self.metricas.observar("decodificacion_segundos", time.perf_counter() - inicio)
+        with self._lock_transferencia:
+            self.transferencia["docs"] += len(df)
+        self.metricas.pagina(len(df))
+        return df
+
+    def get_all_ofertas_csv(self, batch_size=1000, max_ofertas=None, filtros=None, campos=None):
+        """
+        Recorre la query en modo CSV, página por página.
+
+        wt=csv no incluye numFound ni nextCursorMark, así que el total se pide
+        antes con rows=0 y la paginación es por start/rows.
+
+        Args:
+            batch_size: Cantidad de registros por petición
+            max_ofertas: Límite máximo de ofertas a extraer (None = todas)
+            filtros: Dict con filtros adicionales (ver get_ofertas)
+            campos: Lista fija de columnas (ver get_ofertas_csv)
+
+        Yields:
+            DataFrame con cada página
+        """
+        self.extraccion_completa = False
+
+        data = self.get_ofertas(start=0, rows=0, filtros=filtros)
+        if not data or "response" not in data:
+            print("No se pudo obtener datos o fin de resultados")
+            return
+
+        total_found = data["response"]["numFound"]
+        print(f"Total de ofertas encontradas: {total_found:,}")
+        limite = min(total_found, max_ofertas) if max_ofertas else total_found
+
+        for start in range(0, limite, batch_size):
+            print(f"Extrayendo ofertas desde {start} (csv)...")
+
+            df = self.get_ofertas_csv(
+                start=start, rows=min(batch_size, limite - start), filtros=filtros, campos=campos
+            )
+            if df is None:
+                print("No se pudo obtener datos o fin de resultados")
+                return
+            if df.empty:
+                break
+
+            yield df
+
+        print("Todas las ofertas extraídas")
+        self.extraccion_completa = True
+
+    def save_columnar(self, filename, filtros=None, max_ofertas=None, batch_size=1000, campos=None):
+        """
+        Extrae en modo CSV y escribe cada página directo a disco en formato
+        columnar, sin armar dicts por oferta.
+
+        Args:
+            filename: Archivo de salida (.parquet o .csv)
+            filtros: Dict con filtros adicionales
+            max_ofertas: Límite máximo de ofertas
+            batch_size: Cantidad de registros por petición
+            campos: Lista fija de columnas (ver get_ofertas_csv)
+
+        Returns:
+            True si la extracción terminó
+        """
+        print("Iniciando extracción columnar de ofertas...")
+        start_time = time.time()
+        self.metricas.reiniciar()
+
+        es_parquet = filename.endswith(".parquet")
+        if es_parquet:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError("Para escribir Parquet instala: pip install pyarrow")
+
+        escritor = None
+        total = 0
+
+        try:
+            for df in self.get_all_ofertas_csv(batch_size, max_ofertas, filtros, campos):
+                inicio = time.perf_counter()
+                if es_parquet:
+                    tabla = pa.Table.from_pandas(df, preserve_index=False)
+                    if escritor is None:
+                        escritor = pq.ParquetWriter(filename, tabla.schema)
+                    escritor.write_table(tabla)
+                else:
+                    df.to_csv(
+                        filename,
+                        mode="a" if total else "w",
+                        header=not total,
+                        index=False,
+                        encoding="utf-8",
+                    )
+                self.metricas.observar("escritura_segundos", time.perf_counter() - inicio)
+                total += len(df)
+        finally:
+            if escritor is not None:
+                escritor.close()
+
+        elapsed = time.time() - start_time
+        print("\n>> Extraccion completada!" if self.extraccion_completa else "\n>> Extracción incompleta")
+        print(f"Total ofertas: {total:,}")
+        print(f"Tiempo: {elapsed:.2f} segundos")
+        print(f"Archivo guardado: {filename}")
+        self.exportar_metricas(filename)
+        return self.extraccion_completa
+
+    def benchmark_json_vs_csv(self, paginas=5, rows=1000, filtros=None, campos=None):
+        """
+        Compara docs/seg del camino JSON (dicts por oferta + DataFrame) contra
+        el camino CSV (parseo vectorizado), pidiendo las mismas páginas y los
+        mismos campos.
+
+        Returns:
+            Dict {modo: {"docs", "segundos", "docs_por_seg", "decodificacion_seg"}}
+        """
+        campos = campos or self.campos or PERFILES_CAMPOS["dashboard"]
+        campos_originales = self.campos
+        resultados = {}
+
+        try:
+            self.campos = campos
+
+            for modo in ("json", "csv"):
+                docs = 0
+                decodificacion = 0.0
+                inicio = time.perf_counter()
+
+                for pagina in range(paginas):
+                    start = pagina * rows
+                    if modo == "json":
+                        params = self._params_json(start, rows, filtros)
+                    else:
+                        params = self._params_csv(start, rows, filtros, campos)
+
+                    response = self._pedir(params)
+                    if response is None:
+                        break
+
+                    t = time.perf_counter()
+                    if modo == "json":
+                        data = _decodificar(response)
+                        df = pd.DataFrame(data["response"]["docs"], columns=campos)
+                    else:
+                        df = _leer_csv(response.content, campos)
+                    decodificacion += time.perf_counter() - t
+
+                    if df.empty:
+                        break
+                    docs += len(df)
+
+                segundos = time.perf_counter() - inicio
+                resultados[modo] = {
+                    "docs": docs,
+                    "segundos": round(segundos, 3),
+                    "docs_por_seg": round(docs / segundos, 1) if segundos else 0,
+                    "decodificacion_seg": round(decodificacion, 3),
+                }
+        finally:
+            self.campos = campos_originales
+
+        print("\n>> Benchmark JSON vs CSV")
+        for modo, r in resultados.items():
+            print(
+                f"{modo:5} {r['docs']:>8,} docs en {r['segundos']:7.2f}s -> "
+                f"{r['docs_por_seg']:>10,.0f} docs/s (decodificación {r['decodificacion_seg']:.3f}s)"
+            )
+        return resultados
+
+    def reporte_latencias(self, tramos=10):
+        """
+        Resume la latencia por página según la profundidad alcanzada.
+
+        Divide la profundidad máxima de cada modo (offset / cursor) en tramos
+        iguales y calcula la latencia media y máxima de cada uno. Con offset
+        la latencia crece con la profundidad; con cursor debería ser plana.
+
+        Args:
+            tramos: Cantidad de tramos de profundidad por modo
+
+        Returns:
+            Lista de dicts con modo, tramo, páginas y latencias en ms
+        """
+        filas = []
+
+        for modo in ("offset", "cursor"):
+            muestras = [(p, seg) for m, p, seg in self.latencias_pagina if m == modo]
+            if not muestras:
+                continue
+
+            profundidad_max = max(p for p, _ in muestras) + 1
+            ancho = max(1, -(-profundidad_max // tramos))
+            grupos = {}
+            for profundidad, segundos in muestras:
+                grupos.setdefault(profundidad // ancho, []).append(segundos)
+
+            print(f"\n>> Latencia por profundidad ({modo})")
+            for tramo in sorted(grupos):
+                valores = grupos[tramo]
+                fila = {
+                    "modo": modo,
+                    "desde": tramo * ancho,
+                    "hasta": (tramo + 1) * ancho - 1,
+                    "paginas": len(valores),
+                    "media_ms": round(sum(valores) / len(valores) * 1000, 1),
+                    "max_ms": round(max(valores) * 1000, 1),
+                }
+                filas.append(fila)
+                print(
+                    f"{fila['desde']:>9,} - {fila['hasta']:>9,}: "
+                    f"{fila['media_ms']:8.1f} ms (max {fila['max_ms']:.1f} ms, "
+                    f"{fila['paginas']} páginas)"
+                )
+
+        return filas
+
+    def save_to_json(
+        self,
+        filename,
+        filtros=None,
+        max_ofertas=None,
+        concurrencia=1,
+        cursor=False,
+        formato=None,
+        batch_size=100,
+        checkpoint=False,
+        dedup=True,
+        pipeline=False,
+    ):
         """
         Guarda todas las ofertas en un archivo JSON
 
+        Cada página se escribe en disco apenas llega (ver escritores.py), así
+        la memoria se mantiene constante sin importar la cantidad de ofertas.
+
+        Con checkpoint=True la extracción es reanudable: pagina con cursorMark
+        y después de escribir cada página guarda en <filename>.checkpoint.json
+        el cursor siguiente, la posición confirmada del archivo y los
+        parámetros de la query. Si la extracción se corta, volver a ejecutar
+        con los mismos argumentos descarta lo escrito después de la última
+        página confirmada y continúa desde ese cursor, sin duplicar ofertas.
+
         Args:
             filename: Nombre del archivo de salida
             filtros: Dict con filtros adicionales
             max_ofertas: Límite máximo de ofertas
-        """
-        ofertas = []
+            concurrencia: Páginas pedidas en paralelo (ver get_all_ofertas)
+            cursor: Paginar con cursorMark (ver get_all_ofertas)
+            formato: "json" ({metadata, ofertas}), "ndjson" (una oferta por
+                línea + <filename>.meta.json), "parquet" (carpeta particionada
+                por mes de cierre y distrito, ver dataset_ofertas.py),
+                "sqlite" (upsert por iddetalle en una base indexada, ver
+                base_ofertas.py), "segmentos" (log de solo agregado, ver
+                log_ofertas.py) o "jsonz" (archivo comprimido con zstd, ver
+                archivo_ofertas.py). None = según la extensión.
+            batch_size: Cantidad de registros por petición y por escritura
+            checkpoint: Guardar checkpoints y reanudar si existe uno compatible
+            dedup: Descartar ofertas repetidas por iddetalle (ver
+                get_all_ofertas). El resultado queda en metadata["dedup"].
+            pipeline: Descargar, decodificar y escribir en etapas concurrentes
+                con colas acotadas (ver _paginas_pipeline). Superpone la espera
+                de red con la decodificación y la escritura; al final informa
+                la utilización de cada etapa. No admite concurrencia > 1.
 
+        Returns:
+            True si la extracción terminó y el archivo quedó cerrado
+        """
         print("Iniciando extracción de ofertas...")
         start_time = time.time()
+        self.metricas.reiniciar()
 
-        for i, oferta in enumerate(
-            self.get_all_ofertas(max_ofertas=max_ofertas, filtros=filtros), 1
-        ):
-            ofertas.append(oferta)
-
-            if i % 1000 == 0:
-                print(f"Extraídas {i:,} ofertas...")
-
-        # Guardar en archivo
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(
-                {
-                    "metadata": {
-                        "total_ofertas": len(ofertas),
-                        "fecha_extraccion": datetime.now().isoformat(),
-                        "filtros": filtros,
-                    },
-                    "ofertas": ofertas,
-                },
-                f,
-                ensure_ascii=False,
-                indent=2,
-            )
+        if checkpoint:
+            if concurrencia > 1:
+                raise ValueError("El modo checkpoint no admite concurrencia > 1")
+            cursor = True
+        if pipeline and concurrencia > 1:
+            raise ValueError("El modo pipeline no admite concurrencia > 1")
+
+        parametros = {
+            "filtros": filtros,
+            "max_ofertas": max_ofertas,
+            "batch_size": batch_size,
+            "formato": formato,
+        }
+        archivo_checkpoint = f"{filename}.checkpoint.json"
+        previo = None
+        if checkpoint and os.path.exists(filename):
+            previo = _leer_checkpoint(archivo_checkpoint)
+
+        if previo and previo["parametros"] == parametros:
+            escritor = reanudar_escritor(filename, previo["escritor"], formato)
+            if pipeline:
+                paginas = self._paginas_pipeline(
+                    batch_size, max_ofertas, filtros, True,
+                    previo["cursor_mark"], previo["vistos"], dedup,
+                )
+            else:
+                paginas = self._paginas_cursor(
+                    batch_size, filtros, previo["cursor_mark"], previo["vistos"]
+                )
+                if dedup:
+                    paginas = self._sin_duplicados(paginas)
+            self.extraccion_completa = False
+            vistos = previo["vistos"]
+            print(f"Reanudando desde el checkpoint: {escritor.total:,} ofertas ya guardadas")
+        else:
+            if previo:
+                print("El checkpoint existente es de otros parámetros, se descarta")
+            metadata = {
+                "fecha_extraccion": datetime.now().isoformat(),
+                "filtros": filtros,
+            }
+            escritor = crear_escritor(filename, metadata, formato)
+            if pipeline:
+                paginas = self._paginas_pipeline(
+                    batch_size, max_ofertas, filtros, cursor, dedup=dedup
+                )
+            else:
+                paginas = self._paginas(
+                    batch_size, max_ofertas, filtros, concurrencia, True, cursor, dedup
+                )
+            vistos = 0
+
+        alcanzado_limite = False
+
+        try:
+            for docs in paginas:
+                if max_ofertas and escritor.total + len(docs) >= max_ofertas:
+                    docs = docs[: max_ofertas - escritor.total]
+                    alcanzado_limite = True
+
+                inicio = time.perf_counter()
+                escritor.escribir_lote(docs)
+                vistos += len(docs)
+
+                if checkpoint:
+                    # None: el escritor todavía no bajó a disco estas ofertas
+                    estado_escritor = escritor.confirmar()
+                    if estado_escritor is not None:
+                        _guardar_checkpoint(
+                            archivo_checkpoint,
+                            {
+                                "parametros": parametros,
+                                "cursor_mark": self.cursor_mark,
+                                "vistos": vistos,
+                                "escritor": estado_escritor,
+                            },
+                        )
+                self.metricas.observar("escritura_segundos", time.perf_counter() - inicio)
+
+                if escritor.total // 1000 > (escritor.total - len(docs)) // 1000:
+                    print(f"Extraídas {escritor.total:,} ofertas...")
+
+                if alcanzado_limite:
+                    print(f"Alcanzado límite de {max_ofertas} ofertas")
+                    break
+        finally:
+            paginas.close()
+
+        if not (self.extraccion_completa or alcanzado_limite):
+            escritor.abortar()
+            print("\n>> La extracción se interrumpió antes de terminar")
+            if checkpoint:
+                print("Volvé a ejecutar con los mismos argumentos para reanudar")
+            self.exportar_metricas(filename)
+            return False
+
+        reporte_dedup = self.reporte_duplicados(max_ofertas) if dedup else None
+        escritor.cerrar({"dedup": reporte_dedup} if reporte_dedup else None)
+        if checkpoint and os.path.exists(archivo_checkpoint):
+            os.remove(archivo_checkpoint)
 
         elapsed = time.time() - start_time
         print("\n>> Extraccion completada!")
-        print(f"Total ofertas: {len(ofertas):,}")
+        print(f"Total ofertas: {escritor.total:,}")
         print(f"Tiempo: {elapsed:.2f} segundos")
         print(f"Archivo guardado: {filename}")
+        print(f"Control de tasa: {self.controlador.resumen()}")
+        self.reporte_transferencia()
+        self.reporte_latencias()
+        self.exportar_metricas(filename)
+        return True
+
+    def sync_incremental(self, filename, campo_marca="timestamp", batch_size=100):
+        """
+        Actualiza un archivo de ofertas pidiendo solo lo modificado desde la
+        última sincronización.
+
+        La marca de agua (high-water mark) se guarda en metadata["sync"]. Si el
+        archivo no la tiene, se toma el máximo de campo_marca entre las ofertas
+        ya guardadas; si el archivo no existe se hace una extracción completa.
+        Los cambios se fusionan por clave_oferta (iddetalle, ver dedup.py): las
+        ofertas modificadas reemplazan a la versión anterior y las nuevas se
+        agregan al final. La marca solo avanza si la extracción terminó sin
+        errores. Las ofertas borradas del índice no se detectan.
+
+        Un JSON, NDJSON o archivo .jsonz se reescribe completo en su mismo
+        formato. Si filename es un log segmentado (.segmentos, ver
+        log_ofertas.py) los cambios se agregan como un segmento nuevo en lugar
+        de reescribir todo el archivo: el costo es proporcional a lo
+        modificado. Los datasets Parquet y las bases SQLite no se admiten.
+
+        Args:
+            filename: Archivo de ofertas a actualizar (.json, .ndjson/.jsonl,
+                .jsonz o log .segmentos; ver FORMATOS_SYNC)
+            campo_marca: Campo de fecha usado como marca ("timestamp" o
+                "ult_movimiento")
+            batch_size: Cantidad de registros por petición
+
+        Returns:
+            Cantidad de ofertas nuevas o modificadas, o None si falló
+        """
+        formato = formato_archivo(filename)
+        if formato not in FORMATOS_SYNC:
+            raise ValueError(
+                f"sync_incremental no admite el formato {formato} ({filename}); "
+                f"formatos admitidos: {', '.join(FORMATOS_SYNC)}"
+            )
+
+        metadata = {}
+        ofertas = []
+        log = None
+
+        if es_log(filename):
+            log = LogOfertas(filename)
+            metadata = dict(log.metadata)
+            # Sin marca guardada hay que recorrer el log para calcularla
+            ofertas = () if metadata.get("sync") else log.ofertas()
+        elif os.path.exists(filename):
+            if formato == "ndjson":
+                lector = LectorNDJSON(filename)
+            elif formato == "jsonz":
+                lector = ArchivoOfertas(filename)
+            else:
+                lector = LectorJSON(filename)
+            ofertas = list(lector)
+            metadata = lector.metadata
+
+        filtros = dict(metadata.get("filtros") or {})
+        marca = metadata.get("sync", {}).get("marca_agua")
+        if marca is None:
+            marca = _max_fecha(o.get(campo_marca) for o in ofertas)
+
+        if marca:
+            # Rango inclusivo: los docs con la misma marca se re-descargan y
+            # la fusión por id los deja sin duplicar
+            filtros["fq"] = filtros.get("fq", []) + [rango(campo_marca, marca)]
+            print(f"Sincronizando cambios desde {campo_marca} >= {marca}")
+        else:
+            print("Sin marca de agua previa: extracción completa")
+
+        start_time = time.time()
+        cambios = list(
+            self.get_all_ofertas(batch_size=batch_size, filtros=filtros or None, cursor=True)
+        )
+
+        if not self.extraccion_completa:
+            if log is not None:
+                log.cerrar()
+            print("La sincronización no terminó; se conserva el archivo y la marca anterior")
+            return None
+
+        # Los cambios sin clave no se pueden fusionar: se descartan, como en
+        # LogOfertas
+        claves = [clave_oferta(o) for o in cambios]
+        if log is None:
+            por_id = {}
+            for posicion, oferta in enumerate(ofertas):
+                # Las del archivo sin clave se conservan tal cual
+                clave = clave_oferta(oferta)
+                por_id[(None, posicion) if clave is None else clave] = oferta
+            nuevas = sum(1 for c in claves if c is not None and c not in por_id)
+            for clave, oferta in zip(claves, cambios):
+                if clave is not None:
+                    por_id[clave] = oferta
+        else:
+            nuevas = sum(1 for c in claves if c is not None and c not in log)
+
+        marca_nueva = _max_fecha([marca] + [o.get(campo_marca) for o in cambios])
+
+        metadata.update(
+            {
+                "fecha_extraccion": datetime.now().isoformat(),
+                "filtros": metadata.get("filtros"),
+                "sync": {
+                    "campo": campo_marca,
+                    "marca_agua": marca_nueva,
+                    "ultimo_sync": datetime.now().isoformat(),
+                    "cambios": len(cambios),
+                },
+            }
+        )
+        if log is None:
+            # Se escribe aparte y se reemplaza al final para no perder el
+            # archivo anterior si la escritura se corta
+            temporal = f"{filename}.tmp"
+            with crear_escritor(temporal, metadata, formato=formato) as escritor:
+                escritor.escribir_lote(por_id.values())
+            os.replace(temporal, filename)
+            if formato == "ndjson":
+                # Después de los datos: si se corta en el medio queda la marca
+                # anterior y la próxima sincronización repite los cambios
+                os.replace(ruta_metadata(temporal), ruta_metadata(filename))
+            total = len(por_id)
+        else:
+            # Solo lo nuevo o con _version_ mayor, en un segmento propio
+            escritas = log.agregar(cambios)
+            total = len(log)
+            metadata["total_ofertas"] = total
+            log.guardar_metadata(metadata)
+            log.cerrar()
+            print(f"Segmento agregado: {escritas:,} ofertas escritas")
+
+        elapsed = time.time() - start_time
+        print("\n>> Sincronización completada!")
+        print(f"Modificadas: {len(cambios) - nuevas:,} | Nuevas: {nuevas:,}")
+        print(f"Total ofertas: {total:,}")
+        print(f"Marca de agua: {marca_nueva}")
+        print(f"Tiempo: {elapsed:.2f} segundos")
+
+        return len(cambios)
+
+    def get_facetas(self, campos=CAMPOS_FACETA, filtros=None, limite=-1):
+        """
+        Cuenta ofertas por valor de cada campo con facet.field, sin descargar
+        documentos (rows=0). Los conteos son exactos sobre todo el índice.
+
+        Args:
+            campos: Campos a facetar
+            filtros: Dict con filtros adicionales (ver get_ofertas)
+            limite: Máximo de valores por campo (-1 = todos)
+
+        Returns:
+            Dict {"total": numFound, "facetas": {campo: {valor: cantidad}}}
+            con los valores ordenados de mayor a menor, o None si falló
+        """
+        data = self._consultar_facetas(
+            {
+                "facet.field": list(campos),
+                "facet.limit": limite,
+                "facet.mincount": 1,
+            },
+            filtros,
+        )
+        if data is None:
+            return None
+
+        return {
+            "total": data["response"]["numFound"],
+            "facetas": data["facet_counts"]["facet_fields"],
+        }
+
+    def get_facetas_rango(self, campo, desde, hasta, gap, filtros=None):
+        """
+        Cuenta ofertas por rangos de un campo de fecha o numérico con
+        facet.range (p.ej. finoferta por mes).
+
+        Args:
+            campo: Campo a facetar (p.ej. "finoferta")
+            desde: Inicio del primer rango (p.ej. "2020-01-01T00:00:00Z")
+            hasta: Fin del último rango (p.ej. "NOW/MONTH+1MONTH")
+            gap: Ancho de cada rango (p.ej. "+1MONTH")
+            filtros: Dict con filtros adicionales (ver get_ofertas)
+
+        Returns:
+            Dict con "total", "rangos" ({inicio_rango: cantidad}, en orden),
+            "antes", "despues" (fuera de [desde, hasta)) y "fin" (fin efectivo
+            del último rango), o None si falló
+        """
+        data = self._consultar_facetas(
+            {
+                "facet.range": campo,
+                "facet.range.start": desde,
+                "facet.range.end": hasta,
+                "facet.range.gap": gap,
+                "facet.range.other": "all",
+                "facet.mincount": 0,
+            },
+            filtros,
+        )
+        if data is None:
+            return None
+
+        rango = data["facet_counts"]["facet_ranges"][campo]
+        return {
+            "total": data["response"]["numFound"],
+            "rangos": rango["counts"],
+            "antes": rango.get("before", 0),
+            "despues": rango.get("after", 0),
+            "fin": rango.get("end"),
+        }
+
+    def get_pivot(self, campos, filtros=None, campo_stats=None):
+        """
+        Conteos cruzados con facet.pivot (p.ej. distrito -> estado).
+
+        Args:
+            campos: Lista de campos del pivot, del más externo al más interno
+            filtros: Dict con filtros adicionales (ver get_ofertas)
+            campo_stats: Campo numérico cuyas estadísticas (sum, min, max,
+                mean...) se calculan en cada nodo del pivot con el stats
+                component
+
+        Returns:
+            Lista de nodos {"valor", "cantidad", "stats", "pivot"}, o None si
+            falló. "stats" solo está si se pidió campo_stats.
+        """
+        pivot = ",".join(campos)
+        extra = {"facet.pivot": pivot, "facet.pivot.mincount": 1, "facet.limit": -1}
+        if campo_stats:
+            extra["facet.pivot"] = "{!stats=st}" + pivot
+            extra["stats"] = "true"
+            extra["stats.field"] = "{!tag=st}" + campo_stats
+
+        data = self._consultar_facetas(extra, filtros)
+        if data is None:
+            return None
+
+        return [
+            _nodo_pivot(nodo, campo_stats)
+            for nodo in data["facet_counts"]["facet_pivot"].get(pivot, [])
+        ]
+
+    def get_estadisticas(self, filtros=None):
+        """
+        Estadísticas exactas de todo el índice en una sola petición: conteos
+        por estado, distrito, nivel/modalidad, área de incumbencia y tipo de
+        oferta, y suma de horas/módulos por distrito.
+
+        Args:
+            filtros: Dict con filtros adicionales (ver get_ofertas)
+
+        Returns:
+            Dict con "total", "facetas", "hsmodulos" (stats globales) y
+            "hsmodulos_por_distrito" ({distrito: suma}), o None si falló
+        """
+        data = self._consultar_facetas(
+            {
+                "facet.field": list(CAMPOS_FACETA),
+                "facet.limit": -1,
+                "facet.mincount": 1,
+                "facet.pivot": "{!stats=st}descdistrito",
+                "stats": "true",
+                "stats.field": "{!tag=st}hsmodulos",
+            },
+            filtros,
+        )
+        if data is None:
+            return None
+
+        facetas = data["facet_counts"]
+        distritos = facetas["facet_pivot"].get("descdistrito", [])
+
+        return {
+            "total": data["response"]["numFound"],
+            "facetas": facetas["facet_fields"],
+            "hsmodulos": data["stats"]["stats_fields"]["hsmodulos"],
+            "hsmodulos_por_distrito": {
+                nodo["value"]: _stats_nodo(nodo, "hsmodulos").get("sum", 0)
+                for nodo in distritos
+            },
+        }
+
+    def _consultar_facetas(self, extra, filtros=None):
+        """Petición rows=0 con facet=true más los parámetros extra"""
+        params = {
+            "q": "*:*",
+            "rows": 0,
+            "wt": "json",
+            "json.nl": "map",
+            "facet": "true",
+            **extra,
+        }
+        fq_params = _filtros_a_fq(filtros)
+        if fq_params:
+            params["fq"] = fq_params
+
+        response = self._pedir(params)
+        if response is None:
+            return None
+        return _decodificar(response)
 
     def get_filtros_disponibles(self):
         """
-        Obtiene valores únicos para usar como filtros
+        Obtiene valores únicos para usar como filtros, con la cantidad de
+        ofertas de cada uno (facetas sobre todo el índice)
         """
-        # Obtener una muestra para ver qué filtros están disponibles
-        data = self.get_ofertas(start=0, rows=0)
+        resultado = self.get_facetas()
+
+        if resultado:
+            print(f"Total de ofertas en la base: {resultado['total']:,}")
+
+            for campo, valores in resultado["facetas"].items():
+                print(f"\n>> {campo} ({len(valores)} valores)")
+                for valor, cantidad in list(valores.items())[:10]:
+                    print(f"   {valor:40} {cantidad:>9,}")
+
+        return resultado
+
+
+def _filtros_a_fq(filtros):
+    """
+    Convierte el dict de filtros en la lista de parámetros fq.
+
+    Los filtros por campo se unen con AND en un solo fq; los de la clave "fq"
+    (expresiones crudas o armadas con consulta_solr) van como parámetros fq
+    separados. Una ConsultaSolr ya es un dict {"fq": [...]}.
+    """
+    if not filtros:
+        return []
+
+    fq_filters = []
+    if "distrito" in filtros:
+        fq_filters.append(igual("descdistrito", filtros["distrito"]))
+    if "estado" in filtros:
+        fq_filters.append(igual("estado", filtros["estado"]))
+    if "cargo" in filtros:
+        fq_filters.append(igual("cargo", filtros["cargo"]))
+    if "areaincumbencia" in filtros:
+        fq_filters.append(igual("areaincumbencia", filtros["areaincumbencia"]))
+    if 'idoferta' in filtros:
+        fq_filters.append(igual("idoferta", str(filtros["idoferta"])))
+
+    # Unir todos los filtros con AND
+    fq_params = [" AND ".join(fq_filters)] if fq_filters else []
+    fq_params.extend(filtros.get("fq", []))
+    return fq_params
 
-        if data and "response" in data:
-            print(f"Total de ofertas en la base: {data['response']['numFound']:,}")
 
-            # Puedes agregar facets para obtener valores únicos
-            # Esto requeriría modificar la query
+def _decodificar(response):
+    """Decodifica el JSON de una respuesta, o None si es inválido"""
+    # El servidor envía los datos en ISO-8859-1 (Latin-1)
+    response.encoding = 'ISO-8859-1'
+
+    try:
+        return response.json()
+    except ValueError as e:
+        print(f"Respuesta inválida: {e}")
+        return None
+
+
+def _num_found(contenido):
+    """numFound leído de los bytes de la respuesta, sin decodificar el JSON"""
+    m = re.search(rb'"numFound":\s*(\d+)', contenido)
+    return int(m.group(1)) if m else None
+
+
+def _cursor_siguiente(contenido):
+    """nextCursorMark leído del final de la respuesta, sin decodificar el JSON"""
+    posicion = contenido.rfind(b'"nextCursorMark"')
+    if posicion == -1:
+        return None
+    m = re.match(rb'"nextCursorMark":\s*"([^"]*)"', contenido[posicion:])
+    return m.group(1).decode("latin-1") if m else None
+
+
+def _leer_csv(contenido, campos):
+    """Parsea una respuesta wt=csv (Latin-1) con tipos fijos por columna"""
+    return pd.read_csv(
+        io.BytesIO(contenido),
+        encoding="latin-1",
+        dtype={c: TIPOS_CSV.get(c, "string") for c in campos},
+        keep_default_na=False,
+        na_values={c: [""] for c in campos if c in TIPOS_CSV},
+    )
+
+
+def _stats_nodo(nodo, campo):
+    """Estadísticas de un campo en un nodo de facet.pivot"""
+    return nodo.get("stats", {}).get("stats_fields", {}).get(campo) or {}
+
+
+def _nodo_pivot(nodo, campo_stats):
+    """Convierte un nodo de facet.pivot de Solr en un dict más simple"""
+    resultado = {"valor": nodo["value"], "cantidad": nodo["count"]}
+    if campo_stats:
+        resultado["stats"] = _stats_nodo(nodo, campo_stats)
+    resultado["pivot"] = [_nodo_pivot(hijo, campo_stats) for hijo in nodo.get("pivot", [])]
+    return resultado
+
+
+def _leer_checkpoint(archivo):
+    """Lee un checkpoint de extracción, o None si no existe"""
+    if not os.path.exists(archivo):
+        return None
+    with open(archivo, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _guardar_checkpoint(archivo, estado):
+    """Reemplaza el checkpoint de forma atómica (nunca queda a medio escribir)"""
+    temporal = f"{archivo}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(estado, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, archivo)
+
+
+def _segundos_retry_after(response):
+    """Segundos pedidos en el header Retry-After, o None"""
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _max_fecha(fechas):
+    """
+    Devuelve la fecha ISO (formato Solr) más reciente, o None si no hay.
+    Compara como datetime porque los milisegundos son opcionales.
+    """
+    maxima = None
+    maxima_dt = None
+    for fecha in fechas:
+        if not fecha:
+            continue
+        try:
+            fecha_dt = datetime.fromisoformat(fecha.replace("Z", "+00:00"))
+        except ValueError:
+            continue
+        if maxima_dt is None or fecha_dt > maxima_dt:
+            maxima, maxima_dt = fecha, fecha_dt
+    return maxima
 
 
 # Ejemplo de uso
@@ -216,7 +1607,8 @@ if __name__ == "__main__":
     scraper = APDScraper()
 
     # Opción 1: Extraer TODAS las ofertas (puede ser ~721,000 según tu respuesta)
-    scraper.save_to_json('ofertas_completas.json')
+    # Con checkpoint, si se corta basta con volver a ejecutar para reanudar
+    scraper.save_to_json('ofertas_completas.json', checkpoint=True)
 
     # Opción 2: Extraer solo las primeras 1000 ofertas (para pruebas)
     #
@@ -228,6 +1620,15 @@ if __name__ == "__main__":
     #     max_ofertas=5000
     # )
 
+    # Opción 4: Extracción concurrente (8 páginas en paralelo)
+    # scraper.save_to_json('ofertas_completas.json', concurrencia=8)
+
+    # Opción 5: Paginación con cursorMark (costo por página constante)
+    # scraper.save_to_json('ofertas_completas.json', cursor=True)
+
+    # Opción 6: Refresco incremental (solo lo modificado desde el último sync)
+    # scraper.sync_incremental('ofertas_completas.json')
+
     print("\n>> Datos disponibles en cada oferta:")
     print("- Estado, tipo de oferta, cargo")
     print("- Distrito, escuela, IGE")
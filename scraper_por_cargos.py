@@ -4,6 +4,8 @@ Script para extraer ofertas filtradas por cargos específicos
 
 from scraper_apd import APDScraper
 from cargos import CargoRepository
+from consulta_solr import alguno, rango
+from dedup import clave_oferta
 import json
 from config import API_ENDPOINT
 
@@ -12,25 +14,75 @@ def extraer_ofertas_por_cargos(
     archivo_cargos="cargos_ejemplo.json",
     archivo_salida="ofertas_por_cargos.json",
     max_por_cargo=150,
+    cargos=None,
+    bulk=True,
+    max_caracteres_fq=1500,
 ):
     """
     Extrae ofertas para cada cargo en el archivo de cargos.
 
+    En modo bulk se agrupan muchos códigos en un solo filtro
+    areaincumbencia:("A" OR "B" OR ...), partido en lotes para no superar el
+    largo de URL, y las ofertas se reparten por cargo del lado del cliente.
+    Así se hace una extracción por lote en lugar de una por cargo.
+
     Args:
         archivo_cargos: Ruta al JSON con los cargos
         archivo_salida: Donde guardar las ofertas
         max_por_cargo: Máximo de ofertas por cargo (None = todas)
+        cargos: Lista de Cargo a usar en lugar de archivo_cargos
+        bulk: Agrupar los cargos en filtros OR (False = una extracción por cargo)
+        max_caracteres_fq: Largo máximo de cada filtro OR en modo bulk
     """
 
     # Cargar cargos
-    print("Cargando cargos...")
-    repo = CargoRepository.load_from_file(archivo_cargos)
-    cargos = list(repo.cargos)
+    if cargos is None:
+        print("Cargando cargos...")
+        repo = CargoRepository.load_from_file(archivo_cargos)
+        cargos = list(repo.cargos)
     print(f"Total de cargos: {len(cargos)}")
 
     # Crear scraper
     scraper = APDScraper()
 
+    if bulk:
+        ofertas_por_cargo = _extraer_bulk(scraper, cargos, max_por_cargo, max_caracteres_fq)
+    else:
+        ofertas_por_cargo = _extraer_por_cargo(scraper, cargos, max_por_cargo)
+
+    # Guardar resultados
+    print(f"\n\nGuardando resultados en {archivo_salida}...")
+
+    # Aplanar la estructura: convertir a lista plana
+    todas_ofertas = []
+    for info in ofertas_por_cargo.values():
+        todas_ofertas.extend(info["ofertas"])
+
+    total_ofertas = len(todas_ofertas)
+
+    # Estructura plana para análisis con Pandas
+    from datetime import datetime
+    resultado = {
+        "metadata": {
+            "total_cargos_buscados": len(cargos),
+            "cargos_con_ofertas": len(ofertas_por_cargo),
+            "total_ofertas": total_ofertas,
+            "fecha_extraccion": datetime.now().isoformat()
+        },
+        "ofertas": todas_ofertas
+    }
+
+    with open(archivo_salida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+    print("\n[OK] Completado!")
+    print(f"  Cargos con ofertas: {len(ofertas_por_cargo)}/{len(cargos)}")
+    print(f"  Total ofertas: {total_ofertas:,}")
+
+
+def _extraer_por_cargo(scraper, cargos, max_por_cargo):
+    """Una extracción con filtro areaincumbencia por cada cargo"""
+
     # Diccionario para almacenar ofertas por cargo
     ofertas_por_cargo = {}
 
@@ -62,34 +114,124 @@ def extraer_ofertas_por_cargos(
             print(f"   [ERROR] {e}")
             continue
 
-    # Guardar resultados
-    print(f"\n\nGuardando resultados en {archivo_salida}...")
+    return ofertas_por_cargo
 
-    # Aplanar la estructura: convertir a lista plana
-    todas_ofertas = []
-    for info in ofertas_por_cargo.values():
-        todas_ofertas.extend(info["ofertas"])
 
-    total_ofertas = len(todas_ofertas)
+def _extraer_bulk(scraper, cargos, max_por_cargo, max_caracteres_fq):
+    """
+    Una extracción por lote de códigos, repartiendo las ofertas por cargo.
 
-    # Estructura plana para análisis con Pandas
-    from datetime import datetime
-    resultado = {
-        "metadata": {
-            "total_cargos_buscados": len(cargos),
-            "cargos_con_ofertas": len(ofertas_por_cargo),
-            "total_ofertas": total_ofertas,
-            "fecha_extraccion": datetime.now().isoformat()
-        },
-        "ofertas": todas_ofertas
-    }
+    Cuando un cargo llega a max_por_cargo se saca del lote y la consulta
+    sigue solo con los demás, desde la finoferta de la última oferta
+    recibida (el orden es finoferta desc): un cargo con muchas ofertas no
+    obliga a recorrer todas las suyas para completar los que tienen pocas.
+    """
 
-    with open(archivo_salida, "w", encoding="utf-8") as f:
-        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    # Código (en mayúsculas) -> primer cargo con ese código. Las mayúsculas
+    # son solo para repartir las ofertas: areaincumbencia es un campo exacto,
+    # así que el filtro lleva los códigos como están escritos
+    cargos_por_codigo = {}
+    escrituras = {}
+    for cargo in cargos:
+        clave = cargo.codigo.upper()
+        cargos_por_codigo.setdefault(clave, cargo)
+        if cargo.codigo not in escrituras.setdefault(clave, []):
+            escrituras[clave].append(cargo.codigo)
 
-    print("\n[OK] Completado!")
-    print(f"  Cargos con ofertas: {len(ofertas_por_cargo)}/{len(cargos)}")
-    print(f"  Total ofertas: {total_ofertas:,}")
+    def filtro(claves):
+        return alguno("areaincumbencia", [c for clave in claves for c in escrituras[clave]])
+
+    lotes = _lotes_fq(list(cargos_por_codigo), max_caracteres_fq, filtro)
+    print(f"Códigos distintos: {len(cargos_por_codigo)} en {len(lotes)} consultas")
+
+    ofertas_por_cargo = {}
+
+    for i, (codigos, fq) in enumerate(lotes, 1):
+        print(f"\n[{i}/{len(lotes)}] Buscando ofertas para {len(codigos)} cargos")
+
+        ofertas = {codigo: [] for codigo in codigos}
+        pendientes = list(codigos)
+        # Ids ya repartidos: al retomar se repiten las ofertas con la misma
+        # finoferta que la última recibida
+        vistas = set()
+        desde_fin = None
+
+        try:
+            while pendientes:
+                filtros = {"estado": "Publicada", "fq": [fq]}
+                if desde_fin:
+                    filtros["fq"].append(rango("finoferta", hasta=desde_fin))
+
+                completo = None
+                for oferta in scraper.get_all_ofertas(filtros=filtros, cursor=True):
+                    # Sin finoferta (van al final) no hay desde dónde retomar:
+                    # se repite la consulta entera y vistas descarta lo repetido
+                    desde_fin = oferta.get("finoferta")
+                    codigo = str(oferta.get("areaincumbencia", "")).upper()
+                    lista = ofertas.get(codigo)
+                    clave = clave_oferta(oferta)
+                    if lista is None or codigo not in pendientes or clave in vistas:
+                        continue
+
+                    if clave is not None:
+                        vistas.add(clave)
+                    lista.append(oferta)
+                    if max_por_cargo and len(lista) >= max_por_cargo:
+                        completo = codigo
+                        break
+
+                if completo is None:
+                    # La consulta terminó: no hay más ofertas de los pendientes
+                    break
+                pendientes.remove(completo)
+                if pendientes:
+                    fq = filtro(pendientes)
+                    print(f"   {completo} completo, sigue con {len(pendientes)} cargos")
+
+        except Exception as e:
+            print(f"   [ERROR] {e}")
+            continue
+
+        for codigo in codigos:
+            if ofertas[codigo]:
+                cargo = cargos_por_codigo[codigo]
+                ofertas_por_cargo[cargo.codigo] = {
+                    "cargo": cargo.to_dict(),
+                    "total_ofertas": len(ofertas[codigo]),
+                    "ofertas": ofertas[codigo],
+                }
+
+        encontrados = sum(1 for o in ofertas.values() if o)
+        print(f"   [OK] Encontradas: {sum(len(o) for o in ofertas.values())} ofertas "
+              f"para {encontrados}/{len(codigos)} cargos")
+
+    return ofertas_por_cargo
+
+
+def _lotes_fq(codigos, max_caracteres, filtro):
+    """
+    Arma filtros areaincumbencia:("A" OR "B" ...) sin superar max_caracteres.
+
+    Args:
+        codigos: Claves de los códigos a repartir en lotes
+        max_caracteres: Largo máximo de cada filtro
+        filtro: Función que arma el filtro fq de una lista de claves
+
+    Returns:
+        Lista de tuplas (códigos del lote, filtro fq)
+    """
+    lotes = []
+    actual = []
+
+    for codigo in codigos:
+        if actual and len(filtro(actual + [codigo])) > max_caracteres:
+            lotes.append((actual, filtro(actual)))
+            actual = []
+        actual.append(codigo)
+
+    if actual:
+        lotes.append((actual, filtro(actual)))
+    return lotes
 
 
 def buscar_ofertas_por_modalidad(
@@ -108,15 +250,8 @@ def buscar_ofertas_por_modalidad(
 
     print(f"Cargos de modalidad {modalidad}: {len(cargos_filtrados)}")
 
-    # Crear archivo temporal
-    temp_file = "temp_cargos.json"
-    with open(temp_file, "w", encoding="utf-8") as f:
-        json.dump(
-            [c.to_dict() for c in cargos_filtrados], f, ensure_ascii=False, indent=2
-        )
-
     # Extraer
-    extraer_ofertas_por_cargos(temp_file, archivo_salida)
+    extraer_ofertas_por_cargos(archivo_salida=archivo_salida, cargos=cargos_filtrados)
 
 
 if __name__ == "__main__":
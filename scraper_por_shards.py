@@ -0,0 +1,270 @@
+"""
+Script para extraer el índice completo partido en shards independientes.
+
+Cada shard es un filtro fq (un grupo de distritos o un rango de meses de
+finoferta) dimensionado a partir de los conteos de facetas. Los shards se
+extraen en paralelo, cada uno con su propio APDScraper y su propio archivo
+de segmento, y al final se unen en un único archivo de salida. Si un shard
+falla, al volver a ejecutar solo se reintenta ese shard (desde su checkpoint).
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from consulta_solr import alguno, existe, no, rango
+from escritores import crear_escritor, ruta_metadata
+from scraper_apd import APDScraper
+
+
+def planificar_shards(
+    scraper,
+    por="numdistrito",
+    tamano_objetivo=50000,
+    filtros=None,
+    desde="2015-01-01T00:00:00Z",
+    hasta="NOW/MONTH+1MONTH",
+):
+    """
+    Divide la query en shards disjuntos a partir de los conteos de facetas.
+
+    Los valores chicos se agrupan (distritos consecutivos en un mismo OR,
+    meses contiguos en un mismo rango) hasta acercarse a tamano_objetivo.
+
+    Args:
+        scraper: APDScraper usado para pedir las facetas
+        por: "numdistrito" o "mes" (rangos mensuales de finoferta)
+        tamano_objetivo: Cantidad aproximada de ofertas por shard
+        filtros: Dict con filtros adicionales (ver APDScraper.get_ofertas)
+        desde, hasta: Con por="mes", período cubierto mes a mes. Lo anterior
+            y lo posterior van en dos shards abiertos.
+
+    Returns:
+        Lista de dicts {"nombre", "fq", "estimado"}
+    """
+    if por == "numdistrito":
+        resultado = scraper.get_facetas(["numdistrito"], filtros=filtros)
+        if resultado is None:
+            raise RuntimeError("No se pudieron obtener las facetas por distrito")
+
+        valores = sorted(resultado["facetas"]["numdistrito"].items(), key=lambda kv: int(kv[0]))
+        grupos = _agrupar(valores, tamano_objetivo)
+        shards = [
+            {
+                "fq": alguno("numdistrito", [int(v) for v, _ in grupo]),
+                "estimado": sum(c for _, c in grupo),
+            }
+            for grupo in grupos
+        ]
+        cubiertos = sum(resultado["facetas"]["numdistrito"].values())
+        sin_valor = resultado["total"] - cubiertos
+        if sin_valor > 0:
+            shards.append({"fq": no(existe("numdistrito")), "estimado": sin_valor})
+
+    elif por == "mes":
+        resultado = scraper.get_facetas_rango(
+            "finoferta", desde, hasta, "+1MONTH", filtros=filtros
+        )
+        if resultado is None:
+            raise RuntimeError("No se pudieron obtener las facetas por mes")
+
+        inicios = list(resultado["rangos"])
+        limites = inicios + [resultado["fin"]]
+        rangos = [
+            ((limites[i], limites[i + 1]), resultado["rangos"][inicio])
+            for i, inicio in enumerate(inicios)
+        ]
+        grupos = _agrupar(rangos, tamano_objetivo)
+        shards = [
+            {
+                # Rango semiabierto: el fin pertenece al shard siguiente
+                "fq": rango("finoferta", grupo[0][0][0], grupo[-1][0][1], incluir_hasta=False),
+                "estimado": sum(c for _, c in grupo),
+            }
+            for grupo in grupos
+        ]
+        shards.append(
+            {"fq": rango("finoferta", hasta=limites[0], incluir_hasta=False), "estimado": resultado["antes"]}
+        )
+        shards.append({"fq": rango("finoferta", limites[-1]), "estimado": resultado["despues"]})
+        sin_valor = resultado["total"] - sum(s["estimado"] for s in shards)
+        if sin_valor > 0:
+            shards.append({"fq": no(existe("finoferta")), "estimado": sin_valor})
+
+    else:
+        raise ValueError(f"Partición desconocida: {por}")
+
+    shards = [s for s in shards if s["estimado"] > 0]
+    for i, shard in enumerate(shards, 1):
+        shard["nombre"] = f"shard-{i:03d}"
+    return shards
+
+
+def _agrupar(valores, tamano_objetivo):
+    """Agrupa pares (valor, cantidad) consecutivos sin pasar tamano_objetivo"""
+    grupos = []
+    actual = []
+    acumulado = 0
+
+    for valor, cantidad in valores:
+        if actual and acumulado + cantidad > tamano_objetivo:
+            grupos.append(actual)
+            actual = []
+            acumulado = 0
+        actual.append((valor, cantidad))
+        acumulado += cantidad
+
+    if actual:
+        grupos.append(actual)
+    return grupos
+
+
+def _extraer_shard(shard, archivo_segmento, filtros, batch_size):
+    """
+    Extrae un shard a su archivo de segmento (NDJSON con checkpoint).
+    Es una función de módulo para poder ejecutarse en otro proceso.
+    """
+    scraper = APDScraper()
+    filtros_shard = dict(filtros or {})
+    filtros_shard["fq"] = filtros_shard.get("fq", []) + [shard["fq"]]
+
+    completo = scraper.save_to_json(
+        archivo_segmento,
+        filtros=filtros_shard,
+        formato="ndjson",
+        batch_size=batch_size,
+        checkpoint=True,
+    )
+    return shard["nombre"], completo
+
+
+def extraer_por_shards(
+    archivo_salida="ofertas_completas.json",
+    por="numdistrito",
+    tamano_objetivo=50000,
+    workers=4,
+    usar_procesos=False,
+    filtros=None,
+    batch_size=100,
+):
+    """
+    Extrae la query completa repartida en shards y une los segmentos.
+
+    Los segmentos y el plan quedan en <archivo_salida>.shards/. El plan se
+    guarda la primera vez y se reutiliza en las siguientes ejecuciones, así
+    los shards ya terminados no se vuelven a pedir. Reutilizarlo con otro
+    "por" u otros filtros es un error (el plan guardado no corresponde).
+
+    Args:
+        archivo_salida: Archivo final (.json o .ndjson)
+        por: "numdistrito" o "mes" (ver planificar_shards)
+        tamano_objetivo: Cantidad aproximada de ofertas por shard
+        workers: Shards extraídos a la vez. Cada uno tiene su propio scraper
+            y controlador de ritmo, así que la carga sobre el servidor crece
+            con este número.
+        usar_procesos: Usar procesos en lugar de threads (reparte la
+            decodificación JSON entre núcleos)
+        filtros: Dict con filtros adicionales (ver APDScraper.get_ofertas)
+        batch_size: Cantidad de registros por petición
+
+    Returns:
+        True si todos los shards terminaron y se generó el archivo final
+    """
+    directorio = f"{archivo_salida}.shards"
+    archivo_plan = os.path.join(directorio, "plan.json")
+    os.makedirs(directorio, exist_ok=True)
+
+    start_time = time.time()
+
+    if os.path.exists(archivo_plan):
+        with open(archivo_plan, "r", encoding="utf-8") as f:
+            plan = json.load(f)
+        # Los filtros se comparan como quedan guardados en JSON (tuplas -> listas)
+        pedido = {"por": por, "filtros": json.loads(json.dumps(filtros))}
+        guardado = {"por": plan.get("por"), "filtros": plan.get("filtros")}
+        if guardado != pedido:
+            raise ValueError(
+                f"{archivo_plan} es de otra extracción (guardado: {guardado}, "
+                f"pedido: {pedido}). Usá otro archivo_salida o borrá {directorio}"
+            )
+        print(f"Usando plan existente: {len(plan['shards'])} shards")
+    else:
+        shards = planificar_shards(
+            APDScraper(), por=por, tamano_objetivo=tamano_objetivo, filtros=filtros
+        )
+        plan = {"por": por, "filtros": filtros, "shards": shards}
+        with open(archivo_plan, "w", encoding="utf-8") as f:
+            json.dump(plan, f, ensure_ascii=False, indent=2)
+        print(f"Plan nuevo: {len(shards)} shards por {por}")
+
+    def segmento(shard):
+        return os.path.join(directorio, f"{shard['nombre']}.ndjson")
+
+    # Un shard está terminado cuando su escritor dejó la metadata final
+    pendientes = [
+        s
+        for s in plan["shards"]
+        if not os.path.exists(ruta_metadata(segmento(s)))
+    ]
+    print(f"Shards pendientes: {len(pendientes)}/{len(plan['shards'])}")
+
+    pool = ProcessPoolExecutor if usar_procesos else ThreadPoolExecutor
+
+    with pool(max_workers=workers) as executor:
+        futuros = [
+            executor.submit(_extraer_shard, s, segmento(s), plan["filtros"], batch_size)
+            for s in pendientes
+        ]
+        for futuro in as_completed(futuros):
+            try:
+                nombre, completo = futuro.result()
+            except Exception as e:
+                print(f"   [ERROR] {e}")
+                continue
+            if completo:
+                print(f"   [OK] {nombre}")
+            else:
+                print(f"   [ERROR] {nombre} quedó incompleto")
+
+    faltantes = [
+        s["nombre"]
+        for s in plan["shards"]
+        if not os.path.exists(ruta_metadata(segmento(s)))
+    ]
+    if faltantes:
+        print(f"\n>> Shards incompletos: {', '.join(faltantes)}")
+        print("Volvé a ejecutar con los mismos argumentos para reintentarlos")
+        return False
+
+    print(f"\nUniendo {len(plan['shards'])} segmentos en {archivo_salida}...")
+    metadata = {
+        "fecha_extraccion": datetime.now().isoformat(),
+        "filtros": plan["filtros"],
+        "shards": {"por": plan["por"], "cantidad": len(plan["shards"])},
+    }
+    with crear_escritor(archivo_salida, metadata) as escritor:
+        for shard in plan["shards"]:
+            with open(segmento(shard), "r", encoding="utf-8") as f:
+                lote = []
+                for linea in f:
+                    lote.append(json.loads(linea))
+                    if len(lote) >= batch_size:
+                        escritor.escribir_lote(lote)
+                        lote = []
+                escritor.escribir_lote(lote)
+
+    elapsed = time.time() - start_time
+    print("\n[OK] Completado!")
+    print(f"  Total ofertas: {escritor.total:,}")
+    print(f"  Tiempo: {elapsed:.2f} segundos")
+    return True
+
+
+if __name__ == "__main__":
+    # Opción 1: Shards por distrito, 4 a la vez
+    extraer_por_shards("ofertas_completas.json", por="numdistrito", workers=4)
+
+    # Opción 2: Shards por mes de cierre, en procesos separados
+    # extraer_por_shards("ofertas_completas.json", por="mes", usar_procesos=True)
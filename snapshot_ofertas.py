@@ -0,0 +1,188 @@
+"""
+Snapshot Arrow IPC (Feather v2) de un archivo de ofertas, para el dashboard.
+
+Convertir un JSON de ofertas a DataFrame (parsear el JSON, las fechas y los
+números) cuesta segundos y cada proceso de Streamlit lo repetía con su
+propia copia en memoria. El snapshot guarda la tabla ya tipada (ESQUEMA de
+esquema_ofertas.py) sin comprimir junto al archivo de origen:
+
+    ofertas_completas.json
+    ofertas_completas.json.arrow    # snapshot
+
+y se abre con memory map: las columnas del DataFrame apuntan directo a las
+páginas del archivo, que el sistema operativo comparte entre todos los
+procesos que lo abren. Abrirlo es casi instantáneo y no hay copia privada
+por proceso (salvo los códigos de las columnas category y la máscara de
+nulos de las enteras). Las columnas se guardan ya en la representación
+compacta de esquema_ofertas.py (diccionarios y enteros chicos).
+
+El snapshot guarda la firma del origen (tamaño y fecha de modificación de
+sus archivos) y se recompila solo cuando el origen cambia. El dashboard lo
+usa para JSON, datasets Parquet y logs segmentados; las bases SQLite se
+consultan directo por columnas (ver load_ofertas en utils/data_loader.py).
+
+Requiere pyarrow (pip install pyarrow).
+"""
+import json
+import os
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+except ImportError:  # Se avisa al usar el snapshot
+    pa = None
+
+from dataset_ofertas import tabla_a_dataframe, tabla_compacta
+
+EXTENSION = ".arrow"
+# Cambia cuando cambia lo que se guarda: invalida los snapshots anteriores
+FORMATO = 3
+# Claves en la metadata del esquema del snapshot
+CLAVE_FIRMA = b"firma_origen"
+CLAVE_METADATA = b"metadata"
+
+
+def disponible():
+    """True si pyarrow está instalado"""
+    return pa is not None
+
+
+def ruta_snapshot(archivo):
+    """Snapshot de un archivo de ofertas: el mismo nombre con .arrow agregado"""
+    return str(archivo) + EXTENSION
+
+
+def firma_origen(archivo):
+    """
+    Firma del origen: cantidad, tamaño total y última modificación de sus
+    archivos (los de la carpeta si es un dataset o un log, y el -wal si es
+    una base SQLite).
+    """
+    ruta = Path(archivo)
+    if ruta.is_dir():
+        archivos = [p for p in ruta.rglob("*") if p.is_file()]
+    else:
+        archivos = [ruta] + [p for p in [Path(f"{ruta}-wal")] if p.exists()]
+    estados = [p.stat() for p in archivos]
+    return json.dumps([
+        FORMATO,
+        len(estados),
+        sum(e.st_size for e in estados),
+        max((e.st_mtime_ns for e in estados), default=0),
+    ])
+
+
+def cargar_snapshot(archivo, leer_origen):
+    """
+    Abre el snapshot de archivo, compilándolo antes si no existe o si el
+    origen cambió.
+
+    Args:
+        archivo: Archivo de ofertas de origen
+        leer_origen: Función sin argumentos que devuelve (tabla pyarrow con
+            ESQUEMA, metadata) leyendo el origen; solo se llama al compilar
+
+    Returns:
+        Tuple con (tabla pyarrow con memory map, metadata)
+    """
+    _requerir_pyarrow()
+    firma = firma_origen(archivo)
+    destino = ruta_snapshot(archivo)
+
+    abierto = abrir_snapshot(destino)
+    if abierto is not None and abierto[2] == firma:
+        return abierto[0], abierto[1]
+
+    tabla, metadata = leer_origen()
+    try:
+        escribir_snapshot(destino, tabla, metadata, firma)
+    except OSError as e:
+        # Carpeta de solo lectura: se usa la tabla en memoria
+        print(f"No se pudo guardar el snapshot {destino}: {e}")
+        return tabla_compacta(tabla), metadata
+    tabla, metadata, _ = abrir_snapshot(destino)
+    return tabla, metadata
+
+
+def escribir_snapshot(destino, tabla, metadata, firma):
+    """
+    Escribe el snapshot sin compresión (para poder mapearlo) y lo reemplaza
+    de forma atómica: otro proceso que lo esté leyendo conserva su versión.
+    """
+    _requerir_pyarrow()
+    tabla = tabla_compacta(tabla)
+    # Texto como large_string: es lo que usa pandas, así la conversión no
+    # copia los offsets
+    esquema = pa.schema([
+        pa.field(f.name, pa.large_string()) if f.type == pa.string() else f
+        for f in tabla.schema
+    ]).with_metadata({
+        CLAVE_FIRMA: firma.encode(),
+        CLAVE_METADATA: json.dumps(metadata, ensure_ascii=False).encode("utf-8"),
+    })
+    # El formato de archivo IPC admite un solo diccionario por columna
+    tabla = tabla.cast(esquema).unify_dictionaries().combine_chunks()
+
+    temporal = f"{destino}.{os.getpid()}.tmp"
+    try:
+        with pa.OSFile(temporal, "wb") as f:
+            with pa.ipc.new_file(f, esquema) as escritor:
+                escritor.write_table(tabla)
+        os.replace(temporal, destino)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+def abrir_snapshot(destino):
+    """
+    Abre un snapshot con memory map.
+
+    Returns:
+        Tuple con (tabla, metadata, firma del origen), o None si no existe o
+        no se puede leer
+    """
+    _requerir_pyarrow()
+    try:
+        with pa.memory_map(destino, "r") as mapa:
+            tabla = pa.ipc.open_file(mapa).read_all()
+    except (OSError, pa.ArrowInvalid):
+        return None
+    extra = tabla.schema.metadata or {}
+    metadata = json.loads(extra.get(CLAVE_METADATA, b"{}").decode("utf-8"))
+    return tabla, metadata, extra.get(CLAVE_FIRMA, b"").decode()
+
+
+def tabla_a_pandas(tabla, columnas=None):
+    """
+    DataFrame sobre los buffers de la tabla, sin copiarlos.
+
+    Los tipos son los del registro de esquema_ofertas.py, igual que
+    leer_dataset de dataset_ofertas.py.
+    """
+    if columnas:
+        tabla = tabla.select([c for c in columnas if c in tabla.column_names])
+    return tabla_a_dataframe(tabla)
+
+
+def _requerir_pyarrow():
+    if pa is None:
+        raise ImportError("El snapshot de ofertas requiere pyarrow: pip install pyarrow")
+
+
+if __name__ == "__main__":
+    import time
+
+    from dataset_ofertas import ofertas_a_tabla
+
+    def leer_json():
+        with open("ofertas_muestra.json", "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return ofertas_a_tabla(data.get("ofertas", [])), data.get("metadata", {})
+
+    # Opción 1: Compilar (la primera vez) y abrir el snapshot de la muestra
+    for intento in ("primera carga", "segunda carga"):
+        inicio = time.perf_counter()
+        tabla, metadata = cargar_snapshot("ofertas_muestra.json", leer_json)
+        df = tabla_a_pandas(tabla, ["cargo", "descdistrito", "finoferta"])
+        print(f"{intento}: {len(df):,} ofertas en {time.perf_counter() - inicio:.3f}s")
@@ -0,0 +1,34 @@
+"""
+Configuración común de las pruebas.
+
+Los módulos del proyecto están en la raíz del repositorio y config.py exige
+un endpoint: las pruebas apuntan todo a un FakeSolr local (fake_solr.py).
+"""
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# Antes de importar config: sin endpoint no se puede importar el scraper
+os.environ.setdefault("END_POINT_LOCAL", "http://127.0.0.1:9/solr/apd/select")
+
+import pytest  # noqa: E402
+
+from control_tasa import ControladorFijo  # noqa: E402
+from fake_solr import FakeSolr  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def solr():
+    """FakeSolr con 300 ofertas sintéticas, compartido por todas las pruebas"""
+    with FakeSolr(docs=300) as servidor:
+        yield servidor
+
+
+@pytest.fixture
+def scraper(solr):
+    """APDScraper contra el FakeSolr, sin pausas entre peticiones"""
+    from scraper_apd import APDScraper
+
+    return APDScraper(base_url=solr.url, controlador=ControladorFijo(pausa=0))
@@ -0,0 +1,18 @@
+from archivo_ofertas import ArchivoOfertas, EscritorArchivo
+
+
+def test_extremos_de_bloque_con_y_sin_milisegundos(tmp_path):
+    ruta = str(tmp_path / "ofertas.jsonz")
+    with EscritorArchivo(ruta, codec="zlib") as escritor:
+        escritor.escribir_lote([
+            {"idoferta": 1, "finoferta": "2026-06-30T10:00:00Z"},
+            {"idoferta": 2, "finoferta": "2026-06-30T10:00:00.500Z"},
+            {"idoferta": 3, "finoferta": "2026-06-29T08:00:00.000Z"},
+        ])
+
+    archivo = ArchivoOfertas(ruta)
+    assert archivo.bloques[0][3:] == ["2026-06-29T08:00:00.000Z", "2026-06-30T10:00:00.500Z"]
+
+    # El bloque termina después de desde aunque como texto parezca que no
+    lotes = list(archivo.lotes(desde="2026-06-30T10:00:00.250Z"))
+    assert [o["idoferta"] for lote in lotes for o in lote] == [1, 2, 3]
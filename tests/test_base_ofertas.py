@@ -0,0 +1,43 @@
+from datetime import date
+
+import pandas as pd
+
+from base_ofertas import BaseOfertas
+from esquema_ofertas import tipar_ofertas
+from utils.data_loader import filtrar_ofertas
+
+OFERTAS = [
+    {"iddetalle": 1, "cargo": "PROFESOR", "descripcionarea": "MATEMÁTICA",
+     "descdistrito": "LA PLATA", "finoferta": "2026-06-30T10:00:00Z"},
+    {"iddetalle": 2, "cargo": "Profesor", "descripcionarea": "Matemática",
+     "descdistrito": "La Plata", "finoferta": "2026-06-30T10:00:00.500Z"},
+    {"iddetalle": 3, "cargo": "MAESTRO", "descripcionarea": "EDUCACIÓN FÍSICA",
+     "descdistrito": "BERISSO", "finoferta": "2026-06-29T23:59:59.999Z"},
+    {"iddetalle": 4, "cargo": "PRECEPTOR", "descripcionarea": "SECUNDARIA",
+     "descdistrito": "ENSENADA", "finoferta": "2026-07-01T00:00:00Z"},
+    {"iddetalle": 5, "cargo": "PROFESORA", "descripcionarea": "INGLÉS",
+     "descdistrito": "LA PLATA", "finoferta": None},
+]
+
+CONSULTAS = [
+    {"busqueda": "profesor"},
+    {"busqueda": "matemática"},
+    {"busqueda": "educación"},
+    {"fecha_inicio": "2026-06-30T10:00:00.250", "fecha_fin": date(2026, 7, 1)},
+    {"fecha_inicio": date(2026, 6, 30), "fecha_fin": "2026-06-30T10:00:00"},
+    {"busqueda": "plata", "fecha_inicio": date(2026, 6, 29), "fecha_fin": date(2026, 7, 1)},
+]
+
+
+def _ids(df):
+    return sorted(int(i) for i in df["iddetalle"])
+
+
+def test_consultar_igual_que_filtrar_ofertas(tmp_path):
+    todas = tipar_ofertas(pd.DataFrame(OFERTAS))
+    with BaseOfertas(str(tmp_path / "ofertas.sqlite")) as base:
+        base.upsert(OFERTAS)
+        for filtros in CONSULTAS:
+            esperado = _ids(filtrar_ofertas(todas, **filtros))
+            assert _ids(base.consultar(**filtros)) == esperado, filtros
+            assert base.contar(**filtros) == len(esperado), filtros
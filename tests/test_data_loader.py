@@ -0,0 +1,35 @@
+import requests
+
+from control_tasa import ControladorFijo
+from utils.data_loader import get_available_files
+
+
+def test_get_available_files_ignora_auxiliares(scraper, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+
+    # Extracción cortada después de la primera página: quedan el archivo,
+    # su checkpoint y sus métricas
+    scraper.controlador = ControladorFijo(pausa=0, max_reintentos=0)
+    pedir = scraper.session.get
+    llamadas = []
+
+    def cortar(*args, **kwargs):
+        llamadas.append(1)
+        if len(llamadas) > 1:
+            raise requests.exceptions.ConnectionError("corte")
+        return pedir(*args, **kwargs)
+
+    monkeypatch.setattr(scraper.session, "get", cortar)
+    assert scraper.save_to_json("ofertas_cortada.json", batch_size=100, checkpoint=True) is False
+    monkeypatch.setattr(scraper.session, "get", pedir)
+
+    # NDJSON completo: deja la metadata en <archivo>.meta.json
+    assert scraper.save_to_json("ofertas_lineas.ndjson", max_ofertas=50) is True
+
+    generados = sorted(p.name for p in tmp_path.iterdir())
+    assert "ofertas_cortada.json.checkpoint.json" in generados
+    assert "ofertas_cortada.json.metricas.json" in generados
+    assert "ofertas_lineas.ndjson.meta.json" in generados
+
+    get_available_files.clear()
+    assert get_available_files()["ofertas"] == ["ofertas_cortada.json"]
@@ -0,0 +1,21 @@
+from dataset_ofertas import EscritorParquet, leer_tabla
+
+
+def _oferta(idoferta, finoferta):
+    return {"idoferta": idoferta, "iddetalle": idoferta, "numdistrito": 1, "finoferta": finoferta}
+
+
+def test_hasta_sin_hora_incluye_todo_el_dia(tmp_path):
+    ruta = str(tmp_path / "ofertas")
+    with EscritorParquet(ruta) as escritor:
+        escritor.escribir_lote([
+            _oferta(1, "2026-06-29T10:00:00Z"),
+            _oferta(2, "2026-06-30T15:00:00Z"),
+            _oferta(3, "2026-07-01T00:00:00Z"),
+        ])
+
+    dia = leer_tabla(ruta, columnas=["idoferta"], hasta="2026-06-30")
+    assert sorted(dia["idoferta"].to_pylist()) == [1, 2]
+
+    instante = leer_tabla(ruta, columnas=["idoferta"], hasta="2026-06-30T12:00:00")
+    assert sorted(instante["idoferta"].to_pylist()) == [1]
@@ -0,0 +1,17 @@
+import pandas as pd
+
+from esquema_ofertas import tipar_ofertas
+
+
+def test_fechas_con_y_sin_milisegundos():
+    df = tipar_ofertas(pd.DataFrame({"finoferta": [
+        "2026-06-30T10:00:00Z",
+        "2026-06-30T10:00:00.500Z",
+        None,
+        "no es fecha",
+    ]}))
+    assert df["finoferta"].tolist()[:2] == [
+        pd.Timestamp("2026-06-30T10:00:00Z"),
+        pd.Timestamp("2026-06-30T10:00:00.500Z"),
+    ]
+    assert df["finoferta"].isna().tolist() == [False, False, True, True]
@@ -0,0 +1,29 @@
+from log_ofertas import LogOfertas
+
+
+def _lotes(log, segmentos=4, por_segmento=10):
+    for s in range(segmentos):
+        log.agregar([
+            {"iddetalle": s * por_segmento + i, "_version_": 1} for i in range(por_segmento)
+        ])
+
+
+def test_lector_sigue_despues_de_una_compactacion(tmp_path):
+    ruta = str(tmp_path / "ofertas.segmentos")
+    escritor = LogOfertas(ruta, compactar_auto=False)
+    _lotes(escritor)
+    lector = LogOfertas(ruta, solo_lectura=True)
+    otro = LogOfertas(ruta, solo_lectura=True)
+
+    ofertas = lector.ofertas()
+    primera = next(ofertas)
+
+    # El escritor compacta y borra los segmentos que el lector tenía en su
+    # foto, incluidos los que todavía no abrió
+    assert escritor.compactar() == 0
+    escritor.cerrar()
+    assert len(escritor.segmentos) == 1
+
+    claves = [primera["iddetalle"]] + [o["iddetalle"] for o in ofertas]
+    assert sorted(claves) == list(range(40))
+    assert otro.leer(35) == {"iddetalle": 35, "_version_": 1}
@@ -0,0 +1,23 @@
+import json
+
+from lector_json import LectorJSON
+
+
+def test_sync_fusiona_por_iddetalle(scraper, tmp_path):
+    archivo = str(tmp_path / "ofertas.json")
+    assert scraper.save_to_json(archivo) is True
+
+    # Un perfil de campos sin id: la fusión tiene que usar la misma clave
+    # (iddetalle) que el resto del proyecto
+    with open(archivo, encoding="utf-8") as f:
+        data = json.load(f)
+    for oferta in data["ofertas"]:
+        del oferta["id"]
+    total = len(data["ofertas"])
+    with open(archivo, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+    assert scraper.sync_incremental(archivo) > 0
+
+    iddetalles = [o["iddetalle"] for o in LectorJSON(archivo)]
+    assert len(iddetalles) == len(set(iddetalles)) == total
@@ -5,16 +5,53 @@ import json
 import pandas as pd
 import streamlit as st
 from pathlib import Path
-from typing import Dict, Tuple
-
-
-@st.cache_data(ttl=3600)  # Cache por 1 hora
-def load_ofertas(archivo: str = "ofertas_muestra.json") -> Tuple[pd.DataFrame, Dict]:
+from typing import Dict, Optional, Tuple
+
+from archivo_ofertas import es_archivo
+from base_ofertas import BaseOfertas, es_base_sqlite
+from dataset_ofertas import (
+    cargar_ofertas, es_dataset, leer_metadata, leer_tabla, ofertas_a_tabla, tabla_json,
+)
+from esquema_ofertas import sin_categorias_vacias, tipar_ofertas
+from log_ofertas import LogOfertas, es_log
+from snapshot_ofertas import cargar_snapshot, disponible as snapshot_disponible, tabla_a_pandas
+
+# Columnas que usan las páginas (el perfil "dashboard" de scraper_apd.py)
+COLUMNAS_DASHBOARD = (
+    "id", "iddetalle", "idoferta", "_version_", "timestamp", "ult_movimiento",
+    "estado", "tipooferta", "cargo", "descripcionarea", "descnivelmodalidad",
+    "numdistrito", "descdistrito", "escuela", "domiciliodesempeno",
+    "areaincumbencia", "turno", "jornada", "hsmodulos", "ige",
+    "iniciooferta", "finoferta", "tomaposesion", "supl_desde", "supl_hasta",
+    "observaciones",
+)
+
+# Archivos que se guardan junto a uno de ofertas y terminan en .json:
+# métricas (metricas.py), checkpoint (save_to_json) y metadata de un NDJSON
+SUFIJOS_AUXILIARES = (".metricas.json", ".checkpoint.json", ".meta.json")
+
+
+def load_ofertas(
+    archivo: str = "ofertas_muestra.json",
+    columnas: Optional[Tuple[str, ...]] = COLUMNAS_DASHBOARD,
+) -> Tuple[pd.DataFrame, Dict]:
     """
-    Carga ofertas desde JSON y convierte a DataFrame.
+    Carga ofertas desde JSON, un dataset Parquet, una base SQLite, un log
+    segmentado o un archivo comprimido .jsonz y convierte a DataFrame.
+
+    Con pyarrow instalado no usa la caché de Streamlit: lee el snapshot
+    Arrow del archivo (ver snapshot_ofertas.py) con memory map, así cada
+    llamada y cada proceso comparten las mismas páginas en lugar de guardar
+    una copia del DataFrame. El snapshot se recompila solo si el archivo
+    cambió. Una base SQLite no usa snapshot: se consultan solo las columnas
+    pedidas con SQL (ver consultar_ofertas para filtrar por los índices).
 
     Args:
-        archivo: Path al archivo JSON de ofertas
+        archivo: Path al archivo JSON de ofertas, a la carpeta .parquet
+            (ver dataset_ofertas.py), a la base .sqlite (ver base_ofertas.py),
+            a la carpeta .segmentos (ver log_ofertas.py) o al archivo .jsonz
+            (ver archivo_ofertas.py)
+        columnas: Columnas a cargar (None = todas)
 
     Returns:
         Tuple con (DataFrame de ofertas, metadata)
@@ -25,26 +62,82 @@ def load_ofertas(archivo: str = "ofertas_muestra.json") -> Tuple[pd.DataFrame, D
         st.error(f"No se encontró el archivo: {archivo}")
         return pd.DataFrame(), {}
 
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # Un archivo .jsonz no lleva snapshot: el .arrow sin comprimir ocuparía
+    # más de diez veces lo que el archivo. Una base SQLite tampoco: ya se
+    # consulta por columnas e índices, y compilar el snapshot la copiaría
+    # entera
+    if not snapshot_disponible() or es_archivo(filepath) or es_base_sqlite(filepath):
+        return _load_ofertas_sin_snapshot(archivo, columnas)
 
-    # Convertir a DataFrame
-    df = pd.DataFrame(data.get('ofertas', []))
-    metadata = data.get('metadata', {})
+    tabla, metadata = cargar_snapshot(filepath, lambda: _tabla_origen(filepath))
+    return tabla_a_pandas(tabla, columnas), metadata
 
-    # Convertir fechas a datetime
-    date_columns = ['iniciooferta', 'finoferta', 'tomaposesion', 'supl_desde', 'supl_hasta']
-    for col in date_columns:
-        if col in df.columns:
-            df[col] = pd.to_datetime(df[col], errors='coerce')
 
-    # Convertir tipos numéricos
-    if 'hsmodulos' in df.columns:
-        df['hsmodulos'] = pd.to_numeric(df['hsmodulos'], errors='coerce')
-    if 'numdistrito' in df.columns:
-        df['numdistrito'] = pd.to_numeric(df['numdistrito'], errors='coerce')
+def _tabla_origen(filepath: Path):
+    """Tabla pyarrow con ESQUEMA y metadata de un archivo de ofertas"""
+    if es_dataset(filepath):
+        return leer_tabla(filepath), leer_metadata(filepath)
 
-    return df, metadata
+    if es_log(filepath):
+        log = LogOfertas(str(filepath), solo_lectura=True)
+        return ofertas_a_tabla(list(log.ofertas())), {**log.metadata, 'total_ofertas': len(log)}
+
+    return tabla_json(str(filepath))
+
+
+@st.cache_data(ttl=3600)  # Cache por 1 hora
+def _load_ofertas_sin_snapshot(
+    archivo: str,
+    columnas: Optional[Tuple[str, ...]] = COLUMNAS_DASHBOARD,
+) -> Tuple[pd.DataFrame, Dict]:
+    """
+    load_ofertas sin snapshot (sin pyarrow, o para una base SQLite o un
+    .jsonz): JSON, .jsonz, SQLite o log, cacheado por Streamlit
+    """
+    filepath = Path(archivo)
+
+    if es_base_sqlite(filepath):
+        with BaseOfertas(str(filepath)) as base:
+            df = base.consultar(columnas)
+            metadata = base.leer_metadata()
+        return tipar_ofertas(df), metadata
+
+    if es_log(filepath):
+        # Vista sin duplicados: la última versión de cada oferta
+        log = LogOfertas(str(filepath), solo_lectura=True)
+        df = pd.DataFrame(log.ofertas())
+        if columnas:
+            df = df[[c for c in columnas if c in df.columns]]
+        return tipar_ofertas(df), {**log.metadata, 'total_ofertas': len(log)}
+
+    # JSON o .jsonz leído de a lotes, solo las columnas pedidas
+    return cargar_ofertas(str(filepath), list(columnas) if columnas else None)
+
+
+@st.cache_data(ttl=3600)
+def consultar_ofertas(
+    archivo: str,
+    columnas: Optional[Tuple[str, ...]] = COLUMNAS_DASHBOARD,
+    **filtros,
+) -> pd.DataFrame:
+    """
+    Ofertas filtradas directamente en la base SQLite.
+
+    Recibe los mismos filtros que filtrar_ofertas, pero los traduce a una
+    consulta SQL sobre las columnas indexadas: solo se leen las filas que
+    coinciden, sin cargar ni copiar el DataFrame completo.
+
+    Args:
+        archivo: Path a la base .sqlite (ver base_ofertas.py)
+        columnas: Columnas a devolver (None = todas)
+        **filtros: Filtros de filtrar_ofertas
+
+    Returns:
+        DataFrame filtrado
+    """
+    with BaseOfertas(archivo) as base:
+        df = base.consultar(columnas, **filtros)
+    return tipar_ofertas(df)
 
 
 @st.cache_data(ttl=3600)
@@ -97,16 +190,26 @@ def load_cargos(archivo: str = "cargos_ejemplo.json") -> Tuple[pd.DataFrame, Dic
 @st.cache_data
 def get_available_files() -> Dict[str, list]:
     """
-    Detecta archivos JSON disponibles en el directorio.
+    Detecta archivos de datos disponibles en el directorio.
 
     Returns:
         Dict con listas de archivos de ofertas y cargos
     """
     base_path = Path(".")
 
-    # Buscar archivos de ofertas
+    # Buscar archivos de ofertas (JSON, Parquet, SQLite, logs segmentados y
+    # archivos comprimidos), sin los archivos auxiliares que los acompañan
     ofertas_files = [
         f.name for f in base_path.glob("ofertas_*.json")
+        if not f.name.endswith(SUFIJOS_AUXILIARES)
+    ] + [
+        f.name for f in base_path.glob("ofertas_*.parquet")
+    ] + [
+        f.name for f in base_path.glob("ofertas_*.sqlite")
+    ] + [
+        f.name for f in base_path.glob("ofertas_*.segmentos")
+    ] + [
+        f.name for f in base_path.glob("ofertas_*.jsonz")
     ]
 
     # Buscar archivos de cargos
@@ -160,13 +263,16 @@ def filtrar_ofertas(df: pd.DataFrame, **filtros) -> pd.DataFrame:
         df_filtered = df_filtered[mask]
 
     # Filtro por rango de fechas
+    # (las fechas del registro son UTC: el límite se compara en la misma zona)
     if filtros.get('fecha_inicio') and 'finoferta' in df_filtered.columns:
-        df_filtered = df_filtered[df_filtered['finoferta'] >= pd.Timestamp(filtros['fecha_inicio'])]
+        desde = pd.Timestamp(filtros['fecha_inicio']).tz_localize(df_filtered['finoferta'].dt.tz)
+        df_filtered = df_filtered[df_filtered['finoferta'] >= desde]
 
     if filtros.get('fecha_fin') and 'finoferta' in df_filtered.columns:
-        df_filtered = df_filtered[df_filtered['finoferta'] <= pd.Timestamp(filtros['fecha_fin'])]
+        hasta = pd.Timestamp(filtros['fecha_fin']).tz_localize(df_filtered['finoferta'].dt.tz)
+        df_filtered = df_filtered[df_filtered['finoferta'] <= hasta]
 
-    return df_filtered
+    return sin_categorias_vacias(df_filtered)
 
 
 def format_oferta_detalle(oferta: pd.Series) -> Dict:
@@ -4,6 +4,7 @@ Script para validar ofertas contra la lista de cargos conocidos
 import json
 import pandas as pd
 from cargos import CargoRepository
+from dataset_ofertas import cargar_ofertas
 
 
 def validar_ofertas_con_cargos(
@@ -16,11 +17,12 @@ def validar_ofertas_con_cargos(
 
     print("Cargando datos...")
 
-    # Cargar ofertas
-    with open(archivo_ofertas, 'r', encoding='utf-8') as f:
-        data_ofertas = json.load(f)
-
-    df_ofertas = pd.DataFrame(data_ofertas['ofertas'])
+    # Cargar ofertas (JSON o dataset Parquet), solo las columnas que se validan
+    df_ofertas, _ = cargar_ofertas(
+        archivo_ofertas,
+        ['ige', 'cargo', 'areaincumbencia', 'descdistrito', 'descnivelmodalidad'],
+        reportar=True,
+    )
     print(f"Total ofertas: {len(df_ofertas):,}")
 
     # Cargar cargos
@@ -33,17 +35,24 @@ def validar_ofertas_con_cargos(
     print("="*70)
 
     resultados = []
+    # cargo y areaincumbencia son category: hay pocos pares distintos, así
+    # que cada par se busca en el repositorio una sola vez
+    encontrados = {}
 
-    for idx, row in df_ofertas.iterrows():
+    for row in df_ofertas.astype(object).where(df_ofertas.notna(), None).to_dict('records'):
         cargo_oferta = row['cargo']
         area_incumbencia = row.get('areaincumbencia', '')
 
-        # Buscar coincidencia exacta por área
-        cargo_encontrado = repo.buscar_area_exacta(cargo_oferta)
+        par = (cargo_oferta, area_incumbencia)
+        if par not in encontrados:
+            # Buscar coincidencia exacta por área
+            cargo_encontrado = repo.buscar_area_exacta(cargo_oferta)
 
-        # Si no se encuentra, buscar por código
-        if not cargo_encontrado and area_incumbencia:
-            cargo_encontrado = repo.buscar_por_codigo(area_incumbencia)
+            # Si no se encuentra, buscar por código
+            if not cargo_encontrado and area_incumbencia:
+                cargo_encontrado = repo.buscar_por_codigo(area_incumbencia)
+            encontrados[par] = cargo_encontrado
+        cargo_encontrado = encontrados[par]
 
         resultado = {
             'ige': row['ige'],
@@ -1,14 +1,13 @@
 """
 Script simple para ver un resumen de las ofertas extraidas
 """
-import json
-from collections import Counter
+from dataset_ofertas import cargar_ofertas
 
-with open('ofertas_muestra.json', 'r', encoding='utf-8') as f:
-    data = json.load(f)
+# Solo las columnas que se muestran (con Parquet no se lee el resto)
+COLUMNAS = ['cargo', 'estado', 'descdistrito', 'escuela', 'descnivelmodalidad', 'finoferta', 'ige']
 
-ofertas = data['ofertas']
-metadata = data['metadata']
+# (el JSON se lee de a lotes, así que sirve para archivos de cualquier tamaño)
+df, metadata = cargar_ofertas('ofertas_muestra.json', COLUMNAS)
 
 print("="*60)
 print("RESUMEN DE OFERTAS EXTRAIDAS")
@@ -20,7 +19,7 @@ print()
 # Ver primeras 3 ofertas resumidas
 print(">> PRIMERAS 3 OFERTAS:")
 print("-"*60)
-for i, oferta in enumerate(ofertas[:3], 1):
+for i, oferta in enumerate(df.head(3).to_dict('records'), 1):
     print(f"\n{i}. {oferta.get('cargo', 'Sin cargo')}")
     print(f"   Estado: {oferta.get('estado', 'N/A')}")
     print(f"   Distrito: {oferta.get('descdistrito', 'N/A')}")
@@ -34,19 +33,19 @@ print("\n" + "="*60)
 print("ESTADISTICAS")
 print("="*60)
 
-estados = Counter(o.get('estado') for o in ofertas)
+estados = df['estado'].value_counts(dropna=False)
 print("\nPor Estado:")
-for estado, cant in estados.most_common():
-    pct = (cant/len(ofertas))*100
+for estado, cant in estados.items():
+    pct = (cant/len(df))*100
     print(f"  {estado:20} {cant:5} ({pct:5.1f}%)")
 
 print("\nTop 10 Distritos:")
-distritos = Counter(o.get('descdistrito') for o in ofertas)
-for distrito, cant in distritos.most_common(10):
+distritos = df['descdistrito'].value_counts(dropna=False)
+for distrito, cant in distritos.head(10).items():
     print(f"  {distrito:30} {cant:4}")
 
 print("\nTop 10 Cargos:")
-cargos = Counter(o.get('cargo') for o in ofertas)
-for cargo, cant in cargos.most_common(10):
+cargos = df['cargo'].value_counts(dropna=False)
+for cargo, cant in cargos.head(10).items():
     cargo_txt = (cargo[:40] + '...') if len(cargo) > 40 else cargo
     print(f"  {cargo_txt:43} {cant:4}")